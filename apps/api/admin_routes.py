@@ -3,6 +3,25 @@ from typing import Dict, Any, List
 import logging
 from auth import require_admin, require_owner
 from database import db
+from http_client_pool import llm_http_pool
+from generation_cache import generation_cache
+from generation_service import generation_service
+from circuit_breaker import model_breakers
+from hedging import hedge_policy
+from gemini_context_cache import gemini_context_cache
+from output_budget import output_budget
+from mermaid_repair import mermaid_repairer
+from llm_router import llm_router
+from concurrency_limiter import concurrency_stats
+from generation_scheduler import generation_scheduler
+from generation_jobs import generation_jobs
+from diagram_layout import layout_engine
+from layout_cache import layout_cache
+from diagram_clustering import diagram_clusterer
+from diagram_diff import diagram_differ
+from version_delta import version_delta_store
+from code_blobs import code_blob_store
+from diagram_canonical import diagram_canonicalizer
 from datetime import datetime, timedelta
 import json
 from pathlib import Path
@@ -261,3 +280,250 @@ async def system_cleanup(
     except Exception as e:
         logger.error(f"System cleanup failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/pool")
+async def get_llm_pool_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """LLM HTTP 클라이언트 풀 통계 조회"""
+    try:
+        return {
+            "success": True,
+            "pool": llm_http_pool.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"LLM pool stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/cache")
+async def get_generation_cache_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """생성 캐시 히트/미스, 근사 중복 인덱스, in-flight 합류 및 canonical_hash 계산 통계 조회"""
+    try:
+        return {
+            "success": True,
+            "cache": generation_cache.stats(),
+            "near_duplicate": generation_service.index.stats(),
+            "gemini_context_cache": gemini_context_cache.stats(),
+            "inflight": generation_service.inflight.stats(),
+            "canonical": diagram_canonicalizer.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Generation cache stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/llm/cache/clear")
+async def clear_generation_cache(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """생성 캐시 메모리 계층 및 근사 중복 인덱스 비우기"""
+    try:
+        generation_cache.clear()
+        generation_service.index.clear()
+        return {
+            "success": True,
+            "message": "Generation cache cleared",
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Generation cache clear failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/breakers")
+async def get_llm_breakers(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """모델별 서킷 브레이커 상태 조회"""
+    try:
+        return {
+            "success": True,
+            "breakers": model_breakers.snapshot(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"LLM breaker status failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/llm/breakers/{model_name}/reset")
+async def reset_llm_breaker(
+    model_name: str,
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """모델 서킷 브레이커 강제 closed 전환"""
+    if not model_breakers.reset(model_name):
+        raise HTTPException(status_code=404, detail="Breaker not found")
+
+    logger.info(f"Circuit breaker {model_name} reset by admin {current_user.id}")
+    return {
+        "success": True,
+        "breaker": model_breakers.get(model_name).snapshot(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@router.get("/llm/hedging")
+async def get_llm_hedging_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """헤지 요청 비율 및 승리 통계 조회"""
+    try:
+        return {
+            "success": True,
+            "hedging": hedge_policy.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"LLM hedging stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/output-budget")
+async def get_llm_output_budget_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """엔진/크기 등급별 출력 토큰 예산 이력 및 잘림 통계 조회"""
+    try:
+        return {
+            "success": True,
+            "output_budget": output_budget.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"LLM output budget stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/repairs")
+async def get_mermaid_repair_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """로컬 Mermaid 자동 수리 적용 횟수(수리 종류별) 조회"""
+    try:
+        return {
+            "success": True,
+            "repairs": mermaid_repairer.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Mermaid repair stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/router")
+async def get_llm_router_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """멀티 프로바이더 라우터의 백엔드별 EWMA 지연/오류율/비용과 현재 순위 조회"""
+    try:
+        return {
+            "success": True,
+            "router": llm_router.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"LLM router stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/concurrency")
+async def get_llm_concurrency_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """프로바이더별 적응형 동시성 한도 및 대기열 통계 조회"""
+    try:
+        return {
+            "success": True,
+            "limiters": concurrency_stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"LLM concurrency stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/llm/scheduler")
+async def get_generation_scheduler_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """플랜별 생성 대기열 깊이 및 대기 시간 통계 조회"""
+    try:
+        return {
+            "success": True,
+            "scheduler": generation_scheduler.stats(),
+            "jobs": generation_jobs.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Generation scheduler stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/layout")
+async def get_layout_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """서버 측 레이아웃 소요 시간, 증분 레이아웃 캐시 적중/증분 배치 비율, 클러스터 요약 횟수, 버전 비교 캐시 조회"""
+    try:
+        return {
+            "success": True,
+            "engine": layout_engine.stats(),
+            "cache": layout_cache.stats(),
+            "clustering": diagram_clusterer.stats(),
+            "diff": diagram_differ.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Layout stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/task-versions/storage")
+async def get_task_version_storage_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """TaskVersion 키프레임/델타 저장 비율, 압축률, 복원 LRU 적중률 조회"""
+    try:
+        return {
+            "success": True,
+            "storage": version_delta_store.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Task version storage stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/code-blobs")
+async def get_code_blob_stats(
+    current_user: Dict[str, Any] = Depends(require_admin)
+):
+    """코드 blob 수/총 크기/참조 수, 아직 인라인인 행 수, blob LRU 적중률 조회"""
+    try:
+        return {
+            "success": True,
+            "storage": await db.get_code_blob_stats(),
+            "cache": code_blob_store.stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Code blob stats failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
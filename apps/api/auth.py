@@ -20,6 +20,8 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60  # 30일
 
 # HTTP Bearer 토큰
 security = HTTPBearer()
+# 토큰이 없어도 통과하는 선택적 HTTP Bearer (익명 허용 엔드포인트용)
+optional_security = HTTPBearer(auto_error=False)
 
 # 테스트 모드 사용자 데이터
 TEST_USERS = {
@@ -143,6 +145,16 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
         )
     return current_user
 
+def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)) -> Optional[User]:
+    """토큰이 있으면 사용자 정보, 없거나 유효하지 않으면 None 반환 (익명 허용)"""
+    if credentials is None:
+        return None
+    try:
+        user = get_current_user(credentials)
+    except HTTPException:
+        return None
+    return user if user.status == "ACTIVE" else None
+
 def require_role(required_role: str):
     """역할 기반 접근 제어"""
     def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
@@ -0,0 +1,82 @@
+# apps/api/benchmarks/layout_benchmark.py
+"""서버 측 다이어그램 레이아웃 벤치마크
+
+apps/api 에서 실행:
+    python benchmarks/layout_benchmark.py [--sizes 500,5000,50000] [--repeat 3] [--extra-edge-ratios 0.05,0.3]
+    python benchmarks/layout_benchmark.py --algorithm force --sizes 1000,10000 [--deadline-ms 5000]
+
+임의의 계층형 그래프(가까운 앞 노드로 향하는 트리 엣지 + 노드 수 × 비율만큼의 역방향/장거리 엣지)를 만들어
+layered 는 단계별 소요 시간과 계층/더미 노드 수(예산 LAYOUT_MAX_DUMMY_FACTOR 를 넘어 넣지 못한 수 포함),
+force 는 수행한 반복 횟수를 출력한다. 기본 비율 0.05 는 더미가 모두 들어가는 그래프,
+0.3 은 더미 예산을 넘는 그래프다.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagram_parser import DiagramGraph  # noqa: E402
+from diagram_layout import FORCE, LAYERED, layout_engine  # noqa: E402
+
+
+def build_graph(n: int, extra_edge_ratio: float = 0.3, seed: int = 42) -> DiagramGraph:
+    rng = random.Random(seed)
+    graph = DiagramGraph("visjs", "network", "TB")
+    for i in range(n):
+        graph.add_node(str(i))
+    for i in range(1, n):
+        graph.add_edge(str(rng.randrange(max(0, i - 50), i)), str(i))
+        if rng.random() < extra_edge_ratio:
+            graph.add_edge(str(i), str(rng.randrange(n)))
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--algorithm", choices=(LAYERED, FORCE), default=LAYERED)
+    parser.add_argument("--sizes", default="500,5000,50000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--extra-edge-ratios", default="0.05,0.3")
+    parser.add_argument("--iterations", type=int, default=None)
+    parser.add_argument("--deadline-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    if args.algorithm == FORCE:
+        print(f"{'nodes':>8} {'edges':>8} {'iterations':>11} {'deadline':>9} {'median_ms':>10}")
+    else:
+        print(
+            f"{'ratio':>6} {'nodes':>8} {'edges':>8} {'layers':>7} {'dummies':>8} {'skipped':>8} {'median_ms':>10}"
+            f"  phases (last run, ms)"
+        )
+    ratios = [float(ratio) for ratio in args.extra_edge_ratios.split(",")]
+    if args.algorithm == FORCE:
+        ratios = ratios[-1:]
+    cases = [(ratio, int(size)) for ratio in ratios for size in args.sizes.split(",")]
+    for ratio, n in cases:
+        graph = build_graph(n, ratio)
+        elapsed = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            if args.algorithm == FORCE:
+                _, stats = layout_engine.force(graph, iterations=args.iterations, deadline_ms=args.deadline_ms)
+            else:
+                _, stats = layout_engine.layered(graph)
+            elapsed.append((time.perf_counter() - started) * 1000)
+        if args.algorithm == FORCE:
+            print(
+                f"{n:>8} {stats['edges']:>8} {stats['iterations']:>11} {str(stats['deadline_hit']):>9} "
+                f"{statistics.median(elapsed):>10.1f}"
+            )
+        else:
+            print(
+                f"{ratio:>6} {n:>8} {stats['edges']:>8} {stats['layers']:>7} {stats['dummy_nodes']:>8} "
+                f"{stats['dummies_skipped']:>8} {statistics.median(elapsed):>10.1f}  {stats['timings_ms']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
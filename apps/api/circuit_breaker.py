@@ -0,0 +1,238 @@
+# apps/api/circuit_breaker.py
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """모델 단위 서킷 브레이커 (closed → open → half_open → closed)
+
+    최근 window 개 호출의 오류율 또는 느린 호출 비율이 임계값을 넘으면 open 되어
+    호출을 즉시 건너뛴다. open 시간이 지나면 half_open 에서 제한된 시험 호출을 허용하고,
+    성공하면 closed, 실패하면 open 시간을 두 배로 늘려 다시 open 한다.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.window_size = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+        self.min_requests = int(os.getenv("LLM_BREAKER_MIN_REQUESTS", "5"))
+        self.error_rate_threshold = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+        self.slow_call_seconds = float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", "20"))
+        self.slow_call_rate_threshold = float(os.getenv("LLM_BREAKER_SLOW_CALL_RATE", "0.8"))
+        self.base_open_seconds = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+        self.max_open_seconds = float(os.getenv("LLM_BREAKER_MAX_OPEN_SECONDS", "300"))
+        self.half_open_max_calls = int(os.getenv("LLM_BREAKER_HALF_OPEN_CALLS", "1"))
+
+        self.state = CLOSED
+        self.open_seconds = self.base_open_seconds
+        self.opened_at: Optional[float] = None
+        self.half_opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._outcomes: Deque[Tuple[bool, float]] = deque(maxlen=self.window_size)
+        self._half_open_in_flight = 0
+        self._stats = {
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "opened": 0,
+            "probes": 0,
+            "probe_failures": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # state transitions
+    # ------------------------------------------------------------------
+    def _open(self, reason: str, backoff: bool = False):
+        if backoff:
+            # 시험 호출/프로브 실패: open 시간 지수 백오프
+            self.open_seconds = min(self.open_seconds * 2, self.max_open_seconds)
+        if self.state != OPEN:
+            self._stats["opened"] += 1
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._half_open_in_flight = 0
+        logger.warning(f"🔴 Circuit for {self.name} opened for {self.open_seconds:.0f}s: {reason}")
+
+    def _half_open(self):
+        self.state = HALF_OPEN
+        self.half_opened_at = time.monotonic()
+        self._half_open_in_flight = 0
+        logger.info(f"🟡 Circuit for {self.name} half-open")
+
+    def _close(self):
+        self.state = CLOSED
+        self.opened_at = None
+        self.open_seconds = self.base_open_seconds
+        self._outcomes.clear()
+        self._half_open_in_flight = 0
+        logger.info(f"🟢 Circuit for {self.name} closed")
+
+    def cooldown_elapsed(self) -> bool:
+        return self.state == OPEN and self.opened_at is not None and \
+            time.monotonic() - self.opened_at >= self.open_seconds
+
+    # ------------------------------------------------------------------
+    # request gating
+    # ------------------------------------------------------------------
+    def allow_request(self) -> bool:
+        """호출 허용 여부 (open 상태면 즉시 거절)"""
+        if self.state == OPEN and self.cooldown_elapsed():
+            self._half_open()
+
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN:
+            # 결과를 보고하지 못한 시험 호출(취소 등)이 슬롯을 영구 점유하지 않도록 주기적으로 재허용
+            if self.half_opened_at is not None and time.monotonic() - self.half_opened_at >= self.open_seconds:
+                self._half_open()
+            if self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+
+        self._stats["rejected"] += 1
+        return False
+
+    def release_trial(self):
+        """allow_request 로 받은 시험 호출 슬롯을 결과 없이 반환 (호출 전에 부하 차단된 경우 등)"""
+        if self.state == HALF_OPEN and self._half_open_in_flight > 0:
+            self._half_open_in_flight -= 1
+
+    def record_success(self, latency: float):
+        self._stats["successes"] += 1
+        if self.state == HALF_OPEN:
+            self._close()
+            return
+        self._outcomes.append((True, latency))
+        self._evaluate()
+
+    def record_failure(self, latency: float, error: str):
+        self._stats["failures"] += 1
+        self.last_error = error
+        if self.state == HALF_OPEN:
+            self._open(f"half-open trial failed: {error}", backoff=True)
+            return
+        self._outcomes.append((False, latency))
+        self._evaluate()
+
+    def _evaluate(self):
+        if self.state != CLOSED or len(self._outcomes) < self.min_requests:
+            return
+        total = len(self._outcomes)
+        errors = sum(1 for ok, _ in self._outcomes if not ok)
+        slow = sum(1 for _, latency in self._outcomes if latency >= self.slow_call_seconds)
+        if errors / total >= self.error_rate_threshold:
+            self._open(f"error rate {errors}/{total}")
+        elif slow / total >= self.slow_call_rate_threshold:
+            self._open(f"slow call rate {slow}/{total} (>= {self.slow_call_seconds:.0f}s)")
+
+    def record_probe(self, healthy: bool):
+        """백그라운드 프로브 결과 반영: 성공 시 half_open 으로 시험 호출 허용"""
+        self._stats["probes"] += 1
+        if healthy:
+            self._half_open()
+        else:
+            self._stats["probe_failures"] += 1
+            self._open("background probe failed", backoff=True)
+
+    def reset(self):
+        self._close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        total = len(self._outcomes)
+        errors = sum(1 for ok, _ in self._outcomes if not ok)
+        latencies = sorted(latency for _, latency in self._outcomes)
+        retry_in = None
+        if self.state == OPEN and self.opened_at is not None:
+            retry_in = max(0.0, round(self.open_seconds - (time.monotonic() - self.opened_at), 1))
+        return {
+            "name": self.name,
+            "state": self.state,
+            "window": total,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "p50_latency": round(latencies[total // 2], 3) if total else None,
+            "open_seconds": self.open_seconds,
+            "retry_in_seconds": retry_in,
+            "last_error": self.last_error,
+            **self._stats,
+        }
+
+
+class CircuitBreakerRegistry:
+    """요청 간에 공유되는 이름별 서킷 브레이커 저장소 및 백그라운드 프로브 루프"""
+
+    def __init__(self):
+        self.probe_interval = float(os.getenv("LLM_BREAKER_PROBE_INTERVAL", "5"))
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._probes: Dict[str, Callable[[], Awaitable[bool]]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            self._breakers[name] = breaker
+        return breaker
+
+    def set_probe(self, name: str, probe: Callable[[], Awaitable[bool]]):
+        """open 상태에서 백그라운드로 상태를 확인할 프로브 함수 등록"""
+        self._probes[name] = probe
+
+    def reset(self, name: str) -> bool:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            return False
+        breaker.reset()
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: b.snapshot() for name, b in self._breakers.items()}
+
+    async def probe_open_breakers(self):
+        """쿨다운이 끝난 open 브레이커를 프로브해 성공 시 half_open 으로 전환"""
+        for name, breaker in list(self._breakers.items()):
+            probe = self._probes.get(name)
+            if probe is None or not breaker.cooldown_elapsed():
+                continue
+            try:
+                healthy = await probe()
+            except Exception as e:
+                healthy = False
+                logger.debug(f"Probe for {name} raised: {e}")
+            breaker.record_probe(healthy)
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                await self.probe_open_breakers()
+            except Exception as e:
+                logger.error(f"Circuit breaker probe loop error: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# 전역 모델 서킷 브레이커 저장소
+model_breakers = CircuitBreakerRegistry()
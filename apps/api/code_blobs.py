@@ -0,0 +1,83 @@
+# apps/api/code_blobs.py
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+
+def canonicalize_code(code: str) -> str:
+    """저장용 정규화: 줄바꿈을 LF 로 통일하고 줄 끝 공백과 앞뒤 빈 줄 제거 (렌더링 결과는 같음)"""
+    lines = code.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def code_blob_hash(code: str) -> str:
+    """정규화한 코드의 SHA-256 (code_blobs 테이블 키)"""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+class CodeBlobStore:
+    """다이어그램 코드 blob 의 정규화/주소 계산 + 해시 → 코드 LRU
+
+    blob 은 내용 주소라 한 번 읽은 코드는 무효화할 필요가 없다.
+    참조 수 관리는 행 저장과 같은 트랜잭션에서 database_pg 가 담당한다.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("CODE_BLOB_STORE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+        self.max_bytes = int(os.getenv("CODE_BLOB_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"stored": 0, "hits": 0, "misses": 0, "evictions": 0}
+
+    def prepare(self, code: str) -> Tuple[str, str]:
+        """(정규화한 코드, 해시)"""
+        canonical = canonicalize_code(code)
+        return canonical, code_blob_hash(canonical)
+
+    def get(self, digest: str) -> Optional[str]:
+        code = self._cache.get(digest)
+        if code is None:
+            self._stats["misses"] += 1
+            return None
+        self._cache.move_to_end(digest)
+        self._stats["hits"] += 1
+        return code
+
+    def put(self, digest: str, code: str) -> None:
+        if digest in self._cache:
+            self._cache.move_to_end(digest)
+            return
+        size = len(code)
+        if size > self.max_bytes:
+            return
+        self._cache[digest] = code
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._stats["evictions"] += 1
+
+    def record_stored(self, count: int) -> None:
+        self._stats["stored"] += count
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "size": len(self._cache),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            **self._stats,
+        }
+
+
+# 전역 코드 blob 저장소
+code_blob_store = CodeBlobStore()
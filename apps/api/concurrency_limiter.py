@@ -0,0 +1,194 @@
+# apps/api/concurrency_limiter.py
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# release() 에 전달하는 호출 결과
+SUCCESS = "success"   # 정상 응답: 한도 가산 증가
+DROPPED = "dropped"   # 429/503/타임아웃: 한도 승산 감소
+IGNORE = "ignore"     # 그 외 오류/취소: 한도 변경 없음
+
+
+class LLMOverloadedError(Exception):
+    """대기열이 가득 찼거나 대기 시간이 초과되어 요청을 거절할 때 발생"""
+
+    def __init__(self, provider: str, retry_after: float, reason: str):
+        self.provider = provider
+        self.retry_after = max(1.0, retry_after)
+        self.reason = reason
+        super().__init__(f"LLM provider '{provider}' is overloaded: {reason}")
+
+
+class AdaptiveConcurrencyLimiter:
+    """프로바이더 단위 AIMD 적응형 동시성 제한기
+
+    성공할 때마다 한도를 1/limit 씩 늘리고(왕복당 약 +1), 429/503/타임아웃이면 backoff 비율로 줄인다.
+    한도를 넘는 요청은 제한된 시간 동안 대기열에서 기다리며, 대기열이 가득 차거나 대기 시간이 지나면
+    LLMOverloadedError 로 즉시 거절한다. Retry-After 를 받으면 그 시각까지 새 호출을 보류한다.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        prefix = f"LLM_CONCURRENCY_{name.upper()}_"
+
+        def _cfg(key: str, default: str) -> str:
+            return os.getenv(prefix + key, os.getenv("LLM_CONCURRENCY_" + key, default))
+
+        self.min_limit = float(_cfg("MIN", "1"))
+        self.max_limit = float(_cfg("MAX", "64"))
+        self.limit = min(self.max_limit, max(self.min_limit, float(_cfg("INITIAL", "8"))))
+        self.backoff_ratio = float(_cfg("BACKOFF", "0.5"))
+        self.max_queue = int(_cfg("MAX_QUEUE", "100"))
+        self.max_wait = float(_cfg("MAX_WAIT", "10"))
+
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._unblock_handle: Optional[asyncio.TimerHandle] = None
+        self._stats = {
+            "acquired": 0,
+            "queued": 0,
+            "shed": 0,
+            "successes": 0,
+            "drops": 0,
+            "retry_after_events": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # slot management
+    # ------------------------------------------------------------------
+    def _blocked_for(self) -> float:
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit) and self._blocked_for() == 0.0
+
+    def _shed(self, reason: str, retry_after: Optional[float] = None):
+        self._stats["shed"] += 1
+        logger.warning(f"🚦 [{self.name}] shedding request: {reason}")
+        raise LLMOverloadedError(self.name, retry_after or max(self._blocked_for(), self.max_wait), reason)
+
+    async def acquire(self):
+        """슬롯 확보 (대기열 초과/대기 시간 초과 시 LLMOverloadedError)"""
+        if not self._waiters and self._has_capacity():
+            self.in_flight += 1
+            self._stats["acquired"] += 1
+            return
+
+        blocked_for = self._blocked_for()
+        if blocked_for > self.max_wait:
+            self._shed(f"provider asked to retry after {blocked_for:.1f}s", blocked_for)
+        if len(self._waiters) >= self.max_queue:
+            self._shed(f"queue full ({self.max_queue})")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._stats["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(future)
+            self._shed(f"waited more than {self.max_wait:.0f}s for a slot")
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+        self._stats["acquired"] += 1
+
+    def _abandon(self, future: asyncio.Future):
+        """대기를 포기한 요청 정리: 이미 슬롯을 받았다면 반납"""
+        if future.done() and not future.cancelled():
+            self.release(IGNORE)
+            return
+        future.cancel()
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def _wake(self):
+        while self._waiters and self._has_capacity():
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def release(self, outcome: str = IGNORE):
+        """슬롯 반납 및 AIMD 한도 조정"""
+        self.in_flight = max(0, self.in_flight - 1)
+        if outcome == SUCCESS:
+            self._stats["successes"] += 1
+            self.limit = min(self.max_limit, self.limit + 1.0 / max(self.limit, 1.0))
+        elif outcome == DROPPED:
+            self._stats["drops"] += 1
+            previous = self.limit
+            self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+            logger.warning(f"🚦 [{self.name}] concurrency limit {previous:.1f} → {self.limit:.1f}")
+        self._wake()
+
+    def on_retry_after(self, seconds: float):
+        """프로바이더의 Retry-After 반영: 해당 시각까지 새 호출 보류"""
+        self._stats["retry_after_events"] += 1
+        until = time.monotonic() + max(0.0, seconds)
+        if until <= self.blocked_until:
+            return
+        self.blocked_until = until
+        logger.warning(f"🚦 [{self.name}] pausing new calls for {seconds:.1f}s (Retry-After)")
+        if self._unblock_handle is not None:
+            self._unblock_handle.cancel()
+        self._unblock_handle = asyncio.get_running_loop().call_later(seconds, self._wake)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queued_now": len(self._waiters),
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "blocked_for": round(self._blocked_for(), 1),
+            **self._stats,
+        }
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Retry-After 헤더(초 단위 또는 HTTP 날짜) 파싱"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return default
+
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+
+def get_concurrency_limiter(provider: str) -> AdaptiveConcurrencyLimiter:
+    """프로바이더별 공유 동시성 제한기"""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limiter = AdaptiveConcurrencyLimiter(provider)
+        _limiters[provider] = limiter
+    return limiter
+
+
+def concurrency_stats() -> Dict[str, Any]:
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
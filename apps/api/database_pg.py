@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, func, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 import uuid
@@ -8,8 +9,11 @@ import logging
 import os
 from models import (
     Base, User, Session as DBSession, Prompt, Task, TaskMessage, TaskVersion,
-    Visitor, Diagram, Export, Subscription, Payment, Share, SearchIndex
+    Visitor, Diagram, Export, Subscription, Payment, Share, SearchIndex, GenerationJob,
+    LayoutCache, CodeBlob
 )
+from code_blobs import code_blob_hash, code_blob_store
+from version_delta import version_delta_store
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +30,24 @@ class PostgreSQLDatabase:
         
         # 테이블 생성
         Base.metadata.create_all(bind=self.engine)
+        self._apply_schema_upgrades()
         logger.info("PostgreSQL database initialized")
 
+    def _apply_schema_upgrades(self):
+        """create_all 은 기존 테이블에 컬럼을 추가하지 않으므로 이후 추가된 컬럼을 보강 (반복 실행해도 안전)"""
+        statements = [
+            "ALTER TABLE task_versions ADD COLUMN IF NOT EXISTS base_id UUID REFERENCES task_versions(id)",
+            "ALTER TABLE task_versions ADD COLUMN IF NOT EXISTS delta TEXT",
+            "ALTER TABLE task_versions ADD COLUMN IF NOT EXISTS chain_depth INTEGER DEFAULT 0",
+            "ALTER TABLE task_versions ADD COLUMN IF NOT EXISTS code_hash VARCHAR(64) REFERENCES code_blobs(hash)",
+            "CREATE INDEX IF NOT EXISTS ix_task_versions_code_hash ON task_versions (code_hash)",
+            "ALTER TABLE diagrams ADD COLUMN IF NOT EXISTS code_hash VARCHAR(64) REFERENCES code_blobs(hash)",
+            "CREATE INDEX IF NOT EXISTS ix_diagrams_code_hash ON diagrams (code_hash)",
+        ]
+        with self.engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+
     def get_db(self) -> Session:
         """데이터베이스 세션 반환"""
         db = self.SessionLocal()
@@ -304,21 +324,242 @@ class PostgreSQLDatabase:
         finally:
             db.close()
 
+    # CodeBlob methods
+    @staticmethod
+    def _detach(db: Session, obj) -> None:
+        """복원한 code 를 채우기 전에 세션에서 분리 (변경이 flush 되지 않도록)"""
+        if obj in db:
+            db.expunge(obj)
+
+    def _acquire_code_blobs(self, db: Session, codes: List[str]) -> List[str]:
+        """코드들을 그대로 blob 으로 저장하고 참조 수를 늘림 (호출한 트랜잭션에서 커밋), 입력 순서대로 해시 반환"""
+        hashes = [code_blob_hash(code) for code in codes]
+        blobs: Dict[str, Dict[str, Any]] = {}
+        for digest, code in zip(hashes, codes):
+            if digest in blobs:
+                blobs[digest]["ref_count"] += 1
+            else:
+                blobs[digest] = {"hash": digest, "code": code, "size": len(code.encode("utf-8")), "ref_count": 1}
+        # 같은 해시를 한 문장에서 두 번 갱신할 수 없으므로 해시별로 합치고, 잠금 순서를 고정하려고 정렬
+        stmt = pg_insert(CodeBlob).values([blobs[digest] for digest in sorted(blobs)])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[CodeBlob.hash],
+            set_={"ref_count": CodeBlob.ref_count + stmt.excluded.ref_count}
+        ))
+        for digest, blob in blobs.items():
+            code_blob_store.put(digest, blob["code"])
+        code_blob_store.record_stored(len(codes))
+        return hashes
+
+    def _release_code_blob(self, db: Session, digest: Optional[str]) -> None:
+        """blob 참조 수 감소 (0 이 된 blob 은 purge_unreferenced_code_blobs 가 정리)"""
+        if digest:
+            db.query(CodeBlob).filter(CodeBlob.hash == digest).update(
+                {CodeBlob.ref_count: CodeBlob.ref_count - 1}, synchronize_session=False
+            )
+
+    def _resolve_blob_codes(self, db: Session, rows: List[Any]) -> List[Any]:
+        """code_hash 로 저장된 행(Diagram/TaskVersion)의 code 를 blob 에서 채움 (LRU 에 없는 것만 한 번에 조회)"""
+        targets = [row for row in rows if row is not None and row.code_hash and not row.code]
+        if not targets:
+            return rows
+        codes: Dict[str, str] = {}
+        for row in targets:
+            if row.code_hash not in codes:
+                cached = code_blob_store.get(row.code_hash)
+                if cached is not None:
+                    codes[row.code_hash] = cached
+        missing = {row.code_hash for row in targets} - codes.keys()
+        if missing:
+            for digest, code in db.query(CodeBlob.hash, CodeBlob.code).filter(CodeBlob.hash.in_(missing)).all():
+                codes[digest] = code
+                code_blob_store.put(digest, code)
+        for row in targets:
+            if row.code_hash not in codes:
+                raise LookupError(f"Code blob missing: {row.code_hash}")
+            self._detach(db, row)
+            row.code = codes[row.code_hash]
+        return rows
+
+    async def acquire_code_blob(self, code: str) -> str:
+        """코드를 blob 으로 저장하고 참조를 하나 늘림 (DB 밖 저장소의 참조용), 해시 반환"""
+        db = self.get_db()
+        try:
+            canonical, _ = code_blob_store.prepare(code)
+            digest = self._acquire_code_blobs(db, [canonical])[0]
+            db.commit()
+            return digest
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to store code blob: {e}")
+            raise
+        finally:
+            db.close()
+
+    async def get_code_blob(self, digest: str) -> Optional[str]:
+        """해시로 blob 코드 조회"""
+        cached = code_blob_store.get(digest)
+        if cached is not None:
+            return cached
+        db = self.get_db()
+        try:
+            blob = db.query(CodeBlob).filter(CodeBlob.hash == digest).first()
+            if blob is None:
+                return None
+            code_blob_store.put(digest, blob.code)
+            return blob.code
+        finally:
+            db.close()
+
+    async def get_code_blob_stats(self) -> Dict[str, Any]:
+        """blob 수/총 크기/참조 수, 인라인으로 남아 있는 행 수 (마이그레이션 진행 확인용)"""
+        db = self.get_db()
+        try:
+            blobs, size, refs = db.query(
+                func.count(CodeBlob.hash), func.coalesce(func.sum(CodeBlob.size), 0),
+                func.coalesce(func.sum(CodeBlob.ref_count), 0)
+            ).one()
+            unreferenced = db.query(func.count(CodeBlob.hash)).filter(CodeBlob.ref_count <= 0).scalar()
+            inline_diagrams = db.query(func.count(Diagram.id)).filter(
+                Diagram.code_hash.is_(None), Diagram.code != ""
+            ).scalar()
+            inline_versions = db.query(func.count(TaskVersion.id)).filter(
+                TaskVersion.code_hash.is_(None), TaskVersion.delta.is_(None), TaskVersion.code != ""
+            ).scalar()
+            return {
+                "blobs": blobs,
+                "bytes": int(size),
+                "references": int(refs),
+                "unreferenced": unreferenced,
+                "inline_diagrams": inline_diagrams,
+                "inline_task_versions": inline_versions,
+            }
+        finally:
+            db.close()
+
+    async def migrate_inline_code_to_blobs(self, batch_size: int = 500) -> Dict[str, int]:
+        """code 를 직접 담고 있는 diagrams/task_versions(키프레임) 행 한 배치를 blob 참조로 전환
+
+        이미 전환된 행은 건너뛰므로 0 이 나올 때까지 반복 호출하면 된다 (동시 실행도 SKIP LOCKED 로 안전).
+        """
+        db = self.get_db()
+        try:
+            migrated = {"diagrams": 0, "task_versions": 0}
+            for model, key, extra in (
+                (Diagram, "diagrams", ()),
+                (TaskVersion, "task_versions", (TaskVersion.delta.is_(None),)),
+            ):
+                rows = db.query(model).filter(
+                    model.code_hash.is_(None), model.code != "", *extra
+                ).limit(batch_size).with_for_update(skip_locked=True).all()
+                if not rows:
+                    continue
+                # 델타 행이 키프레임 문자 위치를 참조하므로 기존 코드는 정규화하지 않고 그대로 옮긴다
+                for row, digest in zip(rows, self._acquire_code_blobs(db, [row.code for row in rows])):
+                    row.code_hash = digest
+                    row.code = ""
+                migrated[key] = len(rows)
+            db.commit()
+            return migrated
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to migrate inline code to blobs: {e}")
+            raise
+        finally:
+            db.close()
+
+    async def purge_unreferenced_code_blobs(self) -> int:
+        """참조 수가 0 이하인 blob 삭제 (삭제 직전에 다시 참조된 blob 은 조건에서 빠짐)"""
+        db = self.get_db()
+        try:
+            deleted = db.query(CodeBlob).filter(CodeBlob.ref_count <= 0).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to purge code blobs: {e}")
+            raise
+        finally:
+            db.close()
+
     # TaskVersion methods
+    def _query_previous_version(self, db: Session, task_id,
+                                created_before: Optional[datetime] = None) -> Optional[TaskVersion]:
+        """같은 태스크에서 (created_before 이전에) 가장 최근에 만든 버전
+
+        root_id 는 프런트엔드가 보내는 체인 루트라 직전 버전이 아니므로 기준으로 쓰지 않는다.
+        """
+        query = db.query(TaskVersion).filter(TaskVersion.task_id == task_id)
+        if created_before is not None:
+            query = query.filter(TaskVersion.created_at < created_before)
+        return query.order_by(TaskVersion.created_at.desc()).first()
+
+    def _resolve_version_codes(self, db: Session, versions: List[TaskVersion]) -> List[TaskVersion]:
+        """blob/델타로 저장된 버전의 code 를 복원해 채움
+
+        기준 버전 체인은 키프레임이나 LRU 에 있는 버전을 만날 때까지 단계별로 한 번에 읽는다.
+        복원한 코드는 세션에서 분리한 객체에만 설정하므로 DB 에는 반영되지 않는다.
+        """
+        rows = {str(version.id): version for version in versions}
+        pending = [version for version in versions if version.delta is not None]
+
+        # LRU 에 있던 기준 버전은 복원 도중 밀려날 수 있으므로 미리 꺼내 둔다
+        known: Dict[str, str] = {}
+        missing = {str(version.base_id) for version in pending}
+        while True:
+            for version_id in missing - rows.keys():
+                if version_delta_store.has(version_id):
+                    known[version_id] = version_delta_store.get(version_id)
+            missing = missing - rows.keys() - known.keys()
+            if not missing:
+                break
+            fetched = db.query(TaskVersion).filter(
+                TaskVersion.id.in_([uuid.UUID(version_id) for version_id in missing])
+            ).all()
+            if len(fetched) < len(missing):
+                raise LookupError(f"Delta base versions missing: {sorted(missing - {str(row.id) for row in fetched})}")
+            for row in fetched:
+                rows[str(row.id)] = row
+            missing = {str(row.base_id) for row in fetched if row.delta is not None}
+
+        self._resolve_blob_codes(db, [row for row in rows.values() if row.delta is None])
+        for version in pending:
+            self._detach(db, version)
+            version.code = version_delta_store.reconstruct(str(version.id), rows, known)
+        return versions
+
     async def create_task_version(self, task_id: str, code: str, engine: str = 'mermaid',
                                  root_id: Optional[str] = None) -> TaskVersion:
-        """새 태스크 버전 생성"""
+        """새 태스크 버전 생성 (직전 버전 대비 델타 또는 키프레임으로 저장, 키프레임 코드는 blob)"""
         db = self.get_db()
         try:
+            if code_blob_store.enabled:
+                code, _ = code_blob_store.prepare(code)
+            base = self._query_previous_version(db, task_id) if version_delta_store.enabled else None
+            if base is not None:
+                self._resolve_version_codes(db, [base])
+                delta, depth = version_delta_store.encode(code, base.code, base.chain_depth or 0)
+            else:
+                delta, depth = version_delta_store.encode(code, None, 0)
+            code_hash = None
+            if delta is None and code_blob_store.enabled:
+                code_hash = self._acquire_code_blobs(db, [code])[0]
             version = TaskVersion(
                 task_id=task_id,
-                code=code,
+                code=code if delta is None and code_hash is None else "",
                 engine=engine,
-                root_id=root_id
+                root_id=root_id,
+                code_hash=code_hash,
+                base_id=base.id if delta is not None else None,
+                delta=delta,
+                chain_depth=depth
             )
             db.add(version)
             db.commit()
             db.refresh(version)
+            db.expunge(version)
+            version.code = code
+            version_delta_store.put(str(version.id), code)
             logger.info(f"Created task version: {version.id}")
             return version
         except SQLAlchemyError as e:
@@ -332,7 +573,8 @@ class PostgreSQLDatabase:
         """태스크의 모든 버전 조회"""
         db = self.get_db()
         try:
-            return db.query(TaskVersion).filter(TaskVersion.task_id == task_id).all()
+            versions = db.query(TaskVersion).filter(TaskVersion.task_id == task_id).all()
+            return self._resolve_version_codes(db, versions)
         finally:
             db.close()
 
@@ -340,7 +582,62 @@ class PostgreSQLDatabase:
         """태스크 버전 조회"""
         db = self.get_db()
         try:
-            return db.query(TaskVersion).filter(TaskVersion.id == version_id).first()
+            version = db.query(TaskVersion).filter(TaskVersion.id == version_id).first()
+            if version is not None:
+                self._resolve_version_codes(db, [version])
+            return version
+        finally:
+            db.close()
+
+    async def get_previous_task_version(self, version: TaskVersion) -> Optional[TaskVersion]:
+        """직전 버전: 같은 태스크에서 바로 앞에 만든 버전 (root_id 는 체인 루트라 직전 버전이 아니다)"""
+        db = self.get_db()
+        try:
+            previous = self._query_previous_version(db, version.task_id, created_before=version.created_at)
+            if previous is not None:
+                self._resolve_version_codes(db, [previous])
+            return previous
+        finally:
+            db.close()
+
+    # LayoutCache methods
+    async def get_layout_cache(self, structure_hash: str) -> Optional[LayoutCache]:
+        """구조 해시로 저장된 레이아웃 조회 (적중 횟수/최근 사용 시각 갱신)"""
+        db = self.get_db()
+        try:
+            entry = db.query(LayoutCache).filter(LayoutCache.structure_hash == structure_hash).first()
+            if entry:
+                entry.hits = (entry.hits or 0) + 1
+                entry.last_used_at = datetime.utcnow()
+                db.commit()
+                db.refresh(entry)
+            return entry
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to read layout cache: {e}")
+            raise
+        finally:
+            db.close()
+
+    async def save_layout_cache(self, structure_hash: str, algorithm: str,
+                                positions: Dict[str, Any]) -> LayoutCache:
+        """레이아웃 저장 (같은 해시가 있으면 좌표 교체)"""
+        db = self.get_db()
+        try:
+            entry = db.query(LayoutCache).filter(LayoutCache.structure_hash == structure_hash).first()
+            if entry is None:
+                entry = LayoutCache(structure_hash=structure_hash, algorithm=algorithm)
+                db.add(entry)
+            entry.positions = positions
+            entry.node_count = len(positions)
+            entry.last_used_at = datetime.utcnow()
+            db.commit()
+            db.refresh(entry)
+            return entry
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to save layout cache: {e}")
+            raise
         finally:
             db.close()
 
@@ -355,20 +652,25 @@ class PostgreSQLDatabase:
                            prompt: Optional[str] = None,
                            meta: Optional[Dict[str, Any]] = None,
                            ttl_hours: Optional[int] = None) -> Diagram:
-        """새 다이어그램 생성"""
+        """새 다이어그램 생성 (코드는 blob 으로 저장하고 해시로 참조)"""
         db = self.get_db()
         try:
             ttl_expire_at = None
             if ttl_hours:
                 ttl_expire_at = datetime.utcnow() + timedelta(hours=ttl_hours)
 
+            code_hash = None
+            if code_blob_store.enabled and code:
+                code, _ = code_blob_store.prepare(code)
+                code_hash = self._acquire_code_blobs(db, [code])[0]
             diagram = Diagram(
                 visitor_id=visitor_id,
                 user_id=user_id,
                 session_id=session_id,
                 task_id=task_id,
                 engine=engine,
-                code=code,
+                code="" if code_hash else code,
+                code_hash=code_hash,
                 render_type=render_type,
                 prompt=prompt,
                 meta=meta or {},
@@ -377,6 +679,8 @@ class PostgreSQLDatabase:
             db.add(diagram)
             db.commit()
             db.refresh(diagram)
+            self._detach(db, diagram)
+            diagram.code = code
             logger.info(f"Created diagram: {diagram.id}")
             return diagram
         except SQLAlchemyError as e:
@@ -386,11 +690,108 @@ class PostgreSQLDatabase:
         finally:
             db.close()
 
+    async def create_diagrams_bulk(self, rows: List[Dict[str, Any]],
+                                   ttl_hours: Optional[int] = None) -> List[uuid.UUID]:
+        """다이어그램 여러 개를 한 트랜잭션으로 일괄 저장 (입력 순서대로 ID 반환)"""
+        db = self.get_db()
+        try:
+            ttl_expire_at = None
+            if ttl_hours:
+                ttl_expire_at = datetime.utcnow() + timedelta(hours=ttl_hours)
+
+            code_hashes = [None] * len(rows)
+            if code_blob_store.enabled and rows:
+                code_hashes = self._acquire_code_blobs(db, [code_blob_store.prepare(row['code'])[0] for row in rows])
+
+            diagrams = []
+            for row, code_hash in zip(rows, code_hashes):
+                diagrams.append(Diagram(
+                    id=uuid.uuid4(),
+                    engine=row.get('engine', 'mermaid'),
+                    code="" if code_hash else row['code'],
+                    code_hash=code_hash,
+                    render_type=row.get('render_type', 'readonly'),
+                    prompt=row.get('prompt'),
+                    meta=row.get('meta') or {},
+                    ttl_expire_at=ttl_expire_at
+                ))
+            # commit 후에는 속성이 만료되어 재조회가 일어나므로 ID 는 미리 확보
+            ids = [diagram.id for diagram in diagrams]
+            db.add_all(diagrams)
+            db.commit()
+            logger.info(f"Created {len(ids)} diagrams in bulk")
+            return ids
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to bulk create diagrams: {e}")
+            raise
+        finally:
+            db.close()
+
     async def get_diagram(self, diagram_id: str) -> Optional[Diagram]:
         """다이어그램 조회"""
         db = self.get_db()
         try:
-            return db.query(Diagram).filter(Diagram.id == diagram_id).first()
+            diagram = db.query(Diagram).filter(Diagram.id == diagram_id).first()
+            return self._resolve_blob_codes(db, [diagram])[0]
+        finally:
+            db.close()
+
+    async def update_diagram(self, diagram_id: str, code: Optional[str] = None,
+                             meta_updates: Optional[Dict[str, Any]] = None) -> Optional[Diagram]:
+        """다이어그램 코드 교체 / meta 키 병합"""
+        db = self.get_db()
+        try:
+            diagram = db.query(Diagram).filter(Diagram.id == diagram_id).first()
+            if diagram:
+                if code is not None:
+                    if code_blob_store.enabled:
+                        code, _ = code_blob_store.prepare(code)
+                        new_hash = self._acquire_code_blobs(db, [code])[0]
+                        self._release_code_blob(db, diagram.code_hash)
+                        diagram.code_hash = new_hash
+                        diagram.code = ""
+                    else:
+                        self._release_code_blob(db, diagram.code_hash)
+                        diagram.code_hash = None
+                        diagram.code = code
+                if meta_updates:
+                    # JSON 컬럼은 새 dict 를 할당해야 변경이 감지된다
+                    diagram.meta = {**(diagram.meta or {}), **meta_updates}
+                db.commit()
+                db.refresh(diagram)
+                self._resolve_blob_codes(db, [diagram])
+            return diagram
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to update diagram: {e}")
+            raise
+        finally:
+            db.close()
+
+    async def find_diagram_by_cache_key(self, cache_key: str, since: datetime) -> Optional[Diagram]:
+        """생성 캐시 키(meta.cache_key)로 최근 다이어그램 조회"""
+        db = self.get_db()
+        try:
+            now = datetime.utcnow()
+            diagram = db.query(Diagram).filter(
+                Diagram.meta['cache_key'].as_string() == cache_key,
+                Diagram.created_at >= since,
+                (Diagram.ttl_expire_at.is_(None)) | (Diagram.ttl_expire_at > now)
+            ).order_by(Diagram.created_at.desc()).first()
+            return self._resolve_blob_codes(db, [diagram])[0]
+        finally:
+            db.close()
+
+    async def get_recent_diagram_meta(self, limit: int = 1000) -> List[tuple]:
+        """최근 다이어그램의 (engine, prompt, meta) 목록 (출력 크기 통계용)"""
+        db = self.get_db()
+        try:
+            return [
+                (engine, prompt, meta)
+                for engine, prompt, meta in db.query(Diagram.engine, Diagram.prompt, Diagram.meta)
+                .order_by(Diagram.created_at.desc()).limit(limit).all()
+            ]
         finally:
             db.close()
 
@@ -398,7 +799,7 @@ class PostgreSQLDatabase:
         """사용자의 모든 다이어그램 조회"""
         db = self.get_db()
         try:
-            return db.query(Diagram).filter(Diagram.user_id == user_id).all()
+            return self._resolve_blob_codes(db, db.query(Diagram).filter(Diagram.user_id == user_id).all())
         finally:
             db.close()
 
@@ -577,5 +978,114 @@ class PostgreSQLDatabase:
         finally:
             db.close()
 
+    # Generation job methods
+    async def create_generation_job(self, prompt: str, engine: str = 'mermaid', provider: str = 'mock',
+                                    user_key: str = 'anonymous', plan: str = 'anonymous') -> GenerationJob:
+        """비동기 생성 작업 등록"""
+        db = self.get_db()
+        try:
+            job = GenerationJob(
+                prompt=prompt,
+                engine=engine,
+                provider=provider,
+                user_key=user_key,
+                plan=plan,
+                status="queued"
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            logger.info(f"Created generation job: {job.id}")
+            return job
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to create generation job: {e}")
+            raise
+        finally:
+            db.close()
+
+    async def get_generation_job(self, job_id: str) -> Optional[GenerationJob]:
+        """생성 작업 조회"""
+        db = self.get_db()
+        try:
+            return db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+        finally:
+            db.close()
+
+    async def claim_generation_job(self, worker_id: str) -> Optional[GenerationJob]:
+        """대기 중인 작업 하나를 running 으로 가져오기 (FOR UPDATE SKIP LOCKED 로 워커 간 중복 방지)"""
+        db = self.get_db()
+        try:
+            now = datetime.utcnow()
+            job = db.query(GenerationJob).filter(
+                GenerationJob.status == "queued",
+                GenerationJob.available_at <= now
+            ).order_by(GenerationJob.created_at).with_for_update(skip_locked=True).first()
+            if job is None:
+                db.rollback()
+                return None
+            job.status = "running"
+            job.worker_id = worker_id
+            job.attempts = (job.attempts or 0) + 1
+            job.heartbeat_at = now
+            job.updated_at = now
+            db.commit()
+            db.refresh(job)
+            return job
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to claim generation job: {e}")
+            raise
+        finally:
+            db.close()
+
+    async def update_generation_job(self, job_id: str, **updates) -> Optional[GenerationJob]:
+        """생성 작업 상태/결과 업데이트"""
+        db = self.get_db()
+        try:
+            job = db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+            if job:
+                for key, value in updates.items():
+                    if hasattr(job, key):
+                        setattr(job, key, value)
+                job.updated_at = datetime.utcnow()
+                db.commit()
+                db.refresh(job)
+            return job
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to update generation job: {e}")
+            raise
+        finally:
+            db.close()
+
+    async def requeue_stale_generation_jobs(self, stale_before: datetime, max_attempts: int) -> int:
+        """하트비트가 끊긴 running 작업(워커 종료 등)을 다시 대기열로 돌리거나 실패 처리"""
+        db = self.get_db()
+        try:
+            now = datetime.utcnow()
+            stale = db.query(GenerationJob).filter(
+                GenerationJob.status == "running",
+                GenerationJob.heartbeat_at < stale_before
+            ).with_for_update(skip_locked=True).all()
+            for job in stale:
+                if (job.attempts or 0) >= max_attempts:
+                    job.status = "failed"
+                    job.error = "Worker stopped responding"
+                    job.finished_at = now
+                else:
+                    job.status = "queued"
+                    job.available_at = now
+                job.worker_id = None
+                job.updated_at = now
+            db.commit()
+            return len(stale)
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Failed to requeue stale generation jobs: {e}")
+            raise
+        finally:
+            db.close()
+
 # 전역 데이터베이스 인스턴스
 db = PostgreSQLDatabase()
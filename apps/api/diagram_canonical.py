@@ -0,0 +1,234 @@
+# apps/api/diagram_canonical.py
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from diagram_converter import canonical_shape, to_dot, to_mermaid, to_visjs
+from diagram_parser import DiagramGraph, DiagramParseError, Subgraph, parse_diagram
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_MERMAID_COMMENT_RE = re.compile(r"^\s*%%(?!\{).*$", re.M)
+_DIRECTION_ALIASES = {"TD": "TB"}
+_EMITTERS = {"mermaid": to_mermaid, "visjs": to_visjs, "dot": to_dot}
+
+
+def _normalize_label(label: Optional[str]) -> str:
+    return _WHITESPACE_RE.sub(" ", label).strip() if label else ""
+
+
+def _rank(keys: List[Any]) -> List[int]:
+    """정렬 순위로 바꾼 색 (같은 키는 같은 색, 노드 순서와 무관)"""
+    order = {key: i for i, key in enumerate(sorted(set(keys)))}
+    return [order[key] for key in keys]
+
+
+def _refine(colors: List[int], out_adj: List[List[Tuple[int, int]]],
+            in_adj: List[List[Tuple[int, int]]]) -> Tuple[List[int], int]:
+    """1-WL 색 정제: 색 수가 더 늘지 않을 때까지 (자기 색, 나가는/들어오는 (엣지 종류, 이웃 색) 다중집합) 으로 재색칠
+
+    (정제된 색, 수행한 라운드 수)
+    """
+    count = len(set(colors))
+    rounds = 0
+    while True:
+        rounds += 1
+        signatures = [
+            (colors[v],
+             tuple(sorted((kind, colors[u]) for kind, u in out_adj[v])),
+             tuple(sorted((kind, colors[u]) for kind, u in in_adj[v])))
+            for v in range(len(colors))
+        ]
+        refined = _rank(signatures)
+        refined_count = len(set(refined))
+        if refined_count == count:
+            return refined, rounds
+        colors, count = refined, refined_count
+
+
+def canonical_order(graph: DiagramGraph, refine_budget: int = 500_000) -> List[str]:
+    """위상 기준 정규 노드 순서 (노드 ID/선언 순서와 무관)
+
+    표시 내용(라벨, 모양, 서브그래프 경로)으로 초기 색을 매긴 뒤 1-WL 로 정제하고,
+    남은 동색 노드는 하나씩 개별화 → 재정제해 순서를 확정한다. 자기동형인 노드는 어느 쪽을
+    골라도 같은 결과가 나온다. 정제 작업량((노드 + 엣지) × 라운드)이 refine_budget 을 넘으면
+    나머지 동색 노드는 원래 순서로 정한다 (같은 입력이면 같은 결과지만 대칭이 큰 그래프는
+    선언 순서에 따라 해시가 달라질 수 있다).
+    """
+    ids = list(graph.nodes)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+
+    def sub_path(sub_id: Optional[str]) -> Tuple[str, ...]:
+        path = []
+        while sub_id is not None:
+            sub = graph.subgraphs[sub_id]
+            path.append(_normalize_label(sub.label or sub.id))
+            sub_id = sub.parent
+        return tuple(reversed(path))
+
+    colors = _rank([
+        (_node_label(graph, node_id), _node_shape(graph, node_id), sub_path(graph.nodes[node_id].subgraph))
+        for node_id in ids
+    ])
+    edge_kinds = _rank([(_normalize_label(edge.label), edge.directed) for edge in graph.edges])
+    out_adj: List[List[Tuple[int, int]]] = [[] for _ in ids]
+    in_adj: List[List[Tuple[int, int]]] = [[] for _ in ids]
+    for edge, kind in zip(graph.edges, edge_kinds):
+        source, target = index[edge.source], index[edge.target]
+        out_adj[source].append((kind, target))
+        in_adj[target].append((kind, source))
+
+    size = len(ids) + len(graph.edges)
+    colors, rounds = _refine(colors, out_adj, in_adj)
+    work = rounds * size
+    while work < refine_budget:
+        members: Dict[int, List[int]] = {}
+        for v, color in enumerate(colors):
+            members.setdefault(color, []).append(v)
+        tied = [color for color, vs in members.items() if len(vs) > 1]
+        if not tied:
+            break
+        chosen = members[min(tied)][0]
+        colors, rounds = _refine(_rank([(color, v != chosen) for v, color in enumerate(colors)]), out_adj, in_adj)
+        work += rounds * size
+    return [ids[v] for v in sorted(range(len(ids)), key=lambda v: (colors[v], v))]
+
+
+def _node_label(graph: DiagramGraph, node_id: str) -> str:
+    # 라벨이 없는 Mermaid 노드는 ID 가 그대로 표시되므로 ID 를 라벨로 고정한 뒤 이름을 바꾼다
+    label = graph.nodes[node_id].label
+    return _normalize_label(label if label is not None else node_id)
+
+
+def _node_shape(graph: DiagramGraph, node_id: str) -> str:
+    shape = graph.nodes[node_id].shape
+    if graph.engine == "mermaid":
+        return shape or "rect"
+    return canonical_shape(graph.engine, shape) or (shape or "").lower()
+
+
+def canonical_graph(graph: DiagramGraph, refine_budget: int = 500_000) -> DiagramGraph:
+    """노드 ID 를 위상 순서(n1, n2, ...)로, 서브그래프를 sg1, sg2, ... 로 바꾸고
+    라벨 공백 정리, 엣지 정렬, 방향 별칭(TD → TB) 통일을 적용한 그래프
+    """
+    order = canonical_order(graph, refine_budget)
+    renamed = {node_id: f"n{i}" for i, node_id in enumerate(order, 1)}
+
+    # 서브그래프는 (경로 라벨, 처음 나오는 정규 노드 순번) 순으로 번호를 매긴다
+    first_member: Dict[str, int] = {}
+    for i, node_id in enumerate(order):
+        sub_id = graph.nodes[node_id].subgraph
+        while sub_id is not None and sub_id not in first_member:
+            first_member[sub_id] = i
+            sub_id = graph.subgraphs[sub_id].parent
+
+    def sub_key(sub_id: str) -> Tuple[Any, ...]:
+        sub = graph.subgraphs[sub_id]
+        return (_normalize_label(sub.label or sub.id), first_member.get(sub_id, len(order)))
+
+    sub_order = sorted(graph.subgraphs, key=sub_key)
+    sub_renamed = {sub_id: f"sg{i}" for i, sub_id in enumerate(sub_order, 1)}
+
+    direction = graph.direction
+    canonical = DiagramGraph(graph.engine, graph.kind, _DIRECTION_ALIASES.get(direction, direction))
+    for sub_id in sub_order:
+        sub = graph.subgraphs[sub_id]
+        canonical.subgraphs[sub_renamed[sub_id]] = Subgraph(
+            sub_renamed[sub_id],
+            _normalize_label(sub.label or sub.id),
+            sub_renamed[sub.parent] if sub.parent is not None else None,
+        )
+    for node_id in order:
+        node = graph.nodes[node_id]
+        canonical.add_node(
+            renamed[node_id],
+            _node_label(graph, node_id),
+            node.shape or ("rect" if graph.engine == "mermaid" else None),
+            sub_renamed[node.subgraph] if node.subgraph is not None else None,
+        )
+    edges = sorted(
+        (int(renamed[edge.source][1:]), int(renamed[edge.target][1:]), _normalize_label(edge.label), edge.directed)
+        for edge in graph.edges
+    )
+    for source, target, label, directed in edges:
+        canonical.add_edge(f"n{source}", f"n{target}", label or None, directed)
+    return canonical
+
+
+def normalize_text(code: str, engine: str) -> str:
+    """그래프로 해석할 수 없는 코드의 정규화: 주석 제거, 줄 단위 공백 정리, 빈 줄 제거"""
+    if engine == "mermaid":
+        code = _MERMAID_COMMENT_RE.sub("", code)
+    lines = (_WHITESPACE_RE.sub(" ", line).strip() for line in code.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def canonicalize(code: str, engine: str, refine_budget: int = 500_000) -> Tuple[str, str, bool]:
+    """(정규형 코드, canonical_hash, 그래프 정규화 여부)
+
+    Mermaid 플로우차트 / vis.js / DOT 은 그래프 정규형으로 다시 쓰고 (주석, 좌표 등 표시와 무관한 속성은
+    파서 단계에서 빠진다), 그 밖의 코드는 주석/공백만 정리한다. 해시는 엔진과 정규형 코드의 SHA-256.
+    """
+    try:
+        canonical_code = _EMITTERS[engine](canonical_graph(parse_diagram(code, engine), refine_budget))
+        structural = True
+    except (DiagramParseError, KeyError):
+        canonical_code = normalize_text(code, engine)
+        structural = False
+    digest = hashlib.sha256(f"{engine}\n{canonical_code}".encode("utf-8")).hexdigest()
+    return canonical_code, digest, structural
+
+
+class DiagramCanonicalizer:
+    """canonical_hash 계산 + (엔진, 원본 코드 해시) 키 LRU
+
+    공백/주석/노드 ID/문장 순서만 다른 다이어그램은 같은 canonical_hash 를 가지므로
+    내보내기/레이아웃/렌더 캐시가 Diagram.meta.canonical_hash 를 키로 항목을 공유할 수 있다.
+    asyncio.to_thread 로 여러 스레드에서 호출되므로 LRU 접근은 잠금으로 보호한다 (계산은 잠금 밖).
+    """
+
+    def __init__(self):
+        self.max_entries = int(os.getenv("DIAGRAM_CANONICAL_CACHE_SIZE", "1024"))
+        self.refine_budget = int(os.getenv("DIAGRAM_CANONICAL_REFINE_BUDGET", "500000"))
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._stats = {"requests": 0, "hits": 0, "structural": 0, "text": 0}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, code: str, engine: str) -> str:
+        """코드의 canonical_hash"""
+        key = hashlib.sha256(f"{engine}\n{code}".encode("utf-8")).hexdigest()
+        with self._lock:
+            self._stats["requests"] += 1
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return cached
+
+        _, digest, structural = canonicalize(code, engine, self.refine_budget)
+        with self._lock:
+            self._stats["structural" if structural else "text"] += 1
+            self._cache[key] = digest
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return digest
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self._stats["requests"]
+        return {
+            "size": len(self._cache),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self._stats["hits"] / requests, 4) if requests else 0.0,
+            **self._stats,
+        }
+
+
+# 전역 다이어그램 정규화기
+diagram_canonicalizer = DiagramCanonicalizer()
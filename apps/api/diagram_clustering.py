@@ -0,0 +1,288 @@
+# apps/api/diagram_clustering.py
+import heapq
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from diagram_converter import to_visjs
+from diagram_parser import DiagramGraph, DiagramParseError
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 개요/확장 vis.js 에서 클러스터 노드 ID 접두사 (원래 노드 ID 와 겹치지 않도록 문자열)
+CLUSTER_PREFIX = "cluster:"
+
+
+def label_propagation(n: int, src: np.ndarray, dst: np.ndarray, weights: Optional[np.ndarray] = None,
+                      self_weights: Optional[np.ndarray] = None, max_iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """가중 레이블 전파 커뮤니티 탐지 → 0 부터 매긴 노드별 커뮤니티 번호
+
+    매 반복마다 (노드, 이웃 레이블) 쌍의 가중치 합을 한 번에 집계해 가장 무거운 레이블을 고른다.
+    self_weights 는 노드가 자기 현재 레이블에 주는 가중치 (축약 그래프에서 커뮤니티 내부 엣지 수).
+    동기 갱신은 이분 구조에서 진동하므로 무작위 절반만 갱신한다(반동기).
+    """
+    labels = np.arange(n)
+    if n == 0 or len(src) == 0:
+        return labels
+    nodes = np.arange(n)
+    w = np.ones(len(src)) if weights is None else weights.astype(np.float64)
+    s = np.concatenate([src, dst])
+    t = np.concatenate([dst, src])
+    w = np.concatenate([w, w])
+    if self_weights is not None:
+        s, t, w = np.concatenate([s, nodes]), np.concatenate([t, nodes]), np.concatenate([w, self_weights])
+    rng = np.random.default_rng(seed)
+
+    for _ in range(max_iterations):
+        keys, inverse = np.unique(t * n + labels[s], return_inverse=True)
+        # 동점은 작은 난수로 깨뜨린다 (항상 작은 레이블로 쏠리지 않도록)
+        score = np.bincount(inverse, weights=w) + rng.random(len(keys)) * 1e-6
+        node, label = keys // n, keys % n
+        order = np.lexsort((-score, node))
+        first = order[np.r_[True, node[order][1:] != node[order][:-1]]]
+        best = labels.copy()
+        best[node[first]] = label[first]
+        changed = best != labels
+        if not changed.any():
+            break
+        update = changed & (rng.random(n) < 0.5)
+        labels[update] = best[update]
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def _contract(labels: np.ndarray, src: np.ndarray, dst: np.ndarray, weights: np.ndarray,
+              self_weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """커뮤니티 그래프 (무방향, 같은 쌍의 엣지 가중치 합) + 커뮤니티 내부 가중치"""
+    k = int(labels.max()) + 1 if len(labels) else 0
+    a, b = labels[src], labels[dst]
+    keep = a != b
+    internal = np.bincount(labels, weights=self_weights, minlength=k) + np.bincount(a[~keep], weights=weights[~keep], minlength=k)
+    lo, hi = np.minimum(a[keep], b[keep]), np.maximum(a[keep], b[keep])
+    keys, inverse = np.unique(lo * k + hi, return_inverse=True)
+    return keys // max(k, 1), keys % max(k, 1), np.bincount(inverse, weights=weights[keep]), internal
+
+
+def _merge_to_limit(sizes: np.ndarray, src: np.ndarray, dst: np.ndarray, weights: np.ndarray, limit: int) -> np.ndarray:
+    """가장 작은 커뮤니티를 가장 강하게 연결된 이웃에 합치기를 limit 개가 될 때까지 반복 → 커뮤니티별 새 번호
+
+    이웃이 없는 커뮤니티(떨어진 컴포넌트)는 다음으로 작은 커뮤니티와 합친다.
+    레이블 전파 후의 축약 그래프에서만 돌기 때문에 작은 그래프 위의 순차 처리로 충분하다.
+    """
+    count = len(sizes)
+    size = sizes.astype(np.int64).tolist()
+    adj: List[Dict[int, float]] = [{} for _ in range(count)]
+    for a, b, w in zip(src.tolist(), dst.tolist(), weights.tolist()):
+        adj[a][b] = adj[a].get(b, 0.0) + w
+        adj[b][a] = adj[b].get(a, 0.0) + w
+    parent = list(range(count))
+    heap = [(size[c], c) for c in range(count)]
+    heapq.heapify(heap)
+    alive = count
+
+    while alive > limit and heap:
+        s_c, c = heapq.heappop(heap)
+        if parent[c] != c or s_c != size[c]:
+            continue
+        if adj[c]:
+            target = max(adj[c].items(), key=lambda item: (item[1], -size[item[0]]))[0]
+        else:
+            while heap and (parent[heap[0][1]] != heap[0][1] or heap[0][0] != size[heap[0][1]]):
+                heapq.heappop(heap)
+            if not heap:
+                break
+            target = heap[0][1]
+        parent[c] = target
+        size[target] += size[c]
+        for nb, w in adj[c].items():
+            del adj[nb][c]
+            if nb != target:
+                adj[target][nb] = adj[target].get(nb, 0.0) + w
+                adj[nb][target] = adj[nb].get(target, 0.0) + w
+        adj[c] = {}
+        heapq.heappush(heap, (size[target], target))
+        alive -= 1
+
+    def root(c: int) -> int:
+        while parent[c] != c:
+            parent[c] = parent[parent[c]]
+            c = parent[c]
+        return c
+
+    roots = np.array([root(c) for c in range(count)], dtype=np.int64)
+    return np.unique(roots, return_inverse=True)[1]
+
+
+class DiagramClusterer:
+    """대형 다이어그램 요약 (클러스터 개요 + 클러스터별 확장)
+
+    레이블 전파로 커뮤니티를 찾고, 커뮤니티 수가 개요 한도를 넘으면 커뮤니티 그래프를 만들어
+    (내부 엣지 수를 자기 가중치로 두고) 다시 전파하는 과정을 반복한다. 그래도 넘으면
+    가장 작은 커뮤니티부터 가장 강하게 연결된 이웃에 합쳐 개요 크기가 다이어그램 크기와
+    무관하게 max_overview 이하로 유지된다.
+    요약(노드→클러스터 배정)은 Diagram.meta["clusters"] 에 구조 해시와 함께 저장해 재사용한다.
+    """
+
+    def __init__(self):
+        self.max_overview = int(os.getenv("CLUSTER_MAX_OVERVIEW", "50"))
+        # 이 노드 수 이하 다이어그램은 개요 대신 전체를 그대로 보낸다
+        self.min_nodes = int(os.getenv("CLUSTER_MIN_NODES", "200"))
+        self.iterations = int(os.getenv("CLUSTER_LPA_ITERATIONS", "20"))
+        self.max_levels = int(os.getenv("CLUSTER_MAX_LEVELS", "6"))
+        self._stats = {"summaries": 0, "overviews": 0, "expansions": 0}
+
+    def summarize(self, graph: DiagramGraph) -> Dict[str, Any]:
+        """그래프 요약 → Diagram.meta["clusters"] 에 저장할 dict"""
+        self._stats["summaries"] += 1
+        ids = list(graph.nodes)
+        index = {node_id: i for i, node_id in enumerate(ids)}
+        pairs = [(index[e.source], index[e.target]) for e in graph.edges
+                 if e.source != e.target and e.source in index and e.target in index]
+        src = np.array([p[0] for p in pairs], dtype=np.int64)
+        dst = np.array([p[1] for p in pairs], dtype=np.int64)
+        n = len(ids)
+
+        assignment = np.arange(n)
+        level_src, level_dst, level_w, level_self = src, dst, np.ones(len(src)), np.zeros(n)
+        count = n
+        for level in range(self.max_levels):
+            if count <= self.max_overview:
+                break
+            labels = label_propagation(count, level_src, level_dst, level_w,
+                                       level_self if level else None, self.iterations)
+            assignment = labels[assignment]
+            merged = int(labels.max()) + 1 if count else 0
+            level_src, level_dst, level_w, level_self = _contract(labels, level_src, level_dst, level_w, level_self)
+            if merged == count:
+                break
+            count = merged
+
+        if count > self.max_overview:
+            labels = _merge_to_limit(np.bincount(assignment, minlength=count), level_src, level_dst, level_w, self.max_overview)
+            assignment = labels[assignment]
+            count = int(labels.max()) + 1
+
+        # 큰 클러스터부터 번호 매기기
+        sizes = np.bincount(assignment, minlength=count)
+        rank = np.empty(count, dtype=np.int64)
+        rank[np.argsort(-sizes, kind="stable")] = np.arange(count)
+        assignment = rank[assignment]
+        cluster_count = int(assignment.max()) + 1 if n else 0
+
+        degree = np.bincount(np.concatenate([src, dst]), minlength=n)
+        clusters = []
+        for c in range(cluster_count):
+            members = np.flatnonzero(assignment == c)
+            hub = ids[members[np.argmax(degree[members])]]
+            hub_label = graph.nodes[hub].label if graph.nodes[hub].label is not None else hub
+            clusters.append({
+                "id": f"{CLUSTER_PREFIX}{c}",
+                "size": int(len(members)),
+                "hub": hub,
+                "label": str(hub_label),
+            })
+
+        a, b = assignment[src], assignment[dst]
+        keep = a != b
+        keys, weights = np.unique(np.minimum(a[keep], b[keep]) * max(cluster_count, 1) + np.maximum(a[keep], b[keep]),
+                                  return_counts=True)
+        edges = [[int(key // cluster_count), int(key % cluster_count), int(w)] for key, w in zip(keys, weights)]
+
+        return {
+            "structure_hash": graph.structure_hash("clusters"),
+            "node_count": n,
+            "clusters": clusters,
+            "edges": edges,
+            "assignment": {node_id: int(c) for node_id, c in zip(ids, assignment.tolist())},
+        }
+
+    @staticmethod
+    def _vis_data(code: str, engine: str, graph: DiagramGraph) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """vis.js 데이터와 {vis 노드 ID 문자열: 그래프 노드 ID}"""
+        if engine == "visjs":
+            data = json.loads(code)
+            keys = {str(node_id): str(node_id) for node_id in graph.nodes}
+        else:
+            data = json.loads(to_visjs(graph))
+            keys = {str(i): node_id for i, node_id in enumerate(graph.nodes, 1)}
+        return data, keys
+
+    def overview(self, code: str, engine: str, graph: DiagramGraph, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """클러스터당 노드 하나인 개요 vis.js 데이터 (좌표가 있으면 구성원 평균 위치)"""
+        self._stats["overviews"] += 1
+        data, keys = self._vis_data(code, engine, graph)
+        assignment = summary["assignment"]
+        sums: Dict[int, List[float]] = {}
+        for node in data.get("nodes") or []:
+            if not isinstance(node, dict) or str(node.get("id")) not in keys:
+                continue
+            if isinstance(node.get("x"), (int, float)) and isinstance(node.get("y"), (int, float)):
+                acc = sums.setdefault(assignment[keys[str(node["id"])]], [0.0, 0.0, 0])
+                acc[0] += node["x"]
+                acc[1] += node["y"]
+                acc[2] += 1
+
+        nodes = []
+        for c, cluster in enumerate(summary["clusters"]):
+            item: Dict[str, Any] = {
+                "id": cluster["id"],
+                "label": f"{cluster['label']} (+{cluster['size'] - 1})" if cluster["size"] > 1 else cluster["label"],
+                "value": cluster["size"],
+                "shape": "dot",
+            }
+            if c in sums:
+                x, y, count = sums[c]
+                item["x"], item["y"] = round(x / count, 1), round(y / count, 1)
+            nodes.append(item)
+        edges = [
+            {"from": f"{CLUSTER_PREFIX}{a}", "to": f"{CLUSTER_PREFIX}{b}", "value": w, "title": f"{w} edges"}
+            for a, b, w in summary["edges"]
+        ]
+        return {"nodes": nodes, "edges": edges}
+
+    def expand(self, code: str, engine: str, graph: DiagramGraph, summary: Dict[str, Any], cluster_id: str) -> Dict[str, Any]:
+        """한 클러스터의 원래 노드/내부 엣지와, 다른 클러스터로 나가는 엣지(클러스터 노드로 연결)"""
+        self._stats["expansions"] += 1
+        target = next((c for c, cluster in enumerate(summary["clusters"]) if cluster["id"] == cluster_id), None)
+        if target is None:
+            raise DiagramParseError(f"Unknown cluster: {cluster_id}")
+        data, keys = self._vis_data(code, engine, graph)
+        assignment = summary["assignment"]
+
+        def cluster_of(vis_id: Any) -> Optional[int]:
+            node_id = keys.get(str(vis_id))
+            return assignment.get(node_id) if node_id is not None else None
+
+        nodes = [node for node in data.get("nodes") or [] if isinstance(node, dict) and cluster_of(node.get("id")) == target]
+        edges = []
+        boundary: Dict[Tuple[Any, int, bool], int] = {}
+        for edge in data.get("edges") or []:
+            if not isinstance(edge, dict):
+                continue
+            a, b = cluster_of(edge.get("from")), cluster_of(edge.get("to"))
+            if a == target and b == target:
+                edges.append(edge)
+            elif a == target and b is not None:
+                boundary[(edge["from"], b, True)] = boundary.get((edge["from"], b, True), 0) + 1
+            elif b == target and a is not None:
+                boundary[(edge["to"], a, False)] = boundary.get((edge["to"], a, False), 0) + 1
+        # 클러스터 밖으로 나가는 엣지는 (노드, 상대 클러스터) 별로 하나로 합침
+        for (node_id, other, outgoing), count in boundary.items():
+            cluster_node = f"{CLUSTER_PREFIX}{other}"
+            edges.append({
+                "from": node_id if outgoing else cluster_node,
+                "to": cluster_node if outgoing else node_id,
+                "value": count,
+                "dashes": True,
+            })
+        return {"nodes": nodes, "edges": edges}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"max_overview": self.max_overview, "min_nodes": self.min_nodes, **self._stats}
+
+
+# 전역 다이어그램 클러스터러
+diagram_clusterer = DiagramClusterer()
@@ -0,0 +1,251 @@
+# apps/api/diagram_converter.py
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from diagram_parser import DiagramGraph, DiagramParseError, parse_diagram
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+ENGINES = ("mermaid", "visjs", "dot")
+
+# 엔진별 노드 모양 ↔ 공통 모양 이름 (공통 이름은 Mermaid 파서의 모양 이름)
+_SHAPE_ALIASES = {
+    "dot": {
+        "box": "rect", "rect": "rect", "rectangle": "rect", "square": "rect", "record": "rect", "mrecord": "round",
+        "ellipse": "round", "oval": "round", "circle": "circle", "doublecircle": "double_circle",
+        "cylinder": "cylinder", "hexagon": "hexagon", "diamond": "rhombus", "parallelogram": "parallelogram",
+        "cds": "asymmetric", "rarrow": "asymmetric", "component": "subroutine",
+    },
+    "visjs": {
+        "box": "rect", "ellipse": "round", "circle": "circle", "database": "cylinder",
+        "hexagon": "hexagon", "diamond": "rhombus", "square": "rect",
+    },
+}
+_MERMAID_SHAPE_SYNTAX = {
+    "rect": ("[", "]"), "round": ("(", ")"), "stadium": ("([", "])"), "subroutine": ("[[", "]]"),
+    "cylinder": ("[(", ")]"), "circle": ("((", "))"), "double_circle": ("(((", ")))"),
+    "hexagon": ("{{", "}}"), "rhombus": ("{", "}"), "parallelogram": ("[/", "/]"),
+    "parallelogram_alt": ("[\\", "\\]"), "asymmetric": (">", "]"),
+}
+_DOT_SHAPES = {
+    "rect": "box", "round": "ellipse", "stadium": "box", "subroutine": "component", "cylinder": "cylinder",
+    "circle": "circle", "double_circle": "doublecircle", "hexagon": "hexagon", "rhombus": "diamond",
+    "parallelogram": "parallelogram", "parallelogram_alt": "parallelogram", "asymmetric": "cds",
+}
+_VISJS_SHAPES = {
+    "rect": "box", "round": "ellipse", "stadium": "box", "subroutine": "box", "cylinder": "database",
+    "circle": "circle", "double_circle": "circle", "hexagon": "hexagon", "rhombus": "diamond",
+}
+_DIRECTIONS = {"TD": "TB", "TB": "TB", "BT": "BT", "LR": "LR", "RL": "RL"}
+
+_MERMAID_ID_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_MERMAID_RESERVED = {"end", "graph", "flowchart", "subgraph", "class", "classDef", "style", "click", "linkStyle", "direction"}
+
+
+def canonical_shape(engine: str, shape: Optional[str]) -> Optional[str]:
+    if shape is None:
+        return None
+    if engine == "mermaid":
+        return shape
+    return _SHAPE_ALIASES.get(engine, {}).get(shape.lower())
+
+
+# ----------------------------------------------------------------------
+# emitters
+# ----------------------------------------------------------------------
+def to_mermaid(graph: DiagramGraph) -> str:
+    # Mermaid 에서 쓸 수 없는 ID(공백, 예약어 등)는 n<순번> 으로 바꾼다
+    ids: Dict[str, str] = {}
+    used = set()
+    for i, node_id in enumerate(graph.nodes, 1):
+        safe = node_id if _MERMAID_ID_RE.fullmatch(node_id) and node_id not in _MERMAID_RESERVED else f"n{i}"
+        while safe in used:
+            safe = f"{safe}_{i}"
+        ids[node_id] = safe
+        used.add(safe)
+
+    def node_line(node_id: str) -> str:
+        node = graph.nodes[node_id]
+        label = (node.label if node.label is not None else node_id).replace('"', "#quot;")
+        opener, closer = _MERMAID_SHAPE_SYNTAX.get(canonical_shape(graph.engine, node.shape) or "rect")
+        return f'{ids[node_id]}{opener}"{label}"{closer}'
+
+    direction = graph.direction if graph.direction in _DIRECTIONS else "TD"
+    lines = [f"graph {direction}"]
+
+    children: Dict[Optional[str], List[str]] = {}
+    sub_ids: Dict[str, str] = {}
+    for i, sub in enumerate(graph.subgraphs.values(), 1):
+        children.setdefault(sub.parent, []).append(sub.id)
+        safe = sub.id if _MERMAID_ID_RE.fullmatch(sub.id) and sub.id not in _MERMAID_RESERVED else f"sg{i}"
+        sub_ids[sub.id] = safe if safe not in used else f"sg{i}"
+
+    def emit_subgraph(sub_id: str, indent: str):
+        sub = graph.subgraphs[sub_id]
+        safe = sub_ids[sub_id]
+        label = (sub.label or sub_id).replace('"', "#quot;")
+        lines.append(f'{indent}subgraph {safe}["{label}"]')
+        for child in children.get(sub_id, []):
+            emit_subgraph(child, indent + "    ")
+        for node_id in sub.nodes:
+            lines.append(f"{indent}    {node_line(node_id)}")
+        lines.append(f"{indent}end")
+
+    for node_id, node in graph.nodes.items():
+        if node.subgraph is None:
+            lines.append(f"    {node_line(node_id)}")
+    for sub_id in children.get(None, []):
+        emit_subgraph(sub_id, "    ")
+    for edge in graph.edges:
+        arrow = "-->" if edge.directed else "---"
+        label = f'|"{edge.label.replace(chr(34), "#quot;")}"|' if edge.label else ""
+        lines.append(f"    {ids[edge.source]} {arrow}{label} {ids[edge.target]}")
+    return "\n".join(lines)
+
+
+def to_visjs(graph: DiagramGraph) -> str:
+    # 프론트엔드 vis.js 렌더러는 숫자 ID 를 기대한다
+    ids = {node_id: i for i, node_id in enumerate(graph.nodes, 1)}
+    nodes = []
+    for node_id, node in graph.nodes.items():
+        item: Dict[str, Any] = {"id": ids[node_id], "label": node.label if node.label is not None else node_id}
+        shape = _VISJS_SHAPES.get(canonical_shape(graph.engine, node.shape) or "")
+        if shape:
+            item["shape"] = shape
+        if node.subgraph is not None:
+            item["group"] = graph.subgraphs[node.subgraph].label or node.subgraph
+        nodes.append(item)
+    edges = []
+    for edge in graph.edges:
+        item = {"from": ids[edge.source], "to": ids[edge.target]}
+        if edge.directed:
+            item["arrows"] = "to"
+        if edge.label:
+            item["label"] = edge.label
+        edges.append(item)
+    return json.dumps({"nodes": nodes, "edges": edges}, ensure_ascii=False, indent=2)
+
+
+def _dot_quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def to_dot(graph: DiagramGraph) -> str:
+    directed = any(edge.directed for edge in graph.edges) or graph.kind in ("digraph", "flowchart")
+    lines = ["digraph G {" if directed else "graph G {"]
+    direction = _DIRECTIONS.get(graph.direction or "")
+    if direction and direction != "TB":
+        lines.append(f"    rankdir={direction};")
+
+    def node_line(node_id: str) -> str:
+        node = graph.nodes[node_id]
+        attrs = []
+        if node.label is not None and node.label != node_id:
+            attrs.append(f"label={_dot_quote(node.label)}")
+        shape = _DOT_SHAPES.get(canonical_shape(graph.engine, node.shape) or "")
+        if shape:
+            attrs.append(f"shape={shape}")
+        return f"{_dot_quote(node_id)}{' [' + ', '.join(attrs) + ']' if attrs else ''};"
+
+    children: Dict[Optional[str], List[str]] = {}
+    for sub in graph.subgraphs.values():
+        children.setdefault(sub.parent, []).append(sub.id)
+
+    def emit_subgraph(sub_id: str, indent: str):
+        sub = graph.subgraphs[sub_id]
+        # cluster_ 접두사가 있어야 Graphviz 가 묶음 상자로 그린다
+        name = sub_id if sub_id.startswith("cluster") else f"cluster_{sub_id}"
+        lines.append(f"{indent}subgraph {_dot_quote(name)} {{")
+        if sub.label:
+            lines.append(f"{indent}    label={_dot_quote(sub.label)};")
+        for child in children.get(sub_id, []):
+            emit_subgraph(child, indent + "    ")
+        for node_id in sub.nodes:
+            lines.append(f"{indent}    {node_line(node_id)}")
+        lines.append(f"{indent}}}")
+
+    for node_id, node in graph.nodes.items():
+        if node.subgraph is None:
+            lines.append(f"    {node_line(node_id)}")
+    for sub_id in children.get(None, []):
+        emit_subgraph(sub_id, "    ")
+
+    op = "->" if directed else "--"
+    for edge in graph.edges:
+        attrs = []
+        if edge.label:
+            attrs.append(f"label={_dot_quote(edge.label)}")
+        if directed and not edge.directed:
+            attrs.append("dir=none")
+        lines.append(
+            f"    {_dot_quote(edge.source)} {op} {_dot_quote(edge.target)}"
+            f"{' [' + ', '.join(attrs) + ']' if attrs else ''};"
+        )
+    lines.append("}")
+    return "\n".join(lines)
+
+
+_EMITTERS = {"mermaid": to_mermaid, "visjs": to_visjs, "dot": to_dot}
+
+
+class DiagramConverter:
+    """그래프 AST 를 거친 엔진 간 변환 (Mermaid 플로우차트 / vis.js JSON / DOT)
+
+    엔진을 바꿀 때 LLM 재생성 대신 밀리초 단위로 변환한다.
+    결과는 (원본 엔진+코드 해시, 대상 엔진) 키로 메모리 LRU 에 캐시한다.
+    """
+
+    def __init__(self):
+        self.max_entries = int(os.getenv("DIAGRAM_CONVERT_CACHE_SIZE", "512"))
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._stats = {"conversions": 0, "hits": 0, "misses": 0, "failures": 0}
+
+    @staticmethod
+    def code_hash(engine: str, code: str) -> str:
+        return hashlib.sha256(f"{engine}\n{code}".encode("utf-8")).hexdigest()
+
+    def convert(self, code: str, source: str, target: str) -> Tuple[str, bool]:
+        """(변환된 코드, 캐시 적중 여부). 해석할 수 없는 코드/엔진은 DiagramParseError"""
+        if target not in _EMITTERS:
+            raise DiagramParseError(f"Unsupported target engine: {target}")
+        self._stats["conversions"] += 1
+        if source == target:
+            return code, False
+
+        key = (self.code_hash(source, code), target)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self._stats["hits"] += 1
+            return cached, True
+
+        self._stats["misses"] += 1
+        try:
+            converted = _EMITTERS[target](parse_diagram(code, source))
+        except DiagramParseError:
+            self._stats["failures"] += 1
+            raise
+        self._cache[key] = converted
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return converted, False
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "size": len(self._cache),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            **self._stats,
+        }
+
+
+# 전역 다이어그램 변환기
+diagram_converter = DiagramConverter()
@@ -0,0 +1,183 @@
+# apps/api/diagram_diff.py
+import difflib
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from diagram_parser import DiagramGraph, DiagramParseError, GraphEdge, GraphNode, parse_diagram
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+GRAPH = "graph"
+TEXT = "text"
+
+_NODE_FIELDS = ("label", "shape", "subgraph")
+
+
+def _node_signature(node: GraphNode) -> str:
+    """ID 를 뺀 노드 내용 해시 (ID 만 바뀐 노드를 이름 변경으로 짝짓는 데 사용)
+
+    라벨이 없는 노드는 ID 가 그대로 표시되므로 ID 를 라벨로 본다 (A-->B → A-->C 는 B 삭제 + C 추가).
+    """
+    values = {f: getattr(node, f) for f in _NODE_FIELDS}
+    if values["label"] is None:
+        values["label"] = node.id
+    material = "\x1f".join("" if value is None else str(value) for value in values.values())
+    return hashlib.blake2b(material.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _edge_keys(edges: List[GraphEdge], rename: Optional[Dict[str, str]] = None) -> Dict[Tuple[str, str, int], GraphEdge]:
+    """(source, target, 같은 쌍의 n 번째) → 엣지 (다중 엣지도 순서대로 짝지음)"""
+    keyed: Dict[Tuple[str, str, int], GraphEdge] = {}
+    seen: Dict[Tuple[str, str], int] = {}
+    for edge in edges:
+        source, target = edge.source, edge.target
+        if rename:
+            source, target = rename.get(source, source), rename.get(target, target)
+        index = seen.get((source, target), 0)
+        seen[(source, target)] = index + 1
+        keyed[(source, target, index)] = edge
+    return keyed
+
+
+def diff_graphs(old: DiagramGraph, new: DiagramGraph) -> Dict[str, Any]:
+    """노드/엣지/라벨 단위 구조 비교 (해시 맵 조회만 쓰므로 O(노드 + 엣지))"""
+    old_ids, new_ids = old.nodes.keys(), new.nodes.keys()
+    removed = [node_id for node_id in old.nodes if node_id not in new_ids]
+    added = [node_id for node_id in new.nodes if node_id not in old_ids]
+
+    # 내용이 같고 ID 만 바뀐 노드: 시그니처가 양쪽에서 하나씩만 있을 때 이름 변경으로 본다
+    by_signature_old: Dict[str, List[str]] = {}
+    for node_id in removed:
+        by_signature_old.setdefault(_node_signature(old.nodes[node_id]), []).append(node_id)
+    by_signature_new: Dict[str, List[str]] = {}
+    for node_id in added:
+        by_signature_new.setdefault(_node_signature(new.nodes[node_id]), []).append(node_id)
+    rename: Dict[str, str] = {}
+    for signature, old_group in by_signature_old.items():
+        new_group = by_signature_new.get(signature)
+        if len(old_group) == 1 and new_group and len(new_group) == 1:
+            rename[old_group[0]] = new_group[0]
+    renamed_new = set(rename.values())
+
+    changed = []
+    for node_id, node in new.nodes.items():
+        before = old.nodes.get(node_id)
+        if before is None or before == node:
+            continue
+        fields = {f: [getattr(before, f), getattr(node, f)] for f in _NODE_FIELDS if getattr(before, f) != getattr(node, f)}
+        if fields:
+            changed.append({"id": node_id, **fields})
+
+    old_edges = _edge_keys(old.edges, rename)
+    new_edges = _edge_keys(new.edges)
+    edges_added = [
+        {"source": e.source, "target": e.target, "label": e.label, "directed": e.directed}
+        for key, e in new_edges.items() if key not in old_edges
+    ]
+    edges_removed = [
+        {"source": e.source, "target": e.target} for key, e in old_edges.items() if key not in new_edges
+    ]
+    edges_changed = []
+    for key, edge in new_edges.items():
+        before = old_edges.get(key)
+        if before is None or (before.label == edge.label and before.directed == edge.directed):
+            continue
+        fields = {f: [getattr(before, f), getattr(edge, f)] for f in ("label", "directed") if getattr(before, f) != getattr(edge, f)}
+        if fields:
+            edges_changed.append({"source": edge.source, "target": edge.target, **fields})
+
+    nodes_delta = {
+        "added": [
+            {"id": node_id, "label": new.nodes[node_id].label, "shape": new.nodes[node_id].shape,
+             "subgraph": new.nodes[node_id].subgraph}
+            for node_id in added if node_id not in renamed_new
+        ],
+        "removed": [node_id for node_id in removed if node_id not in rename],
+        "renamed": [[old_id, new_id] for old_id, new_id in rename.items()],
+        "changed": changed,
+    }
+    edges_delta = {"added": edges_added, "removed": edges_removed, "changed": edges_changed}
+    summary = {
+        f"{kind}_{action}": len(items)
+        for kind, delta in (("nodes", nodes_delta), ("edges", edges_delta))
+        for action, items in delta.items()
+    }
+    result: Dict[str, Any] = {
+        "mode": GRAPH,
+        "nodes": nodes_delta,
+        "edges": edges_delta,
+        "summary": summary,
+        "unchanged": not any(summary.values()) and old.direction == new.direction,
+    }
+    if old.direction != new.direction:
+        result["direction"] = [old.direction, new.direction]
+    return result
+
+
+def diff_text(old_code: str, new_code: str, context: int = 1) -> Dict[str, Any]:
+    """그래프로 해석할 수 없는 코드(시퀀스 다이어그램 등)는 줄 단위 unified diff"""
+    lines = list(difflib.unified_diff(old_code.splitlines(), new_code.splitlines(), lineterm="", n=context))[2:]
+    added = sum(1 for line in lines if line.startswith("+"))
+    removed = sum(1 for line in lines if line.startswith("-"))
+    return {
+        "mode": TEXT,
+        "hunks": lines,
+        "summary": {"lines_added": added, "lines_removed": removed},
+        "unchanged": not lines,
+    }
+
+
+class DiagramDiffer:
+    """TaskVersion 쌍의 구조 비교 + (버전 A, 버전 B) 키 LRU 캐시
+
+    버전은 만든 뒤 바뀌지 않으므로 같은 쌍의 결과는 영구히 유효하다.
+    """
+
+    def __init__(self):
+        self.max_entries = int(os.getenv("DIAGRAM_DIFF_CACHE_SIZE", "256"))
+        self._cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._stats = {"diffs": 0, "hits": 0, "misses": 0, "text_fallbacks": 0}
+
+    def diff(self, old_code: str, old_engine: str, new_code: str, new_engine: str) -> Dict[str, Any]:
+        """두 코드의 구조 비교 (둘 다 그래프로 해석되면 graph, 아니면 text)"""
+        self._stats["diffs"] += 1
+        try:
+            return diff_graphs(parse_diagram(old_code, old_engine), parse_diagram(new_code, new_engine))
+        except DiagramParseError as e:
+            logger.info(f"Structural diff fell back to text: {e}")
+            self._stats["text_fallbacks"] += 1
+            return diff_text(old_code, new_code)
+
+    def diff_versions(self, old_version, new_version) -> Tuple[Dict[str, Any], bool]:
+        """(비교 결과, 캐시 적중 여부)"""
+        key = (str(old_version.id), str(new_version.id))
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self._stats["hits"] += 1
+            return cached, True
+
+        self._stats["misses"] += 1
+        result = self.diff(old_version.code, old_version.engine, new_version.code, new_version.engine)
+        self._cache[key] = result
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return result, False
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "size": len(self._cache),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            **self._stats,
+        }
+
+
+# 전역 다이어그램 비교기
+diagram_differ = DiagramDiffer()
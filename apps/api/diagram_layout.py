@@ -0,0 +1,613 @@
+# apps/api/diagram_layout.py
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from diagram_parser import DiagramGraph, DiagramParseError, parse_diagram
+from diagram_converter import to_visjs
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+LAYERED = "layered"
+FORCE = "force"
+ALGORITHMS = (LAYERED, FORCE)
+
+
+def _graph_arrays(graph: DiagramGraph) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """노드 ID 목록과 (자기 루프/중복 제거된) 엣지 src/dst 인덱스 배열"""
+    ids = list(graph.nodes)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    for edge in graph.edges:
+        for node_id in (edge.source, edge.target):
+            if node_id not in index:
+                index[node_id] = len(ids)
+                ids.append(node_id)
+    n = len(ids)
+    src = np.fromiter((index[e.source] for e in graph.edges), dtype=np.int64, count=len(graph.edges))
+    dst = np.fromiter((index[e.target] for e in graph.edges), dtype=np.int64, count=len(graph.edges))
+    keep = src != dst
+    keys = np.unique(src[keep] * n + dst[keep])
+    return ids, keys // n, keys % n
+
+
+def _csr(src: np.ndarray, dst: np.ndarray, n: int) -> Tuple[List[int], List[int]]:
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr.tolist(), dst[order].tolist()
+
+
+def _dfs_order(n: int, indptr: List[int], targets: List[int]) -> np.ndarray:
+    """반복형 DFS 역후위 순서 (DAG 면 위상 순서, 역방향 엣지는 이 순서를 거스르는 엣지)"""
+    visited = bytearray(n)
+    post: List[int] = []
+    for root in range(n):
+        if visited[root]:
+            continue
+        visited[root] = 1
+        stack = [(root, indptr[root])]
+        while stack:
+            v, i = stack[-1]
+            end = indptr[v + 1]
+            while i < end and visited[targets[i]]:
+                i += 1
+            if i < end:
+                w = targets[i]
+                stack[-1] = (v, i + 1)
+                visited[w] = 1
+                stack.append((w, indptr[w]))
+            else:
+                stack.pop()
+                post.append(v)
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.array(post[::-1], dtype=np.int64)] = np.arange(n)
+    return rank
+
+
+def _longest_path_layers(n: int, topo_rank: np.ndarray, indptr: List[int], targets: List[int]) -> np.ndarray:
+    """위상 순서대로 최장 경로 계층 배정 (소스 노드가 0 계층)"""
+    layer = [0] * n
+    for v in np.argsort(topo_rank).tolist():
+        next_layer = layer[v] + 1
+        for i in range(indptr[v], indptr[v + 1]):
+            w = targets[i]
+            if layer[w] < next_layer:
+                layer[w] = next_layer
+    return np.array(layer, dtype=np.int64)
+
+
+def _insert_dummies(src: np.ndarray, dst: np.ndarray, layer: np.ndarray,
+                    max_dummies: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """두 계층 이상 건너뛰는 엣지를 더미 노드 사슬로 분할 → (src, dst, 더미 포함 layer, 넣지 못한 더미 수)
+
+    필요한 더미가 max_dummies 를 넘으면 짧은 엣지부터 예산 안에서만 분할하고 나머지는 긴 엣지로 둔다.
+    """
+    n = len(layer)
+    span = layer[dst] - layer[src]
+    long = span > 1
+    required = int((span[long] - 1).sum())
+    if required > max_dummies:
+        long_edges = np.flatnonzero(long)
+        by_span = long_edges[np.argsort(span[long_edges], kind="stable")]
+        fits = np.cumsum(span[by_span] - 1) <= max_dummies
+        long = np.zeros(len(span), dtype=bool)
+        long[by_span[fits]] = True
+    counts = span[long] - 1
+    total = int(counts.sum())
+    skipped = required - total
+    if total == 0:
+        return src, dst, layer, skipped
+
+    long_src, long_dst = src[long], dst[long]
+    edge_of = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts
+    offset = np.arange(total) - first[edge_of]
+    dummy_ids = n + np.arange(total)
+    dummy_layer = layer[long_src][edge_of] + 1 + offset
+    # 더미 다음 노드: 사슬의 마지막 더미면 원래 도착 노드
+    dummy_next = np.where(offset == counts[edge_of] - 1, long_dst[edge_of], dummy_ids + 1)
+
+    new_src = np.concatenate([src[~long], long_src, dummy_ids])
+    new_dst = np.concatenate([dst[~long], n + first, dummy_next])
+    return new_src, new_dst, np.concatenate([layer, dummy_layer]), skipped
+
+
+def _rank_within_layers(order: np.ndarray, layer: np.ndarray, layer_start: np.ndarray) -> np.ndarray:
+    pos = np.empty(len(order), dtype=np.float64)
+    pos[order] = np.arange(len(order)) - layer_start[layer[order]]
+    return pos
+
+
+def _minimize_crossings(src: np.ndarray, dst: np.ndarray, layer: np.ndarray,
+                        initial: np.ndarray, iterations: int) -> np.ndarray:
+    """무게중심(barycenter) 정렬을 아래/위 방향으로 번갈아 반복해 계층 내 순서 결정 → 계층 내 순위"""
+    total = len(layer)
+    layer_start = np.zeros(int(layer.max()) + 2, dtype=np.int64)
+    np.cumsum(np.bincount(layer), out=layer_start[1:len(layer_start)])
+    pos = _rank_within_layers(np.lexsort((initial, layer)), layer, layer_start)
+
+    for it in range(iterations):
+        # 짝수 회차는 선행 노드 기준(위→아래), 홀수 회차는 후속 노드 기준(아래→위)
+        s, t = (src, dst) if it % 2 == 0 else (dst, src)
+        sums = np.bincount(t, weights=pos[s], minlength=total)
+        counts = np.bincount(t, minlength=total)
+        bary = np.where(counts > 0, sums / np.maximum(counts, 1), pos)
+        pos = _rank_within_layers(np.lexsort((pos, bary, layer)), layer, layer_start)
+    return pos
+
+
+def _assign_coordinates(src: np.ndarray, dst: np.ndarray, layer: np.ndarray, pos: np.ndarray,
+                        spacing: float, iterations: int) -> np.ndarray:
+    """계층 내 순서를 지키며 이웃 평균 위치로 당기는 x 좌표 배정 (최소 간격 spacing)"""
+    total = len(layer)
+    sizes = np.bincount(layer)
+    x = (pos - (sizes[layer] - 1) / 2.0) * spacing
+    order = np.lexsort((pos, layer))
+    sorted_layer = layer[order]
+    shift = spacing * pos[order]
+    both_s = np.concatenate([src, dst])
+    both_t = np.concatenate([dst, src])
+    degree = np.bincount(both_t, minlength=total)
+
+    for _ in range(iterations):
+        sums = np.bincount(both_t, weights=x[both_s], minlength=total)
+        desired = np.where(degree > 0, sums / np.maximum(degree, 1), x)
+        # u = x - spacing*rank 가 계층 안에서 단조 증가하면 최소 간격이 보장된다.
+        # 계층마다 큰 오프셋을 더해 한 번의 누적 max/min 으로 계층별(segmented) 계산
+        u = desired[order] - shift
+        big = 2.0 * (np.abs(u).max() + 1.0)
+        offset = sorted_layer * big
+        left = np.maximum.accumulate(u + offset) - offset
+        right = np.minimum.accumulate((u + offset)[::-1])[::-1] - offset
+        x[order] = (left + right) / 2.0 + shift
+    return x
+
+
+# 부모 셀 주변 3x3 셀의 자식 6x6 블록이 Barnes–Hut 상호작용 후보.
+# 그중 노드 셀의 인접 3x3 은 더 깊은 레벨에서 계산하므로 제외 (노드 셀의 짝/홀 위치별 마스크)
+_CHILD_SPAN = np.arange(6, dtype=np.int64)
+_FAR_MASKS = np.array([
+    [[0.0 if abs(j - 2 - bx) <= 1 and abs(k - 2 - by) <= 1 else 1.0 for k in range(6)] for j in range(6)]
+    for bx in (0, 1) for by in (0, 1)
+], dtype=np.float32)
+_NEIGHBORS = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+
+
+def _segment_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """[start, start+count) 구간들을 이어 붙인 인덱스 배열"""
+    total = int(counts.sum())
+    first = np.cumsum(counts) - counts
+    return np.repeat(starts - first, counts) + np.arange(total)
+
+
+class _RepulsionField:
+    """소스 노드 집합의 레벨별 사분 트리 (Barnes–Hut 척력 k³/d² 조회)
+
+    FR 의 k²/d 척력은 멀리까지 닿아 큰 그래프가 부풀어 오르므로 vis.js barnesHut 처럼
+    역제곱 척력을 쓰되 거리 k 에서 FR 과 같은 크기가 되도록 k³ 을 곱한다.
+
+    레벨 l 에서 대상 셀의 인접 3x3 밖이면서 부모 셀의 인접 3x3 안에 있는 셀(최대 27개)은
+    질량과 질량 중심 하나로 근사하고, 가장 깊은 레벨의 인접 3x3 셀 노드끼리만 직접 계산한다.
+    각 레벨은 모든 대상에 대해 한 번의 NumPy 연산으로 처리되어 조회 비용은 O(대상 수 × log n) 이다.
+    트리는 소스로만 만들므로 고정 노드로 한 번 만들어 두고 움직이는 노드만 반복 조회할 수 있다.
+    """
+
+    def __init__(self, pos: np.ndarray, depth: int, lo: Optional[np.ndarray] = None, extent: Optional[float] = None):
+        self.pos = pos
+        self.depth = depth
+        self.lo = pos.min(axis=0) if lo is None else lo
+        self.extent = max(float((pos.max(axis=0) - self.lo).max()), 1e-9) if extent is None else extent
+        self.levels = []
+        for level in range(2, depth + 1):
+            size = 1 << level
+            cell = self._cells(pos, size)
+            # 양쪽에 빈 셀 2칸씩 덧대 격자 밖 후보도 질량 0 셀을 가리키게 함
+            padded = size + 4
+            flat = (cell[:, 0] + 2) * padded + cell[:, 1] + 2
+            mass = np.bincount(flat, minlength=padded * padded).astype(np.float32)
+            # 원거리 근사는 float32 로 계산 (메모리 대역폭 절반, 근사 오차보다 훨씬 작은 반올림 오차)
+            com_x = (np.bincount(flat, weights=pos[:, 0], minlength=padded * padded) / np.maximum(mass, 1)).astype(np.float32)
+            com_y = (np.bincount(flat, weights=pos[:, 1], minlength=padded * padded) / np.maximum(mass, 1)).astype(np.float32)
+            self.levels.append((size, padded, mass, com_x, com_y))
+
+        size = 1 << depth
+        flat = self._flat(self._cells(pos, size), size)
+        self.order = np.argsort(flat, kind="stable")
+        self.counts_per_cell = np.bincount(flat, minlength=size * size)
+        self.starts_per_cell = np.cumsum(self.counts_per_cell) - self.counts_per_cell
+
+    def _cells(self, pos: np.ndarray, size: int) -> np.ndarray:
+        # 트리 범위 밖 대상은 가장자리 셀로 (레벨 간 부모-자식 관계는 유지됨)
+        return np.clip(((pos - self.lo) / self.extent * size).astype(np.int64), 0, size - 1)
+
+    @staticmethod
+    def _flat(cell: np.ndarray, size: int) -> np.ndarray:
+        return cell[:, 0] * size + cell[:, 1]
+
+    def repulsion(self, targets: np.ndarray, k3: float, self_index: Optional[np.ndarray] = None) -> np.ndarray:
+        """대상 위치별 척력 합 (self_index: 대상이 소스이기도 할 때 자기 자신의 소스 인덱스)"""
+        n = len(targets)
+        t32 = targets.astype(np.float32)
+        px, py = t32[:, 0:1, None], t32[:, 1:2, None]
+        force = np.zeros_like(targets)
+
+        for size, padded, mass, com_x, com_y in self.levels:
+            cell = self._cells(targets, size)
+            base = (cell >> 1) * 2
+            cand = (base[:, 0:1, None] * padded + base[:, 1:2, None]) + (_CHILD_SPAN[:, None] * padded + _CHILD_SPAN)
+            far = _FAR_MASKS[(cell[:, 0] & 1) * 2 + (cell[:, 1] & 1)]
+
+            dx = px - com_x[cand]
+            dy = py - com_y[cand]
+            d2 = dx * dx + dy * dy + np.float32(1e-9)
+            scale = far * mass[cand] / (d2 * np.sqrt(d2))
+            force[:, 0] += k3 * np.einsum("ijk,ijk->i", scale, dx)
+            force[:, 1] += k3 * np.einsum("ijk,ijk->i", scale, dy)
+
+        # 가장 깊은 레벨: 인접 셀의 노드와 직접 상호작용
+        size = 1 << self.depth
+        cell = self._cells(targets, size)
+        targets_index = np.arange(n)
+        for offset in _NEIGHBORS:
+            nb = cell + offset
+            ok = ((nb >= 0) & (nb < size)).all(axis=1)
+            nb_flat = np.where(ok, self._flat(nb, size), 0)
+            counts = np.where(ok, self.counts_per_cell[nb_flat], 0)
+            i = np.repeat(targets_index, counts)
+            j = self.order[_segment_ranges(self.starts_per_cell[nb_flat], counts)]
+            if self_index is not None:
+                keep = self_index[i] != j
+                i, j = i[keep], j[keep]
+            delta = targets[i] - self.pos[j]
+            d2 = (delta * delta).sum(axis=1) + 1e-9
+            scale = k3 / (d2 * np.sqrt(d2))
+            force[:, 0] += np.bincount(i, weights=scale * delta[:, 0], minlength=n)
+            force[:, 1] += np.bincount(i, weights=scale * delta[:, 1], minlength=n)
+        return force
+
+
+def _tree_depth(n: int) -> int:
+    # 셀당 평균 노드가 1개 안팎이 되는 깊이
+    return int(min(10, max(2, np.ceil(np.log(max(n, 2)) / np.log(4)))))
+
+
+def _barnes_hut_repulsion(pos: np.ndarray, k3: float, depth: int) -> np.ndarray:
+    """모든 노드 사이의 척력 (매 반복 트리를 새로 만든다)"""
+    return _RepulsionField(pos, depth).repulsion(pos, k3, self_index=np.arange(len(pos)))
+
+
+class DiagramLayoutEngine:
+    """서버 측 다이어그램 레이아웃 엔진
+
+    layered: Sugiyama 계층형 레이아웃
+      1) DFS 역후위 순서를 거스르는 엣지를 뒤집어 순환 제거
+      2) 최장 경로 계층 배정과 더미 노드 삽입
+      3) 무게중심 정렬 반복으로 교차 최소화
+      4) 이웃 평균으로 당기며 최소 간격을 지키는 좌표 배정
+    교차 최소화와 좌표 배정은 NumPy 로 전체 노드를 한 번에 계산한다.
+
+    force: 네트워크형 그래프용 Fruchterman–Reingold 힘 기반 레이아웃
+      척력은 Barnes–Hut 사분 트리 근사(O(n log n)), 인력은 엣지 배열 전체를 한 번에 계산하며
+      반복 횟수와 마감 시간(deadline_ms) 중 먼저 닿는 쪽에서 멈춘다.
+      노드에 x/y 가 이미 있으면 그 위치에서 낮은 온도로 시작한다.
+
+    vis.js 노드에 고정 x/y 와 physics: false 를 붙여 브라우저 물리 시뮬레이션 없이 그리게 한다.
+    """
+
+    def __init__(self):
+        self.node_spacing = float(os.getenv("LAYOUT_NODE_SPACING", "150"))
+        self.layer_spacing = float(os.getenv("LAYOUT_LAYER_SPACING", "120"))
+        self.crossing_iterations = int(os.getenv("LAYOUT_CROSSING_ITERATIONS", "12"))
+        self.coordinate_iterations = int(os.getenv("LAYOUT_COORDINATE_ITERATIONS", "6"))
+        self.max_nodes = int(os.getenv("LAYOUT_MAX_NODES", "100000"))
+        # 긴 엣지가 많은 그래프에서 더미 노드가 폭증하지 않도록 제한 (노드 수 대비 배수)
+        self.max_dummy_factor = float(os.getenv("LAYOUT_MAX_DUMMY_FACTOR", "10"))
+        self.force_iterations = int(os.getenv("LAYOUT_FORCE_ITERATIONS", "200"))
+        self.force_deadline_ms = float(os.getenv("LAYOUT_FORCE_DEADLINE_MS", "5000"))
+        self.force_gravity = float(os.getenv("LAYOUT_FORCE_GRAVITY", "0.05"))
+        self.incremental_iterations = int(os.getenv("LAYOUT_INCREMENTAL_ITERATIONS", "40"))
+        # 새 노드 비율이 이보다 크면 증분 배치 대신 전체 레이아웃
+        self.incremental_max_fraction = float(os.getenv("LAYOUT_INCREMENTAL_MAX_FRACTION", "0.5"))
+        self._stats = {"layouts": 0, "nodes": 0, "total_ms": 0.0}
+
+    def _record(self, nodes: int, elapsed_ms: float):
+        self._stats["layouts"] += 1
+        self._stats["nodes"] += nodes
+        self._stats["total_ms"] += elapsed_ms
+
+    def layered(self, graph: DiagramGraph, direction: Optional[str] = None) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, Any]]:
+        """Sugiyama 레이아웃 → ({노드 ID: (x, y)}, 단계별 통계)"""
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        def mark(phase: str, since: float) -> float:
+            now = time.perf_counter()
+            timings[phase] = round((now - since) * 1000, 2)
+            return now
+
+        ids, src, dst = _graph_arrays(graph)
+        n = len(ids)
+        if n == 0:
+            return {}, {"nodes": 0, "layers": 0, "dummy_nodes": 0, "dummies_skipped": 0, "timings_ms": {}}
+        if n > self.max_nodes:
+            raise DiagramParseError(f"Graph too large for layout ({n} > {self.max_nodes} nodes)")
+
+        t = time.perf_counter()
+        indptr, targets = _csr(src, dst, n)
+        topo = _dfs_order(n, indptr, targets)
+        back = topo[src] > topo[dst]
+        src, dst = np.where(back, dst, src), np.where(back, src, dst)
+        t = mark("cycle_removal", t)
+
+        indptr, targets = _csr(src, dst, n)
+        layer = _longest_path_layers(n, topo, indptr, targets)
+        src, dst, layer, dummies_skipped = _insert_dummies(src, dst, layer, int(self.max_dummy_factor * n))
+        t = mark("layering", t)
+
+        initial = np.concatenate([topo, np.arange(n, len(layer))]).astype(np.float64)
+        pos = _minimize_crossings(src, dst, layer, initial, self.crossing_iterations)
+        t = mark("crossing_minimization", t)
+
+        x = _assign_coordinates(src, dst, layer, pos, self.node_spacing, self.coordinate_iterations)[:n]
+        y = layer[:n] * self.layer_spacing
+        mark("coordinates", t)
+
+        direction = (direction or graph.direction or "TB").upper()
+        if direction in ("LR", "RL"):
+            x, y = y.astype(np.float64), x
+        if direction == "BT":
+            y = -y
+        elif direction == "RL":
+            x = -x
+
+        xs, ys = np.round(x, 1).tolist(), np.round(y, 1).tolist()
+        positions = {node_id: (xs[i], ys[i]) for i, node_id in enumerate(ids)}
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._record(n, elapsed_ms)
+        return positions, {
+            "algorithm": LAYERED,
+            "nodes": n,
+            "edges": int(len(graph.edges)),
+            "layers": int(layer.max()) + 1,
+            "dummy_nodes": int(len(layer) - n),
+            "dummies_skipped": dummies_skipped,
+            "reversed_edges": int(back.sum()),
+            "direction": direction,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "timings_ms": timings,
+        }
+
+    def force(self, graph: DiagramGraph, initial: Optional[Dict[str, Tuple[float, float]]] = None,
+              iterations: Optional[int] = None,
+              deadline_ms: Optional[float] = None) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, Any]]:
+        """Barnes–Hut 힘 기반 레이아웃 → ({노드 ID: (x, y)}, 통계)"""
+        started = time.perf_counter()
+        iterations = self.force_iterations if iterations is None else iterations
+        deadline_ms = self.force_deadline_ms if deadline_ms is None else deadline_ms
+
+        ids, src, dst = _graph_arrays(graph)
+        n = len(ids)
+        if n == 0:
+            return {}, {"algorithm": FORCE, "nodes": 0, "iterations": 0}
+        if n > self.max_nodes:
+            raise DiagramParseError(f"Graph too large for layout ({n} > {self.max_nodes} nodes)")
+
+        k = self.node_spacing
+        width = k * np.sqrt(n)
+        rng = np.random.default_rng(0)
+        pos = rng.uniform(-width / 2, width / 2, size=(n, 2))
+        warm = 0
+        if initial:
+            for i, node_id in enumerate(ids):
+                if node_id in initial:
+                    pos[i] = initial[node_id]
+                    warm += 1
+        # 이미 배치된 그래프는 작은 온도에서 시작해 기존 모양을 유지
+        temperature = width / 10 if warm < n / 2 else k
+        depth = _tree_depth(n)
+
+        done = 0
+        for done in range(1, iterations + 1):
+            force = _barnes_hut_repulsion(pos, k ** 3, depth)
+            if len(src):
+                delta = pos[src] - pos[dst]
+                dist = np.sqrt((delta * delta).sum(axis=1)) + 1e-9
+                pull = delta * (dist / k)[:, None]
+                force[:, 0] += np.bincount(dst, weights=pull[:, 0], minlength=n) - np.bincount(src, weights=pull[:, 0], minlength=n)
+                force[:, 1] += np.bincount(dst, weights=pull[:, 1], minlength=n) - np.bincount(src, weights=pull[:, 1], minlength=n)
+            # 연결되지 않은 컴포넌트가 멀리 흩어지지 않도록 중심으로 약하게 당김
+            force -= self.force_gravity * (pos - pos.mean(axis=0))
+
+            # 반복 횟수와 마감 시간 중 더 많이 소진된 쪽을 기준으로 냉각 (마감에 걸려도 식은 상태로 끝남)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            progress = min(1.0, max(done / iterations, elapsed_ms / deadline_ms))
+            length = np.sqrt((force * force).sum(axis=1)) + 1e-9
+            step = temperature * (1.0 - progress) + k * 0.01
+            pos += force * (np.minimum(length, step) / length)[:, None]
+            if progress >= 1.0:
+                break
+
+        pos -= pos.min(axis=0)
+        xs, ys = np.round(pos[:, 0], 1).tolist(), np.round(pos[:, 1], 1).tolist()
+        positions = {node_id: (xs[i], ys[i]) for i, node_id in enumerate(ids)}
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._record(n, elapsed_ms)
+        return positions, {
+            "algorithm": FORCE,
+            "nodes": n,
+            "edges": int(len(graph.edges)),
+            "iterations": done,
+            "max_iterations": iterations,
+            "deadline_hit": done < iterations,
+            "warm_start": warm,
+            "elapsed_ms": round(elapsed_ms, 2),
+        }
+
+    def incremental(self, graph: DiagramGraph, previous: Dict[str, Tuple[float, float]],
+                    previous_edges: Optional[Set[Tuple[str, str]]] = None,
+                    iterations: Optional[int] = None) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, Any]]:
+        """이전 버전 좌표를 재사용하는 안정적 재배치 → ({노드 ID: (x, y)}, 통계)
+
+        기존 노드는 제자리에 두고 새 노드만 배치된 이웃의 평균 위치 근처에 놓은 뒤,
+        새 노드와 바뀐 엣지의 끝점 및 그 이웃만 움직이는 짧은 국소 완화를 수행한다.
+        고정 노드의 사분 트리는 한 번만 만들고 반복마다 움직이는 노드만 조회하므로
+        반복 비용은 다이어그램 크기가 아니라 편집 크기에 비례한다.
+        """
+        started = time.perf_counter()
+        iterations = self.incremental_iterations if iterations is None else iterations
+        ids, src, dst = _graph_arrays(graph)
+        n = len(ids)
+        known = np.fromiter((node_id in previous for node_id in ids), dtype=bool, count=n)
+        added = int(n - known.sum())
+        if n == 0 or not known.any() or added > self.incremental_max_fraction * n:
+            positions, stats = self.force(graph)
+            return positions, {**stats, "incremental": False, "added": added}
+
+        k = self.node_spacing
+        pos = np.zeros((n, 2))
+        pos[known] = [previous[ids[i]] for i in np.flatnonzero(known).tolist()]
+
+        # 새 노드 배치: 이미 놓인 이웃이 있는 노드부터 이웃 평균 + 작은 흔들림으로 한 겹씩
+        rng = np.random.default_rng(0)
+        placed = known.copy()
+        touch = ~known[src] | ~known[dst]
+        es, et = np.concatenate([src[touch], dst[touch]]), np.concatenate([dst[touch], src[touch]])
+        while not placed.all():
+            ready = placed[es] & ~placed[et]
+            if not ready.any():
+                break
+            counts = np.bincount(et[ready], minlength=n)
+            sums_x = np.bincount(et[ready], weights=pos[es[ready], 0], minlength=n)
+            sums_y = np.bincount(et[ready], weights=pos[es[ready], 1], minlength=n)
+            new = np.flatnonzero(counts)
+            angle = rng.uniform(0, 2 * np.pi, len(new))
+            pos[new, 0] = sums_x[new] / counts[new] + k * 0.5 * np.cos(angle)
+            pos[new, 1] = sums_y[new] / counts[new] + k * 0.5 * np.sin(angle)
+            placed[new] = True
+        # 기존 노드와 연결되지 않은 새 노드는 기존 그림 오른쪽에 세로로 나열
+        orphans = np.flatnonzero(~placed)
+        if len(orphans):
+            right, top = pos[placed, 0].max() + k * 2, pos[placed, 1].min()
+            pos[orphans, 0] = right
+            pos[orphans, 1] = top + k * np.arange(len(orphans))
+
+        # 움직일 노드: 새 노드, 바뀐 엣지의 끝점, 그리고 그 이웃 (자리를 내주도록)
+        movable = ~known
+        if previous_edges is not None:
+            current = {(edge.source, edge.target) for edge in graph.edges if edge.source != edge.target}
+            index = {node_id: i for i, node_id in enumerate(ids)}
+            for source, target in current.symmetric_difference(previous_edges):
+                for node_id in (source, target):
+                    if node_id in index:
+                        movable[index[node_id]] = True
+        seeds = movable.copy()
+        movable[dst[seeds[src]]] = True
+        movable[src[seeds[dst]]] = True
+        # 기존 좌표계를 그대로 유지 (원점 재정렬 없음)
+        moved, done = self._relax(pos, movable, src, dst, iterations)
+
+        xs, ys = np.round(pos[:, 0], 1).tolist(), np.round(pos[:, 1], 1).tolist()
+        positions = {node_id: (xs[i], ys[i]) for i, node_id in enumerate(ids)}
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._record(n, elapsed_ms)
+        return positions, {
+            "algorithm": FORCE,
+            "incremental": True,
+            "nodes": n,
+            "added": added,
+            "removed": sum(1 for node_id in previous if node_id not in graph.nodes),
+            "moved": moved,
+            "iterations": done,
+            "elapsed_ms": round(elapsed_ms, 2),
+        }
+
+    def _relax(self, pos: np.ndarray, movable: np.ndarray, src: np.ndarray, dst: np.ndarray,
+               iterations: int) -> Tuple[int, int]:
+        """movable 노드만 움직이는 국소 힘 완화 (pos 를 제자리에서 갱신) → (움직인 노드 수, 반복 수)"""
+        moving = np.flatnonzero(movable)
+        fixed = np.flatnonzero(~movable)
+        m = len(moving)
+        if m == 0 or iterations <= 0:
+            return 0, 0
+
+        k = self.node_spacing
+        k3 = k ** 3
+        lo = pos.min(axis=0) - k
+        extent = float((pos.max(axis=0) + k - lo).max())
+        field = _RepulsionField(pos[fixed], _tree_depth(len(fixed)), lo, extent) if len(fixed) else None
+        local = np.full(len(pos), -1, dtype=np.int64)
+        local[moving] = np.arange(m)
+        touch = movable[src] | movable[dst]
+        es, et = src[touch], dst[touch]
+        ls, lt = local[es], local[et]
+        s_ok, t_ok = ls >= 0, lt >= 0
+
+        for done in range(1, iterations + 1):
+            p = pos[moving]
+            force = field.repulsion(p, k3) if field is not None else np.zeros_like(p)
+            if m > 1:
+                force += _barnes_hut_repulsion(p, k3, _tree_depth(m))
+            delta = pos[es] - pos[et]
+            dist = np.sqrt((delta * delta).sum(axis=1)) + 1e-9
+            pull = delta * (dist / k)[:, None]
+            for axis in (0, 1):
+                force[:, axis] += np.bincount(lt[t_ok], weights=pull[t_ok, axis], minlength=m)
+                force[:, axis] -= np.bincount(ls[s_ok], weights=pull[s_ok, axis], minlength=m)
+            length = np.sqrt((force * force).sum(axis=1)) + 1e-9
+            step = k * (1.0 - (done - 1) / iterations) + k * 0.01
+            pos[moving] = p + force * (np.minimum(length, step) / length)[:, None]
+        return m, iterations
+
+    def layout_visjs(self, code: str, engine: str, algorithm: str = LAYERED,
+                     direction: Optional[str] = None, **options) -> Tuple[str, Dict[str, Any]]:
+        """다이어그램을 레이아웃해 고정 좌표가 들어간 vis.js JSON 으로 반환 → (코드, 통계)
+
+        vis.js 가 아닌 엔진은 vis.js 로 변환한 뒤 좌표를 붙인다.
+        options 는 force 레이아웃의 iterations / deadline_ms.
+        """
+        if algorithm not in ALGORITHMS:
+            raise DiagramParseError(f"Unsupported layout algorithm: {algorithm}")
+        graph = parse_diagram(code, engine)
+        if engine == "visjs":
+            data = json.loads(code)
+            keys = {str(node_id): node_id for node_id in graph.nodes}
+        else:
+            data = json.loads(to_visjs(graph))
+            keys = {str(i): node_id for i, node_id in enumerate(graph.nodes, 1)}
+        nodes = [node for node in data.get("nodes") or [] if isinstance(node, dict) and str(node.get("id")) in keys]
+
+        if algorithm == FORCE:
+            initial = {
+                keys[str(node["id"])]: (float(node["x"]), float(node["y"]))
+                for node in nodes
+                if isinstance(node.get("x"), (int, float)) and isinstance(node.get("y"), (int, float))
+            }
+            positions, stats = self.force(graph, initial, **options)
+        else:
+            positions, stats = self.layered(graph, direction)
+
+        for node in nodes:
+            node["x"], node["y"] = positions[keys[str(node["id"])]]
+            node["physics"] = False
+        return json.dumps(data, ensure_ascii=False), stats
+
+    def stats(self) -> Dict[str, Any]:
+        layouts = self._stats["layouts"]
+        return {
+            "node_spacing": self.node_spacing,
+            "layer_spacing": self.layer_spacing,
+            "crossing_iterations": self.crossing_iterations,
+            "force_iterations": self.force_iterations,
+            "force_deadline_ms": self.force_deadline_ms,
+            "avg_ms": round(self._stats["total_ms"] / layouts, 2) if layouts else 0.0,
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in self._stats.items()},
+        }
+
+
+# 전역 레이아웃 엔진
+layout_engine = DiagramLayoutEngine()
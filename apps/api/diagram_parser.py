@@ -0,0 +1,630 @@
+# apps/api/diagram_parser.py
+"""Mermaid 플로우차트 / vis.js JSON / Graphviz DOT 공통 그래프 AST 파서
+
+세 엔진의 코드를 같은 DiagramGraph(노드, 엣지, 서브그래프, 라벨)로 변환한다.
+캐시, 레이아웃, 내보내기, 비교 등 코드 구조가 필요한 기능은 이 AST 를 공유한다.
+정규식 기반 단일 패스로 동작하며 1만 노드 그래프도 수십 ms 안에 파싱한다.
+"""
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DiagramParseError(ValueError):
+    """지원하지 않거나 해석할 수 없는 다이어그램 코드"""
+
+
+@dataclass
+class GraphNode:
+    id: str
+    label: Optional[str] = None
+    shape: Optional[str] = None
+    subgraph: Optional[str] = None
+
+
+@dataclass
+class GraphEdge:
+    source: str
+    target: str
+    label: Optional[str] = None
+    directed: bool = True
+
+
+@dataclass
+class Subgraph:
+    id: str
+    label: Optional[str] = None
+    parent: Optional[str] = None
+    nodes: List[str] = field(default_factory=list)
+
+
+@dataclass
+class DiagramGraph:
+    engine: str
+    kind: str
+    direction: Optional[str] = None
+    nodes: Dict[str, GraphNode] = field(default_factory=dict)
+    edges: List[GraphEdge] = field(default_factory=list)
+    subgraphs: Dict[str, Subgraph] = field(default_factory=dict)
+
+    def add_node(self, node_id: str, label: Optional[str] = None, shape: Optional[str] = None,
+                 subgraph: Optional[str] = None) -> GraphNode:
+        """노드 등록 (이미 있으면 라벨/모양 갱신, 서브그래프 안에서 다시 나오면 그 서브그래프로 이동)"""
+        node = self.nodes.get(node_id)
+        if node is None:
+            node = GraphNode(node_id, label, shape, subgraph)
+            self.nodes[node_id] = node
+            if subgraph is not None:
+                self.subgraphs[subgraph].nodes.append(node_id)
+            return node
+        if label is not None:
+            node.label = label
+        if shape is not None:
+            node.shape = shape
+        if subgraph is not None and subgraph != node.subgraph:
+            # Mermaid/DOT 처럼 먼저 참조된 노드도 나중에 나열된 서브그래프에 속한다
+            if node.subgraph is not None:
+                self.subgraphs[node.subgraph].nodes.remove(node_id)
+            node.subgraph = subgraph
+            self.subgraphs[subgraph].nodes.append(node_id)
+        return node
+
+    def add_edge(self, source: str, target: str, label: Optional[str] = None, directed: bool = True):
+        self.edges.append(GraphEdge(source, target, label, directed))
+
+    def adjacency(self) -> Dict[str, List[str]]:
+        adj: Dict[str, List[str]] = {node_id: [] for node_id in self.nodes}
+        for edge in self.edges:
+            adj.setdefault(edge.source, []).append(edge.target)
+            adj.setdefault(edge.target, [])
+        return adj
+
+    def metrics(self) -> Dict[str, Any]:
+        """노드/엣지 수, 깊이(최장 경로의 계층 수, 순환은 하나로 축약), 순환, 연결 요소"""
+        adj = self.adjacency()
+        components = strongly_connected_components(adj)
+        cyclic = [c for c in components if len(c) > 1]
+        self_loops = sum(1 for edge in self.edges if edge.source == edge.target)
+        return {
+            "node_count": len(adj),
+            "edge_count": len(self.edges),
+            "subgraph_count": len(self.subgraphs),
+            "depth": _condensed_depth(adj, components),
+            "has_cycles": bool(cyclic) or self_loops > 0,
+            "cycle_count": len(cyclic) + self_loops,
+            "components": _weak_component_count(adj),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 직렬화용 압축 표현"""
+        return {
+            "engine": self.engine,
+            "kind": self.kind,
+            "direction": self.direction,
+            "nodes": [
+                {"id": n.id, "label": n.label, "shape": n.shape, "subgraph": n.subgraph}
+                for n in self.nodes.values()
+            ],
+            "edges": [
+                {"source": e.source, "target": e.target, "label": e.label, "directed": e.directed}
+                for e in self.edges
+            ],
+            "subgraphs": [
+                {"id": s.id, "label": s.label, "parent": s.parent, "nodes": s.nodes}
+                for s in self.subgraphs.values()
+            ],
+        }
+
+    def structure_hash(self, scope: str = "", include_direction: bool = False) -> str:
+        """노드 ID 와 엣지만으로 만든 SHA-256 (라벨/모양/좌표 변경은 같은 해시)
+
+        scope 는 용도별 네임스페이스 (레이아웃 알고리즘 등)
+        """
+        material = json.dumps(
+            {
+                "scope": scope,
+                "direction": self.direction if include_direction else None,
+                "nodes": sorted(self.nodes),
+                "edges": sorted({(edge.source, edge.target) for edge in self.edges}),
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+# ----------------------------------------------------------------------
+# graph algorithms
+# ----------------------------------------------------------------------
+def strongly_connected_components(adj: Dict[str, List[str]]) -> List[List[str]]:
+    """반복형 Tarjan SCC (결과는 역위상 순서: 후속 요소가 먼저)"""
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    on_stack = set()
+    stack: List[str] = []
+    result: List[List[str]] = []
+    counter = 0
+
+    for root in adj:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work: List[Tuple[str, Iterator[str]]] = [(root, iter(adj[root]))]
+        while work:
+            v, successors = work[-1]
+            descended = False
+            for w in successors:
+                if w not in index:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(adj[w])))
+                    descended = True
+                    break
+                if w in on_stack and index[w] < low[v]:
+                    low[v] = index[w]
+            if descended:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[v] < low[parent]:
+                    low[parent] = low[v]
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack.discard(w)
+                    component.append(w)
+                    if w == v:
+                        break
+                result.append(component)
+    return result
+
+
+def _condensed_depth(adj: Dict[str, List[str]], components: List[List[str]]) -> int:
+    component_of = {node: i for i, component in enumerate(components) for node in component}
+    depth = [0] * len(components)
+    # Tarjan 결과는 후속 요소가 먼저 나오므로 순서대로 계산하면 된다
+    for i, component in enumerate(components):
+        best = 0
+        for node in component:
+            for w in adj[node]:
+                j = component_of[w]
+                if j != i and depth[j] > best:
+                    best = depth[j]
+        depth[i] = best + 1
+    return max(depth, default=0)
+
+
+def _weak_component_count(adj: Dict[str, List[str]]) -> int:
+    parent = {node: node for node in adj}
+
+    def find(x: str) -> str:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    count = len(parent)
+    for v, successors in adj.items():
+        for w in successors:
+            rv, rw = find(v), find(w)
+            if rv != rw:
+                parent[rv] = rw
+                count -= 1
+    return count
+
+
+# ----------------------------------------------------------------------
+# Mermaid flowchart
+# ----------------------------------------------------------------------
+_MERMAID_SHAPES = {
+    "(((": ("double_circle", ")))"), "([": ("stadium", "])"), "[[": ("subroutine", "]]"),
+    "[(": ("cylinder", ")]"), "((": ("circle", "))"), "{{": ("hexagon", "}}"),
+    "[/": ("parallelogram", "/]"), "[\\": ("parallelogram_alt", "\\]"), "[": ("rect", "]"),
+    "(": ("round", ")"), "{": ("rhombus", "}"), ">": ("asymmetric", "]"),
+}
+_MERMAID_NODE = (
+    r'(\w+)'
+    r'(?:(\(\(\(|\(\[|\[\[|\[\(|\(\(|\{\{|\[/|\[\\|\[|\(|\{|>)'
+    r'\s*(?:"([^"]*)"|([^"\n()\[\]{}]*?))\s*'
+    r'(\)\)\)|\]\)|\]\]|\)\]|\)\)|\}\}|/\]|\\\]|\]|\)|\}))?'
+    r'(?::::\w+)?'
+)
+_MERMAID_NODE_RE = re.compile(r'\s*' + _MERMAID_NODE)
+# 빠른 경로: 'A[라벨] --> B' 처럼 엣지 하나로 된 줄 전체
+_MERMAID_SIMPLE_LINE_RE = re.compile(
+    _MERMAID_NODE + r'\s*(<)?(-{2,}|={2,}|-\.+-|~~~)([>xo]?)(?:\s*\|([^|]*)\|)?\s*' + _MERMAID_NODE
+)
+_MERMAID_EDGE_RE = re.compile(
+    r'\s*(?:'
+    r'(?P<tstart><?(?:--|==|-\.))\s+(?P<text>[^-=.|\s][^|\n]*?)\s*(?P<tend>-{2,}|={2,}|\.-)(?P<thead>[>xo]?)'
+    r'|(?P<start><)?(?P<body>-{2,}|={2,}|-\.+-|~~~)(?P<head>[>xo]?)(?:\s*\|(?P<label>[^|]*)\|)?'
+    r')'
+)
+_MERMAID_AMP_RE = re.compile(r"\s*&")
+_MERMAID_HEADER_RE = re.compile(r"^(graph|flowchart)\b\s*(\w*)")
+_MERMAID_SUBGRAPH_RE = re.compile(r'^subgraph\s+(?:(\w+)\s*\[\s*"?([^"\]]*)"?\s*\]|"([^"]*)"|(.+?))\s*$')
+_MERMAID_SKIP_RE = re.compile(r"^(?:%%|(?:classDef|class|style|linkStyle|click|direction)\b)")
+
+
+def _mermaid_node_group(graph: DiagramGraph, line: str, pos: int,
+                        subgraph: Optional[str]) -> Tuple[List[str], int]:
+    """'A & B[라벨]' 형태 노드 그룹 파싱 → (노드 ID 목록, 다음 위치)"""
+    ids: List[str] = []
+    while True:
+        m = _MERMAID_NODE_RE.match(line, pos)
+        if m is None:
+            return ids, pos
+        node_id, opener = m.group(1), m.group(2)
+        if opener is not None and m.group(5) is not None:
+            label = m.group(3) if m.group(3) is not None else m.group(4)
+            graph.add_node(node_id, label, _MERMAID_SHAPES[opener][0], subgraph)
+            pos = m.end()
+        else:
+            graph.add_node(node_id, subgraph=subgraph)
+            # 여는 기호만 있고 닫히지 않은 라벨은 ID 까지만 소비
+            pos = m.end(1) if opener is not None else m.end()
+        ids.append(node_id)
+        amp = _MERMAID_AMP_RE.match(line, pos)
+        if amp is None:
+            return ids, pos
+        pos = amp.end()
+
+
+def parse_mermaid(code: str) -> DiagramGraph:
+    lines = code.strip().splitlines()
+    header_index = next((i for i, line in enumerate(lines) if line.strip() and not line.strip().startswith("%%")), None)
+    if header_index is None:
+        raise DiagramParseError("Empty Mermaid code")
+    header_line = lines[header_index].strip()
+    header = _MERMAID_HEADER_RE.match(header_line)
+    if header is None:
+        kind = header_line.split()[0]
+        raise DiagramParseError(f"Unsupported Mermaid diagram type: {kind}")
+
+    graph = DiagramGraph("mermaid", "flowchart", header.group(2) or "TD")
+    # 'graph TD;A-->B;B-->C' 처럼 헤더 줄에 이어 쓴 문장도 파싱
+    rest = header_line[header.end():].strip().lstrip(";")
+    body = ([rest] if rest.strip() else []) + lines[header_index + 1:]
+    stack: List[str] = []
+    for raw in body:
+        for line in (raw.split(";") if '"' not in raw else (raw,)):
+            line = line.strip()
+            if not line or _MERMAID_SKIP_RE.match(line):
+                continue
+            if line == "end":
+                if stack:
+                    stack.pop()
+                continue
+            if line.startswith("subgraph"):
+                m = _MERMAID_SUBGRAPH_RE.match(line)
+                if m is not None:
+                    label = m.group(2) or m.group(3) or m.group(4)
+                    sub_id = m.group(1) or (m.group(4) if m.group(4) and re.fullmatch(r"\w+", m.group(4)) else None)
+                    sub_id = sub_id or f"subgraph_{len(graph.subgraphs) + 1}"
+                    graph.subgraphs[sub_id] = Subgraph(sub_id, label, stack[-1] if stack else None)
+                    stack.append(sub_id)
+                continue
+
+            current = stack[-1] if stack else None
+            simple = _MERMAID_SIMPLE_LINE_RE.fullmatch(line)
+            if simple is not None:
+                (source, s_open, s_quoted, s_text, s_close, _, _, head, label,
+                 target, t_open, t_quoted, t_text, t_close) = simple.groups()
+                if s_close is not None:
+                    graph.add_node(source, s_quoted if s_quoted is not None else s_text, _MERMAID_SHAPES[s_open][0], current)
+                else:
+                    graph.add_node(source, subgraph=current)
+                if t_close is not None:
+                    graph.add_node(target, t_quoted if t_quoted is not None else t_text, _MERMAID_SHAPES[t_open][0], current)
+                else:
+                    graph.add_node(target, subgraph=current)
+                graph.add_edge(source, target, label.strip() if label else None, bool(head))
+                continue
+
+            left, pos = _mermaid_node_group(graph, line, 0, current)
+            while left:
+                edge = _MERMAID_EDGE_RE.match(line, pos)
+                if edge is None:
+                    break
+                if edge.group("text") is not None:
+                    label, directed = edge.group("text"), bool(edge.group("thead"))
+                else:
+                    label, directed = edge.group("label"), bool(edge.group("head"))
+                right, pos = _mermaid_node_group(graph, line, edge.end(), current)
+                for source in left:
+                    for target in right:
+                        graph.add_edge(source, target, label.strip() if label else None, directed)
+                left = right
+    return graph
+
+
+# ----------------------------------------------------------------------
+# vis.js JSON
+# ----------------------------------------------------------------------
+def _optional_str(value: Any) -> Optional[str]:
+    # JSON 의 숫자/불리언 라벨도 문자열로 (None 은 라벨 없음)
+    return str(value) if value is not None else None
+
+
+def parse_visjs(code: str) -> DiagramGraph:
+    try:
+        data = json.loads(code)
+    except ValueError as e:
+        raise DiagramParseError(f"Invalid vis.js JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise DiagramParseError("vis.js JSON must be an object with nodes/edges")
+
+    graph = DiagramGraph("visjs", "network")
+    for node in data.get("nodes") or []:
+        if isinstance(node, dict) and node.get("id") is not None:
+            group = node.get("group")
+            subgraph = str(group) if group is not None else None
+            if subgraph is not None and subgraph not in graph.subgraphs:
+                graph.subgraphs[subgraph] = Subgraph(subgraph, subgraph)
+            graph.add_node(str(node["id"]), _optional_str(node.get("label")), _optional_str(node.get("shape")), subgraph)
+    for edge in data.get("edges") or []:
+        if not isinstance(edge, dict) or edge.get("from") is None or edge.get("to") is None:
+            continue
+        source, target = str(edge["from"]), str(edge["to"])
+        graph.add_node(source)
+        graph.add_node(target)
+        graph.add_edge(source, target, _optional_str(edge.get("label")), bool(edge.get("arrows")))
+    return graph
+
+
+# ----------------------------------------------------------------------
+# Graphviz DOT
+# ----------------------------------------------------------------------
+# 닫히지 않은 문자열/라벨에서 역추적이 폭증하지 않도록 소유 수량자 사용
+_DOT_WS = r'(?:\s++|//[^\n]*+|/\*.*?\*/|(?m:^#[^\n]*+))*+'
+_DOT_STRING = r'"(?:[^"\\]++|\\.)*+"'
+_DOT_HTML = r'<(?:[^<>]++|<(?:[^<>]++|<[^<>]*+>)*+>)*+>'
+# ID: 따옴표 문자열, 숫자, 식별자, HTML 라벨(<...>, 2단계 중첩까지)
+_DOT_ID = (
+    r'(?:' + _DOT_STRING + r'|-?(?:\.\d+|\d+(?:\.\d*)?)|[A-Za-z_\u0080-\uffff][\w\u0080-\uffff]*+|' + _DOT_HTML + r')'
+)
+_DOT_ATTR_LIST = r'\[(?:[^\]"<]++|' + _DOT_STRING + r'|' + _DOT_HTML + r')*+\]'
+
+_DOT_WS_RE = re.compile(_DOT_WS, re.S)
+_DOT_ID_RE = re.compile(_DOT_ID)
+_DOT_ATTR_RE = re.compile(r'(' + _DOT_ID + r')\s*(?:=\s*(' + _DOT_ID + r'))?')
+# 빠른 경로: 'a -> b [attrs];' / 'a [attrs];' 형태의 단순 문장
+# (뒤에 =, {, 엣지 연산자가 이어지는 속성 대입/서브그래프/엣지 체인은 일반 경로)
+_DOT_SIMPLE_STMT_RE = re.compile(
+    _DOT_WS + r'(' + _DOT_ID + r')(?::' + _DOT_ID + r'){0,2}'
+    r'(?:' + _DOT_WS + r'(?:->|--)' + _DOT_WS + r'(' + _DOT_ID + r')(?::' + _DOT_ID + r'){0,2})?'
+    r'((?:' + _DOT_WS + _DOT_ATTR_LIST + r')*)' + _DOT_WS + r'(?![={-])[;,]?',
+    re.S,
+)
+_DOT_ATTR_LISTS_RE = re.compile(r'(?:' + _DOT_WS + _DOT_ATTR_LIST + r')*', re.S)
+_DOT_KEYWORDS = {"strict", "graph", "digraph", "node", "edge", "subgraph"}
+
+
+def _dot_unquote(value: str) -> str:
+    first = value[0]
+    if first == '"':
+        return value[1:-1].replace('\\"', '"')
+    if first == "<":
+        return value[1:-1]
+    return value
+
+
+def _dot_attrs(text: str) -> Dict[str, str]:
+    return {
+        _dot_unquote(m.group(1)): _dot_unquote(m.group(2)) if m.group(2) is not None else "true"
+        for m in _DOT_ATTR_RE.finditer(text)
+    }
+
+
+class _DotParser:
+    """문장 단위 재귀 하강 파서 (단순 노드/엣지 문장은 정규식 한 번으로 처리)"""
+
+    def __init__(self, code: str):
+        self.code = code
+        self.pos = 0
+        self.graph: Optional[DiagramGraph] = None
+
+    def _skip(self) -> str:
+        self.pos = _DOT_WS_RE.match(self.code, self.pos).end()
+        return self.code[self.pos] if self.pos < len(self.code) else ""
+
+    def _punct(self, char: str) -> bool:
+        if self._skip() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def _expect_punct(self, char: str):
+        if not self._punct(char):
+            raise DiagramParseError(f"Expected {char!r} in DOT at {self.pos}")
+
+    def _raw_id(self) -> Optional[str]:
+        self._skip()
+        m = _DOT_ID_RE.match(self.code, self.pos)
+        if m is None:
+            return None
+        self.pos = m.end()
+        return m.group(0)
+
+    def _keyword(self, word: str) -> bool:
+        start = self.pos
+        raw = self._raw_id()
+        if raw is not None and raw.lower() == word:
+            return True
+        self.pos = start
+        return False
+
+    def _id(self) -> str:
+        raw = self._raw_id()
+        if raw is None:
+            raise DiagramParseError(f"Expected identifier in DOT at {self.pos}")
+        return _dot_unquote(raw)
+
+    def parse(self) -> DiagramGraph:
+        self._keyword("strict")
+        if self._keyword("digraph"):
+            kind = "digraph"
+        elif self._keyword("graph"):
+            kind = "graph"
+        else:
+            raise DiagramParseError("DOT code must start with graph or digraph")
+        self.graph = DiagramGraph("dot", kind)
+        if self._skip() != "{":
+            self._id()
+        self._expect_punct("{")
+        self._statements(None)
+        self._expect_punct("}")
+        return self.graph
+
+    def _statements(self, subgraph: Optional[str]) -> List[str]:
+        """문장 목록 파싱 → 언급된 노드 ID (익명 서브그래프 엣지 끝점용)"""
+        mentioned: List[str] = []
+        while True:
+            if self._simple_statement(subgraph, mentioned):
+                continue
+            char = self._skip()
+            if not char or char == "}":
+                return mentioned
+            if char in ";,":
+                self.pos += 1
+                continue
+            mentioned.extend(self._statement(subgraph))
+
+    def _simple_statement(self, subgraph: Optional[str], mentioned: List[str]) -> bool:
+        m = _DOT_SIMPLE_STMT_RE.match(self.code, self.pos)
+        if m is None:
+            return False
+        first, second, attr_text = m.groups()
+        if first.lower() in _DOT_KEYWORDS:
+            return False
+        self.pos = m.end()
+
+        graph = self.graph
+        attrs = _dot_attrs(attr_text) if attr_text else {}
+        source = _dot_unquote(first)
+        graph.add_node(source, subgraph=subgraph)
+        mentioned.append(source)
+        if second is None:
+            if attrs:
+                node = graph.nodes[source]
+                node.label = attrs.get("label", node.label)
+                node.shape = attrs.get("shape", node.shape)
+            return True
+        target = _dot_unquote(second)
+        graph.add_node(target, subgraph=subgraph)
+        mentioned.append(target)
+        graph.add_edge(source, target, attrs.get("label"), graph.kind == "digraph" and attrs.get("dir") != "none")
+        return True
+
+    def _endpoint(self, subgraph: Optional[str]) -> List[str]:
+        """엣지 끝점: 노드 ID(포트 무시) 또는 서브그래프 안에서 언급된 모든 노드"""
+        start = self.pos
+        if self._skip() == "{" or self._keyword("subgraph"):
+            self.pos = start
+            return self._subgraph(subgraph)
+        node_id = self._id()
+        while self._punct(":"):
+            self._id()
+        self.graph.add_node(node_id, subgraph=subgraph)
+        return [node_id]
+
+    def _subgraph(self, parent: Optional[str]) -> List[str]:
+        graph = self.graph
+        named = self._keyword("subgraph")
+        sub_id = self._id() if named and self._skip() != "{" else None
+        if sub_id is not None and sub_id not in graph.subgraphs:
+            graph.subgraphs[sub_id] = Subgraph(sub_id, parent=parent)
+        self._expect_punct("{")
+        # 익명 서브그래프({a b})는 묶음일 뿐이므로 노드 소속은 바깥 그래프
+        mentioned = self._statements(sub_id if sub_id is not None else parent)
+        self._expect_punct("}")
+        return mentioned
+
+    def _statement(self, subgraph: Optional[str]) -> List[str]:
+        graph = self.graph
+        start = self.pos
+        for keyword in ("graph", "node", "edge"):
+            if self._keyword(keyword):
+                attrs = self._attr_lists()
+                if keyword == "graph" and subgraph is not None and "label" in attrs:
+                    graph.subgraphs[subgraph].label = attrs["label"]
+                return []
+
+        raw = self._raw_id()
+        if raw is not None and self._punct("="):
+            # 그래프 속성 (label="..." 등)
+            value = self._id()
+            if raw == "label" and subgraph is not None:
+                graph.subgraphs[subgraph].label = value
+            elif raw == "rankdir" and subgraph is None:
+                graph.direction = value
+            return []
+        self.pos = start
+
+        left = self._endpoint(subgraph)
+        mentioned = list(left)
+        edges: List[Tuple[List[str], List[str]]] = []
+        while True:
+            self._skip()
+            if not (self.code.startswith("->", self.pos) or self.code.startswith("--", self.pos)):
+                break
+            self.pos += 2
+            right = self._endpoint(subgraph)
+            mentioned.extend(right)
+            edges.append((left, right))
+            left = right
+        attrs = self._attr_lists()
+        directed = graph.kind == "digraph" and attrs.get("dir") != "none"
+        for sources, targets in edges:
+            for source in sources:
+                for target in targets:
+                    graph.add_edge(source, target, attrs.get("label"), directed)
+        return mentioned
+
+    def _attr_lists(self) -> Dict[str, str]:
+        self._skip()
+        m = _DOT_ATTR_LISTS_RE.match(self.code, self.pos)
+        self.pos = m.end()
+        return _dot_attrs(m.group(0)) if m.group(0) else {}
+
+
+def parse_dot(code: str) -> DiagramGraph:
+    return _DotParser(code).parse()
+
+
+# ----------------------------------------------------------------------
+# entry points
+# ----------------------------------------------------------------------
+_PARSERS = {"mermaid": parse_mermaid, "visjs": parse_visjs, "dot": parse_dot}
+
+
+def parse_diagram(code: str, engine: str) -> DiagramGraph:
+    """엔진별 코드를 그래프 AST 로 변환 (지원하지 않으면 DiagramParseError)"""
+    parser = _PARSERS.get(engine)
+    if parser is None:
+        raise DiagramParseError(f"Unsupported engine: {engine}")
+    return parser(code)
+
+
+def graph_metrics(code: str, engine: str) -> Optional[Dict[str, Any]]:
+    """생성 결과 metadata 용 그래프 지표 (파싱할 수 없으면 None)"""
+    try:
+        return parse_diagram(code, engine).metrics()
+    except DiagramParseError as e:
+        logger.info(f"Diagram metrics skipped ({engine}): {e}")
+        return None
+    except Exception as e:
+        logger.warning(f"Diagram metrics failed ({engine}): {e}")
+        return None
@@ -0,0 +1,149 @@
+# apps/api/gemini_context_cache.py
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+
+class GeminiContextCache:
+    """Gemini cachedContents 핸들 관리 (정적 시스템 프롬프트 접두부 캐싱)
+
+    모델 × 시스템 프롬프트 버전마다 cachedContents 를 한 번 만들고, 만료 refresh_margin 초 전부터는
+    사용 시점에 TTL 을 연장한다. 생성/연장이 실패하면(최소 토큰 수 미달, 권한 등) retry_seconds 동안
+    해당 모델은 캐시 없이 전체 프롬프트를 보내도록 None 을 반환한다.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() in ("1", "true", "yes", "on")
+        self.ttl_seconds = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+        self.refresh_margin = int(os.getenv("GEMINI_CONTEXT_CACHE_REFRESH_MARGIN", "300"))
+        self.retry_seconds = float(os.getenv("GEMINI_CONTEXT_CACHE_RETRY", "600"))
+
+        self._handles: Dict[str, Dict[str, Any]] = {}
+        self._failed_until: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._stats = {
+            "created": 0,
+            "refreshed": 0,
+            "reused": 0,
+            "create_failures": 0,
+            "refresh_failures": 0,
+            "invalidated": 0,
+        }
+
+    @staticmethod
+    def _key(model_name: str, version: str) -> str:
+        return f"{model_name}@{version}"
+
+    def _lock(self, key: str) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    async def get_handle(self, client: httpx.AsyncClient, base_url: str, api_key: str,
+                         model_name: str, version: str, prefix: str) -> Optional[str]:
+        """사용할 cachedContents 이름 (캐시를 쓸 수 없으면 None)"""
+        if not self.enabled:
+            return None
+        key = self._key(model_name, version)
+        if time.monotonic() < self._failed_until.get(key, 0.0):
+            return None
+
+        handle = self._handles.get(key)
+        if handle is not None and handle["expires_at"] - time.monotonic() > self.refresh_margin:
+            self._stats["reused"] += 1
+            return handle["name"]
+
+        # 동일 모델에 대한 동시 생성/연장은 한 번만
+        async with self._lock(key):
+            handle = self._handles.get(key)
+            now = time.monotonic()
+            if handle is not None and handle["expires_at"] - now > self.refresh_margin:
+                self._stats["reused"] += 1
+                return handle["name"]
+            if handle is not None and handle["expires_at"] > now:
+                if await self._refresh(client, base_url, api_key, key, handle):
+                    return handle["name"]
+            return await self._create(client, base_url, api_key, key, model_name, version, prefix)
+
+    async def _create(self, client: httpx.AsyncClient, base_url: str, api_key: str, key: str,
+                      model_name: str, version: str, prefix: str) -> Optional[str]:
+        payload = {
+            "model": f"models/{model_name}",
+            "displayName": f"diagrammer-system-prompt-{version}",
+            "contents": [{"role": "user", "parts": [{"text": prefix}]}],
+            "ttl": f"{self.ttl_seconds}s",
+        }
+        try:
+            response = await client.post(f"{base_url}/cachedContents?key={api_key}", json=payload)
+        except httpx.HTTPError as e:
+            return self._fail(key, f"{type(e).__name__}: {e}")
+        if response.status_code != 200:
+            return self._fail(key, f"API error: {response.status_code} {response.text[:300]}")
+
+        name = response.json().get("name")
+        if not name:
+            return self._fail(key, "No cachedContents name in response")
+        self._handles[key] = {"name": name, "expires_at": time.monotonic() + self.ttl_seconds}
+        self._stats["created"] += 1
+        logger.info(f"🗄️ Gemini context cache created for {key}: {name}")
+        return name
+
+    async def _refresh(self, client: httpx.AsyncClient, base_url: str, api_key: str,
+                       key: str, handle: Dict[str, Any]) -> bool:
+        try:
+            response = await client.patch(
+                f"{base_url}/{handle['name']}?updateMask=ttl&key={api_key}",
+                json={"ttl": f"{self.ttl_seconds}s"},
+            )
+        except httpx.HTTPError as e:
+            response = None
+            logger.warning(f"⚠️ Gemini context cache refresh failed for {key}: {e}")
+        if response is None or response.status_code != 200:
+            self._stats["refresh_failures"] += 1
+            self._handles.pop(key, None)
+            return False
+        handle["expires_at"] = time.monotonic() + self.ttl_seconds
+        self._stats["refreshed"] += 1
+        logger.info(f"🗄️ Gemini context cache refreshed for {key}")
+        return True
+
+    def _fail(self, key: str, error: str) -> None:
+        self._stats["create_failures"] += 1
+        self._failed_until[key] = time.monotonic() + self.retry_seconds
+        logger.warning(f"⚠️ Gemini context cache unavailable for {key}, sending inline prompt: {error}")
+        return None
+
+    def invalidate(self, model_name: str, version: str):
+        """서버에서 핸들을 거부한 경우(만료/삭제) 폐기하고 다음 호출에서 다시 생성"""
+        if self._handles.pop(self._key(model_name, version), None) is not None:
+            self._stats["invalidated"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "refresh_margin": self.refresh_margin,
+            "handles": {
+                key: {"name": handle["name"], "expires_in": round(handle["expires_at"] - now, 1)}
+                for key, handle in self._handles.items()
+            },
+            "disabled_for": {
+                key: round(until - now, 1) for key, until in self._failed_until.items() if until > now
+            },
+            **self._stats,
+        }
+
+
+# 전역 Gemini 컨텍스트 캐시 인스턴스
+gemini_context_cache = GeminiContextCache()
@@ -0,0 +1,157 @@
+# apps/api/generation_cache.py
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from dotenv import load_dotenv
+from llm_adapter import SYSTEM_PROMPT_VERSION
+from database import db
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """캐시 키용 프롬프트 정규화 (유니코드 NFKC, 공백 축약, 대소문자 무시)"""
+    text = unicodedata.normalize("NFKC", prompt or "")
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return text.casefold()
+
+
+def make_cache_key(provider: str, engine: str, prompt: str) -> str:
+    """(provider, engine, 정규화된 prompt, 시스템 프롬프트 버전) 의 SHA-256 해시"""
+    material = json.dumps(
+        {
+            "v": SYSTEM_PROMPT_VERSION,
+            "provider": provider,
+            "engine": engine,
+            "prompt": normalize_prompt(prompt),
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """다이어그램 생성 결과 캐시
+
+    1차: 프로세스 내 LRU (OrderedDict), 2차(선택): diagrams 테이블의 meta.cache_key 조회.
+    """
+
+    def __init__(self):
+        self.max_entries = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "1000"))
+        self.ttl_seconds = int(os.getenv("GENERATION_CACHE_TTL", str(24 * 3600)))
+        self.persistent = os.getenv("GENERATION_CACHE_PERSISTENT", "true").lower() in ("1", "true", "yes", "on")
+        self.enabled = os.getenv("GENERATION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stats = {
+            "memory_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions_size": 0,
+            "evictions_ttl": 0,
+            "persistent_errors": 0,
+        }
+
+    def _is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["stored_at"] < self.ttl_seconds
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions_size"] += 1
+
+    def get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        """메모리 계층만 조회 (통계 갱신 없음)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not self._is_fresh(entry):
+            del self._entries[key]
+            self._stats["evictions_ttl"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """캐시 조회: 메모리 → 영속 계층 순서, 영속 계층 적중 시 메모리로 승격"""
+        if not self.enabled:
+            return None
+
+        entry = self.get_memory(key)
+        if entry is not None:
+            self._stats["memory_hits"] += 1
+            return {**entry, "cache": "memory"}
+
+        if self.persistent:
+            try:
+                since = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+                diagram = await db.find_diagram_by_cache_key(key, since)
+            except Exception as e:
+                self._stats["persistent_errors"] += 1
+                logger.warning(f"⚠️ Persistent generation cache lookup failed: {e}")
+                diagram = None
+
+            if diagram is not None:
+                meta = dict(diagram.meta or {})
+                entry = {
+                    "diagram_id": str(diagram.id),
+                    "engine": diagram.engine,
+                    "code": diagram.code,
+                    "metadata": meta,
+                    "stored_at": diagram.created_at.timestamp() if diagram.created_at else time.time(),
+                }
+                self._remember(key, entry)
+                self._stats["persistent_hits"] += 1
+                return {**entry, "cache": "persistent"}
+
+        self._stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, diagram_id: str, engine: str, code: str, metadata: Dict[str, Any]):
+        """생성 결과 저장 (영속 계층은 diagrams 행의 meta.cache_key 로 이미 기록됨)"""
+        if not self.enabled:
+            return
+        self._remember(key, {
+            "diagram_id": str(diagram_id),
+            "engine": engine,
+            "code": code,
+            "metadata": metadata,
+            "stored_at": time.time(),
+        })
+        self._stats["stores"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """히트/미스 통계"""
+        hits = self._stats["memory_hits"] + self._stats["persistent_hits"]
+        total = hits + self._stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "persistent": self.persistent,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            **self._stats,
+        }
+
+
+# 전역 생성 캐시 인스턴스
+generation_cache = GenerationCache()
@@ -0,0 +1,190 @@
+# apps/api/generation_jobs.py
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from generation_service import generation_service
+from concurrency_limiter import LLMOverloadedError
+from database import db
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class GenerationJobWorkerPool:
+    """generation_jobs 테이블을 대기열로 쓰는 비동기 생성 워커 풀
+
+    작업은 DB 에 먼저 기록되고 워커가 FOR UPDATE SKIP LOCKED 로 하나씩 가져가 처리한다.
+    실행 중에는 주기적으로 하트비트를 남기며, 하트비트가 끊긴 작업(프로세스 재시작 등)은
+    다른 워커가 다시 대기열로 돌려 재시도한다. API 프로세스 안에서 실행하거나
+    generation_worker.py 로 별도 프로세스에서 실행할 수 있다.
+    """
+
+    def __init__(self):
+        self.concurrency = int(os.getenv("GENERATION_JOB_WORKERS", "4"))
+        self.poll_interval = float(os.getenv("GENERATION_JOB_POLL_INTERVAL", "1.0"))
+        self.stale_seconds = float(os.getenv("GENERATION_JOB_STALE_SECONDS", "60"))
+        self.max_attempts = int(os.getenv("GENERATION_JOB_MAX_ATTEMPTS", "3"))
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stats = {
+            "claimed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retried": 0,
+            "requeued_stale": 0,
+        }
+
+    def notify(self):
+        """새 작업 등록 알림 (같은 프로세스의 워커를 폴링 주기보다 먼저 깨움)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.stale_seconds / 3)
+            try:
+                await db.update_generation_job(job_id, heartbeat_at=datetime.utcnow())
+            except Exception as e:
+                logger.warning(f"Generation job heartbeat failed for {job_id}: {e}")
+
+    async def _requeue_stale(self):
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+        count = await db.requeue_stale_generation_jobs(stale_before, self.max_attempts)
+        if count:
+            self._stats["requeued_stale"] += count
+            logger.warning(f"♻️ Requeued {count} stale generation job(s)")
+
+    async def process(self, job) -> None:
+        """작업 하나 실행: 생성 서비스 호출 후 결과(또는 오류)를 작업 레코드에 기록"""
+        job_id = str(job.id)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            result = await generation_service.generate(job.prompt, job.engine, job.provider, job.user_key, job.plan)
+        except LLMOverloadedError as e:
+            # 과부하는 작업 실패가 아니라 지연 사유: 시도 횟수 내에서 Retry-After 뒤 재시도
+            if job.attempts < self.max_attempts:
+                self._stats["retried"] += 1
+                await db.update_generation_job(
+                    job_id,
+                    status=QUEUED,
+                    worker_id=None,
+                    available_at=datetime.utcnow() + timedelta(seconds=e.retry_after)
+                )
+                logger.warning(f"🚦 Generation job {job_id} deferred {e.retry_after:.0f}s: {e.reason}")
+                return
+            result = {"success": False, "error": str(e)}
+        except Exception as e:
+            logger.error(f"💥 Generation job {job_id} crashed: {e}", exc_info=True)
+            result = {"success": False, "error": str(e)}
+        finally:
+            heartbeat.cancel()
+
+        if result.get("success"):
+            self._stats["succeeded"] += 1
+            await db.update_generation_job(
+                job_id,
+                status=SUCCEEDED,
+                diagram_id=result["diagram_id"],
+                result_meta=result.get("metadata", {}),
+                finished_at=datetime.utcnow()
+            )
+            logger.info(f"✅ Generation job {job_id} succeeded: diagram {result['diagram_id']}")
+        else:
+            self._stats["failed"] += 1
+            await db.update_generation_job(
+                job_id,
+                status=FAILED,
+                error=result.get("error", "Generation failed"),
+                finished_at=datetime.utcnow()
+            )
+            logger.error(f"❌ Generation job {job_id} failed: {result.get('error')}")
+
+    async def _worker(self, index: int):
+        worker_id = f"{self.worker_prefix}:{index}"
+        while True:
+            try:
+                if index == 0:
+                    await self._requeue_stale()
+                job = await db.claim_generation_job(worker_id)
+                if job is None:
+                    await self._idle()
+                    continue
+                self._stats["claimed"] += 1
+                await self.process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Generation job worker {worker_id} error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        logger.info(f"Generation job workers started ({self.concurrency})")
+
+    async def stop(self):
+        """워커 중지 (실행 중이던 작업은 하트비트가 끊겨 다른 워커가 이어받는다)"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._tasks),
+            "concurrency": self.concurrency,
+            "poll_interval": self.poll_interval,
+            "stale_seconds": self.stale_seconds,
+            "max_attempts": self.max_attempts,
+            **self._stats,
+        }
+
+
+def job_to_dict(job, diagram=None) -> Dict[str, Any]:
+    """작업 상태 응답 직렬화 (완료 시 저장된 다이어그램 포함)"""
+    data: Dict[str, Any] = {
+        "job_id": str(job.id),
+        "status": job.status,
+        "engine": job.engine,
+        "provider": job.provider,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == SUCCEEDED:
+        data["diagram_id"] = str(job.diagram_id)
+        data["metadata"] = job.result_meta or {}
+        if diagram is not None:
+            data["code"] = diagram.code
+    elif job.status == FAILED:
+        data["error"] = job.error
+    return data
+
+
+# 전역 생성 작업 워커 풀
+generation_jobs = GenerationJobWorkerPool()
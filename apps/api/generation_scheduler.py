@@ -0,0 +1,205 @@
+# apps/api/generation_scheduler.py
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from dotenv import load_dotenv
+from concurrency_limiter import LLMOverloadedError
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLAN_WEIGHTS = "team:8,pro:4,free:1,anonymous:0.5"
+
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    weights = {}
+    for item in spec.split(","):
+        if ":" not in item:
+            continue
+        plan, weight = item.split(":", 1)
+        weights[plan.strip()] = float(weight)
+    return weights
+
+
+class QueueTicket:
+    """스케줄러 대기열 항목"""
+
+    def __init__(self, seq: int, user_key: str, plan: str, start_tag: float, finish_tag: float):
+        self.seq = seq
+        self.user_key = user_key
+        self.plan = plan
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.enqueued_at = time.monotonic()
+        self.granted_at: Optional[float] = None
+        self.position = 0
+        self.future: Optional[asyncio.Future] = None
+
+    @property
+    def wait_ms(self) -> int:
+        end = self.granted_at or time.monotonic()
+        return int((end - self.enqueued_at) * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"plan": self.plan, "position": self.position, "wait_ms": self.wait_ms}
+
+
+class GenerationScheduler:
+    """LLM 생성 슬롯을 플랜별 가중치로 나누는 가중 공정 큐(WFQ) 스케줄러
+
+    사용자마다 하나의 흐름(flow)으로 보고 가상 종료 태그(finish = max(V, 직전 종료) + 1/가중치)가
+    가장 작은 요청부터 슬롯을 배정한다. 유료 플랜은 가중치만큼 더 자주 배정받고,
+    같은 플랜 안에서는 한 사용자가 대량으로 보내도 다른 사용자 요청과 번갈아 처리된다.
+    """
+
+    def __init__(self):
+        self.capacity = int(os.getenv("GENERATION_SCHEDULER_CAPACITY", "16"))
+        self.max_queue = int(os.getenv("GENERATION_SCHEDULER_MAX_QUEUE", "500"))
+        self.max_wait = float(os.getenv("GENERATION_SCHEDULER_MAX_WAIT", "60"))
+        self.weights = _parse_weights(os.getenv("GENERATION_PLAN_WEIGHTS", DEFAULT_PLAN_WEIGHTS))
+
+        self.running = 0
+        self.virtual_time = 0.0
+        self._heap: List[Any] = []
+        self._seq = itertools.count()
+        self._last_finish: Dict[str, float] = {}
+        self._waits: Dict[str, Deque[int]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def weight_for(self, plan: str) -> float:
+        return self.weights.get(plan, self.weights.get("free", 1.0))
+
+    def _plan_stats(self, plan: str) -> Dict[str, int]:
+        stats = self._stats.get(plan)
+        if stats is None:
+            stats = {"served": 0, "queued": 0, "shed": 0, "timeouts": 0}
+            self._stats[plan] = stats
+        return stats
+
+    def _record_wait(self, ticket: QueueTicket):
+        waits = self._waits.get(ticket.plan)
+        if waits is None:
+            waits = deque(maxlen=500)
+            self._waits[ticket.plan] = waits
+        waits.append(ticket.wait_ms)
+        self._plan_stats(ticket.plan)["served"] += 1
+
+    def _grant(self, ticket: QueueTicket):
+        self.running += 1
+        self.virtual_time = max(self.virtual_time, ticket.start_tag)
+        ticket.granted_at = time.monotonic()
+        self._record_wait(ticket)
+
+    def _dispatch(self):
+        while self._heap and self.running < self.capacity:
+            _, _, ticket = heapq.heappop(self._heap)
+            if ticket.future.done():
+                continue
+            self._grant(ticket)
+            ticket.future.set_result(None)
+        if not self._heap and self.running == 0:
+            # 유휴 상태: 오래된 사용자 종료 태그 정리
+            self._last_finish.clear()
+
+    def _position_of(self, ticket: QueueTicket) -> int:
+        return 1 + sum(1 for tag, seq, t in self._heap
+                       if (tag, seq) < (ticket.finish_tag, ticket.seq) and not t.future.done())
+
+    def enqueue(self, user_key: str, plan: str) -> QueueTicket:
+        """대기열 등록 (여유 슬롯이 있으면 즉시 배정, 대기열 초과 시 LLMOverloadedError)"""
+        weight = self.weight_for(plan)
+        start_tag = max(self.virtual_time, self._last_finish.get(user_key, 0.0))
+        finish_tag = start_tag + 1.0 / weight
+        ticket = QueueTicket(next(self._seq), user_key, plan, start_tag, finish_tag)
+
+        if not self._heap and self.running < self.capacity:
+            self._last_finish[user_key] = finish_tag
+            self._grant(ticket)
+            return ticket
+
+        if len(self._heap) >= self.max_queue:
+            self._plan_stats(plan)["shed"] += 1
+            raise LLMOverloadedError("scheduler", self.max_wait, f"generation queue full ({self.max_queue})")
+
+        self._last_finish[user_key] = finish_tag
+        ticket.future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (finish_tag, ticket.seq, ticket))
+        ticket.position = self._position_of(ticket)
+        self._plan_stats(plan)["queued"] += 1
+        logger.info(f"⏳ Generation queued: plan={plan} position={ticket.position} running={self.running}")
+        return ticket
+
+    async def wait(self, ticket: QueueTicket) -> QueueTicket:
+        """슬롯이 배정될 때까지 대기 (대기 시간 초과 시 LLMOverloadedError)"""
+        if ticket.future is None:
+            return ticket
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), self.max_wait)
+        except asyncio.TimeoutError:
+            self._plan_stats(ticket.plan)["timeouts"] += 1
+            self.cancel(ticket)
+            raise LLMOverloadedError("scheduler", self.max_wait, f"waited more than {self.max_wait:.0f}s in generation queue")
+        except asyncio.CancelledError:
+            self.cancel(ticket)
+            raise
+        return ticket
+
+    async def acquire(self, user_key: str, plan: str) -> QueueTicket:
+        """생성 슬롯 확보 (enqueue + wait)"""
+        return await self.wait(self.enqueue(user_key, plan))
+
+    def cancel(self, ticket: QueueTicket):
+        """대기를 포기한 티켓 정리 (이미 슬롯을 받았다면 반납)"""
+        if ticket.future is None or (ticket.future.done() and not ticket.future.cancelled()):
+            self.release(ticket)
+        else:
+            ticket.future.cancel()
+
+    def release(self, ticket: QueueTicket):
+        self.running = max(0, self.running - 1)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, ticket: QueueTicket) -> AsyncIterator[QueueTicket]:
+        """등록된 티켓의 슬롯을 기다렸다가 블록이 끝나면 반납"""
+        await self.wait(ticket)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        depth: Dict[str, int] = {}
+        for _, _, ticket in self._heap:
+            if not ticket.future.done():
+                depth[ticket.plan] = depth.get(ticket.plan, 0) + 1
+
+        plans = {}
+        for plan in set(self._stats) | set(self.weights):
+            waits = sorted(self._waits.get(plan, []))
+            plans[plan] = {
+                "weight": self.weight_for(plan),
+                "queue_depth": depth.get(plan, 0),
+                "wait_ms_p50": waits[len(waits) // 2] if waits else None,
+                "wait_ms_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else None,
+                **self._plan_stats(plan),
+            }
+        return {
+            "capacity": self.capacity,
+            "running": self.running,
+            "queue_depth": sum(depth.values()),
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "plans": plans,
+        }
+
+
+# 전역 생성 스케줄러 인스턴스
+generation_scheduler = GenerationScheduler()
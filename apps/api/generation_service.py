@@ -0,0 +1,327 @@
+# apps/api/generation_service.py
+import asyncio
+import logging
+import math
+import os
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+
+from llm_adapter import get_llm_adapter
+from generation_cache import generation_cache, make_cache_key, GenerationCache
+from singleflight import SingleFlight
+from prompt_index import prompt_index, PromptIndex
+from generation_scheduler import generation_scheduler, GenerationScheduler
+from concurrency_limiter import LLMOverloadedError
+from database import db
+from diagram_canonical import diagram_canonicalizer
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationService:
+    """캐시 → LLM 어댑터 → 저장 순서로 다이어그램 생성을 처리하는 서비스"""
+
+    def __init__(self, cache: GenerationCache, scheduler: GenerationScheduler, index: PromptIndex):
+        self.cache = cache
+        # 정확한 키가 없을 때 표현만 다른 프롬프트의 캐시 결과를 찾는 근사 중복 인덱스
+        self.index = index
+        # LLM 호출은 플랜 가중 공정 큐에서 슬롯을 받은 뒤에만 수행
+        self.scheduler = scheduler
+        # 동일 입력의 동시 생성 요청은 하나의 LLM 호출/저장을 공유
+        self.inflight = SingleFlight("generation")
+        self.inflight_timeout = float(os.getenv("GENERATION_SINGLEFLIGHT_TIMEOUT", "120"))
+
+    @staticmethod
+    def _is_cacheable(provider: str, metadata: Dict[str, Any]) -> bool:
+        # 요청한 프로바이더가 아닌 Mock 폴백 결과는 캐시하지 않는다
+        if provider == "auto":
+            # 라우터는 실제로 응답한 백엔드가 기록되므로 폴백 여부로 판단
+            return metadata.get("provider") != "mock" and not metadata.get("fallback")
+        return metadata.get("provider") == provider
+
+    @staticmethod
+    def _cached_result(cached: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "diagram_id": cached["diagram_id"],
+            "code": cached["code"],
+            "engine": cached["engine"],
+            "metadata": {**cached["metadata"], "cache": cached["cache"]},
+        }
+
+    async def _lookup_cached(self, cache_key: str, prompt: str, engine: str, provider: str) -> Optional[Dict[str, Any]]:
+        """정확한 캐시 키 → 근사 중복 프롬프트 순서로 캐시된 결과 조회"""
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Generation cache hit ({cached['cache']}): {cache_key[:12]}")
+            return self._cached_result(cached)
+
+        near = self.index.lookup(provider, engine, prompt)
+        if near is None:
+            return None
+        near_key, similarity = near
+        cached = await self.cache.get(near_key)
+        if cached is None:
+            # 캐시에서 만료된 항목은 인덱스에서도 제거
+            self.index.remove(near_key)
+            return None
+        logger.info(f"⚡ Near-duplicate prompt cache hit ({similarity:.2f}): {near_key[:12]}")
+        result = self._cached_result(cached)
+        result["metadata"].update({"cache": "near_duplicate", "similarity": round(similarity, 4)})
+        return result
+
+    async def _persist_metadata(self, cache_key: str, provider: str, engine: str,
+                                result: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """저장할 metadata(공백/주석/노드 ID 차이와 무관한 canonical_hash 포함)와 캐시 가능 여부"""
+        metadata = dict(result.get('metadata', {}))
+        cacheable = self._is_cacheable(provider, metadata)
+        if cacheable:
+            metadata['cache_key'] = cache_key
+        # 큰 그래프의 정규화는 수백 ms 걸릴 수 있으므로 이벤트 루프 밖에서 계산
+        metadata['canonical_hash'] = await asyncio.to_thread(diagram_canonicalizer.fingerprint, result['code'], engine)
+        return metadata, cacheable
+
+    async def generate(self, prompt: str, engine: str = 'mermaid', provider: str = 'mock',
+                       user_key: str = 'anonymous', plan: str = 'anonymous') -> Dict[str, Any]:
+        """다이어그램 생성 (캐시 적중 시 LLM 호출 없이 기존 다이어그램 반환)
+
+        캐시 미스일 때만 스케줄러 대기열을 거치며, 결과 metadata.queue 에 대기 순번과 대기 시간을 담는다.
+        동시에 들어온 동일 요청은 첫 요청자(leader)의 대기열 자리를 공유한다.
+        """
+        cache_key = make_cache_key(provider, engine, prompt)
+
+        cached = await self._lookup_cached(cache_key, prompt, engine, provider)
+        if cached is not None:
+            return cached
+
+        try:
+            result, shared = await self.inflight.do(
+                cache_key,
+                lambda: self._generate_uncached(cache_key, prompt, engine, provider, user_key, plan),
+                timeout=self.inflight_timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"⏱️ Generation timed out after {self.inflight_timeout}s: {cache_key[:12]}")
+            return {
+                "success": False,
+                "error": f"Generation timed out after {self.inflight_timeout:.0f}s",
+                "engine": engine,
+            }
+
+        # 대기자마다 독립된 사본 반환
+        result = dict(result)
+        if result.get("success"):
+            result["metadata"] = {**result["metadata"], "coalesced": shared}
+        return result
+
+    async def _generate_uncached(self, cache_key: str, prompt: str, engine: str, provider: str,
+                                 user_key: str, plan: str) -> Dict[str, Any]:
+        """캐시 미스 경로: 슬롯 대기 → LLM 호출 → 저장 → 캐시 기록"""
+        # LLM 어댑터 가져오기
+        adapter = get_llm_adapter(provider)
+        logger.info(f"🔧 Using LLM adapter: {type(adapter).__name__}")
+
+        ticket = self.scheduler.enqueue(user_key, plan)
+        async with self.scheduler.slot(ticket):
+            # 다이어그램 코드 생성
+            logger.info("🚀 Starting diagram code generation...")
+            result = await adapter.generate_diagram_code(prompt, engine)
+            logger.info(f"✅ Generation completed. Success: {result.get('success', False)}")
+
+        if not result['success']:
+            return result
+
+        saved = await self._persist(cache_key, prompt, engine, provider, result)
+        saved["metadata"]["queue"] = ticket.to_dict()
+        return saved
+
+    async def _persist(self, cache_key: str, prompt: str, engine: str, provider: str,
+                       result: Dict[str, Any]) -> Dict[str, Any]:
+        """성공한 생성 결과를 diagrams 테이블에 저장하고 캐시에 기록"""
+        metadata, cacheable = await self._persist_metadata(cache_key, provider, engine, result)
+
+        # 다이어그램 저장
+        diagram = await db.create_diagram(
+            engine=engine,
+            code=result['code'],
+            render_type="readonly",
+            prompt=prompt,
+            meta=metadata,
+            ttl_hours=24  # 24시간 TTL
+        )
+        logger.info(f"💾 Diagram saved with ID: {diagram.id}")
+
+        if cacheable:
+            await self.cache.put(cache_key, str(diagram.id), engine, result['code'], metadata)
+            self.index.add(cache_key, provider, engine, prompt)
+
+        return {
+            "success": True,
+            "diagram_id": diagram.id,
+            "code": result['code'],
+            "engine": engine,
+            "metadata": {**metadata, "cache": "miss"},
+        }
+
+    async def stream(self, prompt: str, engine: str = 'mermaid', provider: str = 'mock',
+                     user_key: str = 'anonymous', plan: str = 'anonymous') -> AsyncIterator[Dict[str, Any]]:
+        """스트리밍 생성: progress/chunk 이벤트 후 저장된 결과를 done 이벤트로 전달
+
+        캐시 적중 시 전체 코드를 하나의 청크로 즉시 보낸다. 스트림은 대기자 간 공유할 수 없으므로
+        single-flight 합류는 적용하지 않는다. 대기열에 들어가면 queued 진행 이벤트로 순번을 알린다.
+        """
+        cache_key = make_cache_key(provider, engine, prompt)
+
+        cached = await self._lookup_cached(cache_key, prompt, engine, provider)
+        if cached is not None:
+            yield {"type": "chunk", "text": cached["code"]}
+            yield {"type": "done", **cached}
+            return
+
+        adapter = get_llm_adapter(provider)
+        logger.info(f"🔧 Streaming with LLM adapter: {type(adapter).__name__}")
+
+        ticket = self.scheduler.enqueue(user_key, plan)
+        try:
+            if ticket.position:
+                yield {"type": "progress", "stage": "queued", **ticket.to_dict()}
+        except GeneratorExit:
+            # 클라이언트가 대기 중에 연결을 끊은 경우 대기열 자리 반환
+            self.scheduler.cancel(ticket)
+            raise
+
+        result: Dict[str, Any] = {"success": False, "error": "Stream ended without result", "engine": engine}
+        async with self.scheduler.slot(ticket):
+            async for event in adapter.stream_diagram_code(prompt, engine):
+                if event.get("type") == "result":
+                    result = event["result"]
+                    continue
+                yield event
+
+        if not result.get('success'):
+            yield {"type": "error", "error": result.get('error', 'Generation failed'), "engine": engine}
+            return
+
+        yield {"type": "progress", "stage": "saving"}
+        saved = await self._persist(cache_key, prompt, engine, provider, result)
+        saved["metadata"]["queue"] = ticket.to_dict()
+        yield {"type": "done", **saved}
+
+    async def _persist_round(self, round_results: List[Tuple[str, Dict[str, Any]]],
+                             specs: Dict[str, Tuple[str, str, str]]) -> Dict[str, Dict[str, Any]]:
+        """한 완료 라운드의 성공 결과를 한 번의 bulk insert 로 저장하고 캐시에 기록"""
+        rows = []
+        prepared = []
+        for cache_key, result in round_results:
+            prompt, engine, provider = specs[cache_key]
+            metadata, cacheable = await self._persist_metadata(cache_key, provider, engine, result)
+            rows.append({
+                "engine": engine,
+                "code": result['code'],
+                "render_type": "readonly",
+                "prompt": prompt,
+                "meta": metadata,
+            })
+            prepared.append((cache_key, engine, result['code'], metadata, cacheable))
+
+        diagram_ids = await db.create_diagrams_bulk(rows, ttl_hours=24)
+        logger.info(f"💾 Batch round saved {len(diagram_ids)} diagram(s)")
+
+        saved = {}
+        for (cache_key, engine, code, metadata, cacheable), diagram_id in zip(prepared, diagram_ids):
+            if cacheable:
+                await self.cache.put(cache_key, str(diagram_id), engine, code, metadata)
+                prompt, _, provider = specs[cache_key]
+                self.index.add(cache_key, provider, engine, prompt)
+            saved[cache_key] = {
+                "success": True,
+                "diagram_id": diagram_id,
+                "code": code,
+                "engine": engine,
+                "metadata": {**metadata, "cache": "miss"},
+            }
+        return saved
+
+    async def generate_batch(self, items: List[Dict[str, Any]], parallelism: int,
+                             user_key: str = 'anonymous', plan: str = 'anonymous') -> AsyncIterator[Dict[str, Any]]:
+        """여러 프롬프트를 제한된 병렬도로 생성하고 완료되는 순서대로 결과를 전달
+
+        배치 안의 동일 입력은 한 번만 생성하고, 캐시 적중 항목은 LLM 호출 없이 먼저 반환한다.
+        완료된 결과는 라운드 단위(그 시점까지 끝난 항목 전체)로 모아 diagrams 에 bulk insert 한다.
+        각 결과에는 요청 목록에서의 위치(index)가 붙는다.
+        """
+        groups: Dict[str, List[int]] = {}
+        specs: Dict[str, Tuple[str, str, str]] = {}
+        for index, item in enumerate(items):
+            prompt = item.get("prompt", "")
+            engine = item.get("engine", "mermaid")
+            provider = item.get("provider", "mock")
+            cache_key = make_cache_key(provider, engine, prompt)
+            if cache_key not in groups:
+                groups[cache_key] = []
+                specs[cache_key] = (prompt, engine, provider)
+            groups[cache_key].append(index)
+
+        pending = []
+        for cache_key, indices in groups.items():
+            prompt, engine, provider = specs[cache_key]
+            cached = await self._lookup_cached(cache_key, prompt, engine, provider)
+            if cached is None:
+                pending.append(cache_key)
+                continue
+            for index in indices:
+                yield {"index": index, **cached}
+
+        completed: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max(1, parallelism))
+
+        async def run(cache_key: str):
+            prompt, engine, provider = specs[cache_key]
+            async with semaphore:
+                try:
+                    ticket = self.scheduler.enqueue(user_key, plan)
+                    async with self.scheduler.slot(ticket):
+                        result = await get_llm_adapter(provider).generate_diagram_code(prompt, engine)
+                except LLMOverloadedError as e:
+                    result = {"success": False, "error": str(e), "status": 503, "retry_after": math.ceil(e.retry_after)}
+                except Exception as e:
+                    logger.error(f"💥 Batch item failed: {e}")
+                    result = {"success": False, "error": str(e)}
+            await completed.put((cache_key, result))
+
+        tasks = [asyncio.create_task(run(cache_key)) for cache_key in pending]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                round_results = [await completed.get()]
+                while not completed.empty():
+                    round_results.append(completed.get_nowait())
+                remaining -= len(round_results)
+
+                successes = [(key, result) for key, result in round_results if result.get("success")]
+                saved: Dict[str, Dict[str, Any]] = {}
+                persist_error = None
+                if successes:
+                    try:
+                        saved = await self._persist_round(successes, specs)
+                    except Exception as e:
+                        logger.error(f"💥 Batch round persist failed: {e}")
+                        persist_error = f"Failed to save diagram: {e}"
+
+                for cache_key, result in round_results:
+                    output = saved.get(cache_key)
+                    if output is None:
+                        output = {k: v for k, v in result.items() if k in ("success", "error", "status", "retry_after")}
+                        output["success"] = False
+                        output["engine"] = specs[cache_key][1]
+                        if result.get("success"):
+                            output["error"] = persist_error
+                        output.setdefault("error", "Generation failed")
+                    for index in groups[cache_key]:
+                        yield {"index": index, **output}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+# 전역 생성 서비스 인스턴스
+generation_service = GenerationService(generation_cache, generation_scheduler, prompt_index)
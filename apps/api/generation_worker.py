@@ -0,0 +1,37 @@
+# apps/api/generation_worker.py
+"""API 서버와 별도 프로세스로 비동기 생성 작업을 처리하는 워커
+
+실행: uv run python generation_worker.py
+API 서버에서는 GENERATION_JOBS_IN_PROCESS=false 로 내장 워커를 끄고 이 프로세스를 원하는 만큼 띄운다.
+"""
+import asyncio
+import signal
+
+from logging_config import logger
+from http_client_pool import llm_http_pool
+from circuit_breaker import model_breakers
+from generation_jobs import generation_jobs
+
+
+async def main():
+    await llm_http_pool.start()
+    model_breakers.start()
+    generation_jobs.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("Generation worker running")
+    try:
+        await stop.wait()
+    finally:
+        await generation_jobs.stop()
+        await model_breakers.stop()
+        await llm_http_pool.close()
+        logger.info("Generation worker stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
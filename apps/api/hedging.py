@@ -0,0 +1,83 @@
+# apps/api/hedging.py
+import logging
+import os
+from collections import deque
+from typing import Any, Deque, Dict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """헤지(hedged) 요청 정책 및 통계
+
+    1차 모델 응답이 지연 임계값을 넘으면 다음 후보 모델로 두 번째 요청을 보낸다.
+    지연 임계값은 고정값(LLM_HEDGE_DELAY_MS) 또는 모델별 최근 성공 지연의 백분위(auto)로 정한다.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("LLM_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+        delay = os.getenv("LLM_HEDGE_DELAY_MS", "auto").strip().lower()
+        self.fixed_delay = None if delay == "auto" else float(delay) / 1000.0
+        self.default_delay = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_MS", "4000")) / 1000.0
+        self.min_delay = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "500")) / 1000.0
+        self.percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9"))
+        self.min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.window = int(os.getenv("LLM_HEDGE_LATENCY_WINDOW", "200"))
+
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._stats = {
+            "requests": 0,
+            "hedges_launched": 0,
+            "primary_wins": 0,
+            "hedge_wins": 0,
+            "losers_cancelled": 0,
+            "all_failed": 0,
+        }
+
+    def observe(self, model: str, latency: float):
+        """성공한 호출 지연 기록 (헤지 여부와 무관하게 항상 수집)"""
+        samples = self._latencies.get(model)
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            self._latencies[model] = samples
+        samples.append(latency)
+
+    def _percentile(self, model: str):
+        samples = self._latencies.get(model)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+        return ordered[index]
+
+    def delay_for(self, model: str) -> float:
+        """모델에 대한 헤지 지연(초)"""
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        observed = self._percentile(model)
+        if observed is None:
+            return self.default_delay
+        return max(self.min_delay, observed)
+
+    def record(self, event: str, count: int = 1):
+        self._stats[event] += count
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self._stats["requests"]
+        hedges = self._stats["hedges_launched"]
+        return {
+            "enabled": self.enabled,
+            "mode": "fixed" if self.fixed_delay is not None else "auto",
+            "percentile": self.percentile,
+            "hedge_rate": round(hedges / requests, 4) if requests else 0.0,
+            "hedge_win_rate": round(self._stats["hedge_wins"] / hedges, 4) if hedges else 0.0,
+            "delays": {model: round(self.delay_for(model), 3) for model in self._latencies},
+            **self._stats,
+        }
+
+
+# 전역 헤지 정책 인스턴스
+hedge_policy = HedgePolicy()
@@ -0,0 +1,202 @@
+# apps/api/http_client_pool.py
+import asyncio
+import importlib.util
+import logging
+import os
+import time
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class LLMHTTPClientPool:
+    """LLM 프로바이더 호출용 애플리케이션 수명 HTTP 클라이언트 풀
+
+    요청마다 httpx.AsyncClient 를 새로 만들면 DNS/TCP/TLS 핸드셰이크를 매번 다시 하므로,
+    앱 수명 동안 하나의 클라이언트를 공유해 keep-alive 연결과 HTTP/2 멀티플렉싱을 재사용한다.
+    """
+
+    def __init__(self):
+        self.max_connections = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+        self.max_keepalive_connections = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+        self.keepalive_expiry = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+        self.timeout = float(os.getenv("LLM_HTTP_TIMEOUT", "30"))
+        self.connect_timeout = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "5"))
+        # HTTP/2 는 h2 패키지가 있을 때만 활성화 (httpx[http2])
+        self.http2_requested = _env_bool("LLM_HTTP2", True)
+        self.http2 = self.http2_requested and importlib.util.find_spec("h2") is not None
+        self.prewarm_enabled = _env_bool("LLM_HTTP_PREWARM", True)
+        self.prewarm_interval = float(os.getenv("LLM_HTTP_PREWARM_INTERVAL", "30"))
+        self.prewarm_urls: List[str] = [
+            u.strip() for u in os.getenv(
+                "LLM_HTTP_PREWARM_URLS", "https://generativelanguage.googleapis.com/"
+            ).split(",") if u.strip()
+        ]
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._prewarm_task: Optional[asyncio.Task] = None
+        self._started_at: Optional[float] = None
+        self._last_activity: float = 0.0
+        self._stats: Dict[str, Any] = {
+            "requests": 0,
+            "responses": 0,
+            "errors": 0,
+            "status_codes": {},
+            "prewarm_runs": 0,
+            "prewarm_failures": 0,
+            "clients_created": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # lifecycle
+    # ------------------------------------------------------------------
+    def _create_client(self) -> httpx.AsyncClient:
+        if self.http2_requested and not self.http2:
+            logger.warning("⚠️ LLM_HTTP2 requested but 'h2' is not installed, using HTTP/1.1")
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        timeout = httpx.Timeout(self.timeout, connect=self.connect_timeout)
+        self._stats["clients_created"] += 1
+        logger.info(
+            f"🔌 Creating pooled LLM HTTP client (http2={self.http2}, "
+            f"max_connections={self.max_connections}, keepalive={self.max_keepalive_connections})"
+        )
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=limits,
+            timeout=timeout,
+            event_hooks={
+                "request": [self._on_request],
+                "response": [self._on_response],
+            },
+        )
+
+    async def start(self):
+        """앱 시작 시 호출: 클라이언트 생성 및 연결 사전 예열"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        self._started_at = time.time()
+
+        if self.prewarm_enabled and self.prewarm_urls:
+            await self.prewarm()
+            if self._prewarm_task is None or self._prewarm_task.done():
+                self._prewarm_task = asyncio.create_task(self._prewarm_loop())
+
+    async def close(self):
+        """앱 종료 시 호출: 예열 태스크 중단 및 연결 정리"""
+        if self._prewarm_task is not None:
+            self._prewarm_task.cancel()
+            try:
+                await self._prewarm_task
+            except asyncio.CancelledError:
+                pass
+            self._prewarm_task = None
+
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("🔌 Pooled LLM HTTP client closed")
+        self._client = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """공유 클라이언트 반환 (lifespan 밖에서 호출되면 지연 생성)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    # ------------------------------------------------------------------
+    # pre-warming
+    # ------------------------------------------------------------------
+    async def prewarm(self):
+        """프로바이더 오리진에 가벼운 HEAD 요청을 보내 TLS 연결을 미리 열어둔다"""
+        client = self.get_client()
+        origins = []
+        for url in self.prewarm_urls:
+            parts = urlsplit(url)
+            origins.append(f"{parts.scheme}://{parts.netloc}/")
+
+        async def _warm(origin: str):
+            try:
+                await client.head(origin, timeout=self.connect_timeout)
+            except Exception as e:
+                self._stats["prewarm_failures"] += 1
+                logger.debug(f"Prewarm failed for {origin}: {e}")
+
+        self._stats["prewarm_runs"] += 1
+        await asyncio.gather(*[_warm(o) for o in origins])
+
+    async def _prewarm_loop(self):
+        """유휴 상태가 keep-alive 만료에 가까워지면 연결을 다시 예열"""
+        while True:
+            await asyncio.sleep(self.prewarm_interval)
+            idle_for = time.time() - self._last_activity
+            if idle_for >= min(self.prewarm_interval, self.keepalive_expiry * 0.8):
+                await self.prewarm()
+
+    # ------------------------------------------------------------------
+    # stats
+    # ------------------------------------------------------------------
+    async def _on_request(self, request: httpx.Request):
+        self._stats["requests"] += 1
+        self._last_activity = time.time()
+
+    async def _on_response(self, response: httpx.Response):
+        self._stats["responses"] += 1
+        code = str(response.status_code)
+        self._stats["status_codes"][code] = self._stats["status_codes"].get(code, 0) + 1
+        if response.status_code >= 500:
+            self._stats["errors"] += 1
+        self._last_activity = time.time()
+
+    def _connection_stats(self) -> Dict[str, Any]:
+        # httpcore 내부 풀 상태 (비공개 API 이므로 실패해도 무시)
+        try:
+            pool = self._client._transport._pool  # type: ignore[union-attr]
+            connections = list(pool.connections)
+            return {
+                "open": len(connections),
+                "idle": sum(1 for c in connections if c.is_idle()),
+                "http2": sum(1 for c in connections if "HTTP/2" in repr(c)),
+            }
+        except Exception:
+            return {}
+
+    def stats(self) -> Dict[str, Any]:
+        """모니터링용 풀 통계"""
+        return {
+            "active": self._client is not None and not self._client.is_closed,
+            "http2": self.http2,
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive_connections,
+                "keepalive_expiry": self.keepalive_expiry,
+            },
+            "prewarm": {
+                "enabled": self.prewarm_enabled,
+                "interval": self.prewarm_interval,
+                "urls": self.prewarm_urls,
+            },
+            "uptime_seconds": round(time.time() - self._started_at, 1) if self._started_at else None,
+            "idle_seconds": round(time.time() - self._last_activity, 1) if self._last_activity else None,
+            "connections": self._connection_stats() if self._client is not None else {},
+            **{k: (dict(v) if isinstance(v, dict) else v) for k, v in self._stats.items()},
+        }
+
+
+# 전역 HTTP 클라이언트 풀 인스턴스
+llm_http_pool = LLMHTTPClientPool()
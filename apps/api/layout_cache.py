@@ -0,0 +1,107 @@
+# apps/api/layout_cache.py
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from database import db
+from diagram_layout import FORCE, LAYERED, layout_engine
+from diagram_parser import DiagramGraph, DiagramParseError, parse_diagram
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+
+def structure_hash(graph: DiagramGraph, algorithm: str) -> str:
+    """레이아웃에 영향을 주는 구조(노드 ID, 엣지, layered 면 방향)와 알고리즘의 해시
+
+    라벨/모양만 바뀐 버전은 같은 해시가 되어 좌표를 그대로 재사용한다.
+    """
+    return graph.structure_hash(f"layout:{algorithm}", include_direction=algorithm == LAYERED)
+
+
+def _edge_set(graph: DiagramGraph) -> Set[Tuple[str, str]]:
+    return {(edge.source, edge.target) for edge in graph.edges if edge.source != edge.target}
+
+
+class IncrementalLayoutCache:
+    """TaskVersion 레이아웃의 구조 해시 캐시 + 증분 재배치
+
+    1) 같은 구조 해시의 좌표가 layout_cache 테이블에 있으면 그대로 반환
+    2) 없으면 직전 버전(root_id 또는 바로 앞 버전)의 좌표를 찾아 새 노드만 배치하고 국소 완화
+       (force 레이아웃만 해당, layered 는 전체 계산)
+    3) 직전 좌표도 없으면 전체 레이아웃
+    계산한 좌표는 다시 구조 해시로 저장해 다음 버전의 기준이 된다.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("LAYOUT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+        self._stats = {"requests": 0, "hits": 0, "incremental": 0, "full": 0, "save_failures": 0}
+
+    async def _previous_positions(self, version, algorithm: str) -> Tuple[Optional[Dict[str, Tuple[float, float]]], Optional[Set[Tuple[str, str]]]]:
+        previous = await db.get_previous_task_version(version)
+        if previous is None:
+            return None, None
+        try:
+            graph = await asyncio.to_thread(parse_diagram, previous.code, previous.engine)
+        except DiagramParseError:
+            return None, None
+        entry = await db.get_layout_cache(structure_hash(graph, algorithm))
+        if entry is None:
+            return None, None
+        return {node_id: (xy[0], xy[1]) for node_id, xy in entry.positions.items()}, _edge_set(graph)
+
+    async def layout_version(self, version, algorithm: str = FORCE) -> Dict[str, Any]:
+        """버전 코드의 노드 좌표 → {structure_hash, cached, positions, layout}
+
+        해석할 수 없는 코드는 DiagramParseError
+        """
+        self._stats["requests"] += 1
+        graph = await asyncio.to_thread(parse_diagram, version.code, version.engine)
+        key = structure_hash(graph, algorithm)
+
+        if self.enabled:
+            entry = await db.get_layout_cache(key)
+            if entry is not None:
+                self._stats["hits"] += 1
+                return {
+                    "structure_hash": key,
+                    "cached": True,
+                    "positions": entry.positions,
+                    "layout": {"algorithm": entry.algorithm, "nodes": entry.node_count},
+                }
+
+        previous, previous_edges = (None, None)
+        if self.enabled and algorithm == FORCE:
+            previous, previous_edges = await self._previous_positions(version, algorithm)
+
+        if previous:
+            positions, stats = await asyncio.to_thread(layout_engine.incremental, graph, previous, previous_edges)
+        elif algorithm == FORCE:
+            positions, stats = await asyncio.to_thread(layout_engine.force, graph)
+        else:
+            positions, stats = await asyncio.to_thread(layout_engine.layered, graph)
+        self._stats["incremental" if stats.get("incremental") else "full"] += 1
+
+        stored = {node_id: [x, y] for node_id, (x, y) in positions.items()}
+        if self.enabled:
+            try:
+                await db.save_layout_cache(key, algorithm, stored)
+            except Exception as e:
+                # 동시 저장 경합 등은 다음 요청에서 다시 계산하면 되므로 응답은 그대로 반환
+                self._stats["save_failures"] += 1
+                logger.warning(f"Failed to store layout cache entry {key[:12]}: {e}")
+        return {"structure_hash": key, "cached": False, "positions": stored, "layout": stats}
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self._stats["requests"]
+        return {
+            "enabled": self.enabled,
+            "hit_rate": round(self._stats["hits"] / requests, 4) if requests else 0.0,
+            **self._stats,
+        }
+
+
+# 전역 증분 레이아웃 캐시
+layout_cache = IncrementalLayoutCache()
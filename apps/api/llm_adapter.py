@@ -1,32 +1,212 @@
 # apps/api/llm_adapter.py
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator, List, Tuple
+import asyncio
 import httpx
+import json
 import logging
 import os
+import time
 from dotenv import load_dotenv
+from http_client_pool import llm_http_pool
+from circuit_breaker import model_breakers
+from hedging import hedge_policy
+from gemini_context_cache import gemini_context_cache
+from output_budget import output_budget, STOP_SEQUENCES
+from mermaid_repair import mermaid_repairer
+from diagram_parser import graph_metrics
+from concurrency_limiter import (
+    AdaptiveConcurrencyLimiter, LLMOverloadedError, get_concurrency_limiter, parse_retry_after,
+    SUCCESS, DROPPED, IGNORE
+)
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# 시스템 프롬프트 버전: 프롬프트 내용을 바꾸면 반드시 올려서 캐시 키가 갱신되도록 한다
+SYSTEM_PROMPT_VERSION = "2025-10-01"
+
+SYSTEM_PROMPT_TEMPLATE = """
+### # ROLE
+
+당신은 사용자의 요청을 분석하여 최적의 다이어그램을 생성하는 **지능형 다이어그램 에이전트**입니다. 당신의 임무는 요청의 복잡성과 유형을 판단하여 **Mermaid.js** 또는 **Viz.js(DOT 언어)** 중 가장 적합한 도구를 선택하고, 해당 도구의 문법에 맞춰 완벽한 코드를 생성하는 것입니다.
+
+---
+
+### # WORKFLOW (작업 흐름) 🧠
+
+1.  **요청 분석**: 사용자의 요청이 **단순한 프로세스/흐름**인지, 아니면 **복잡한 네트워크/구조**인지 먼저 분석합니다.
+2.  **코드 생성**: 선택한 도구의 **[규칙]**을 엄격하게 준수하여 코드를 생성합니다. 최종 결과물은 **코드 블록만** 출력해야 합니다.
+
+---
+
+### # TOOL SELECTION GUIDELINES (도구 선택 가이드라인) ⚙️
+
+#### ✅ Mermaid.js (기본 도구)를 선택하는 경우:
+
+* **플로우 차트, 시퀀스 다이어그램, 간트 차트, 클래스 다이어그램** 등 표준적인 다이어그램을 요청할 때.
+* 노드의 개수가 적고 관계가 비교적 단순하여 **수동으로 레이아웃을 제어**하는 것이 더 나을 때.
+* 사용자의 요청이 명확한 **순서나 절차**를 가지고 있을 때.
+
+
+---
+### # RULES (규칙)
+
+#### 1. Mermaid.js 규칙 (기본)
+
+* 다이어그램 방향은 위에서 아래(`graph TD`)를 기본으로 하나 사용자가 방향을 제시하면 그 방향에 맞춰야 합니다.
+* 모든 사각형 텍스트 노드는 `["텍스트"]` 형태를 사용합니다. 예: `A["사용자 요청 처리"]`
+* 결정/조건 노드는 중괄호 `{{}}`를 사용합니다. 예: `B{{조건 충족?}}`
+* 노드 ID는 고유해야 합니다.
+
+### # REQUEST
+
+ {prompt}"""
+
+
+_REQUEST_SECTION = "### # REQUEST"
+
+# 요청과 무관한 정적 접두부 (ROLE/WORKFLOW/RULES): 프로바이더 측 프롬프트 캐시 대상
+SYSTEM_PROMPT_PREFIX = SYSTEM_PROMPT_TEMPLATE.split(_REQUEST_SECTION)[0].format()
+
+
+def build_system_prompt(prompt: str) -> str:
+    """사용자 프롬프트를 포함한 전체 시스템 프롬프트 생성"""
+    return SYSTEM_PROMPT_TEMPLATE.format(prompt=prompt)
+
+
+def build_request_prompt(prompt: str) -> str:
+    """정적 접두부 뒤에 붙는 요청 부분 (SYSTEM_PROMPT_PREFIX + 이 값 == 전체 시스템 프롬프트)"""
+    return f"{_REQUEST_SECTION}\n\n {prompt}"
+
+
+def looks_like_mermaid(s: str) -> bool:
+    """Mermaid 다이어그램 선언 토큰 포함 여부"""
+    tokens = [
+        'graph ', 'flowchart', 'sequenceDiagram', 'classDiagram', 'stateDiagram',
+        'erDiagram', 'gantt', 'journey', 'pie'
+    ]
+    return any(tok in s for tok in tokens)
+
+
+def looks_like_visjs_json(s: str) -> bool:
+    """nodes/edges 를 가진 vis.js JSON 여부"""
+    try:
+        obj = json.loads(s)
+        return isinstance(obj, dict) and ('nodes' in obj or 'edges' in obj)
+    except Exception:
+        return False
+
+
 class LLMAdapter(ABC):
     """LLM 어댑터 추상 베이스 클래스"""
 
+    # 결과 metadata.provider 에 기록되는 이름
+    provider_name = "base"
+
     @abstractmethod
     async def generate_diagram_code(self, prompt: str, engine: str = 'mermaid') -> Dict[str, Any]:
         """프롬프트로부터 다이어그램 코드 생성"""
         pass
 
+    async def stream_diagram_code(self, prompt: str, engine: str = 'mermaid',
+                                  fallback_to_mock: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """다이어그램 코드 스트리밍 생성
+
+        이벤트 형식:
+          {"type": "progress", "stage": ...}  진행 상황
+          {"type": "chunk", "text": ...}      부분 응답 텍스트
+          {"type": "result", "result": {...}} generate_diagram_code 와 동일한 최종 결과
+        fallback_to_mock=False 면 실패 시 Mock 청크를 내보내지 않고 실패 결과만 전달한다 (폴백은 호출자 담당).
+        기본 구현은 전체 생성 후 한 번에 전달한다.
+        """
+        result = await self.generate_diagram_code(prompt, engine)
+        metadata = result.get('metadata') or {}
+        if not fallback_to_mock and metadata.get('fallback'):
+            result = {"success": False, "error": metadata.get('fallback_reason') or "fallback result", "engine": engine}
+        if result.get('success'):
+            yield {"type": "chunk", "text": result['code']}
+        yield {"type": "result", "result": result}
+
+    def _finalize(self, generated_text: str, engine: str, model_name: str) -> Dict[str, Any]:
+        """응답 텍스트에서 코드 추출 및 형식 검증 후 최종 결과 생성"""
+        try:
+            logger.info(f"📝 Generated text length: {len(generated_text)} characters")
+            logger.info(
+                f"📝 Generated text preview: {generated_text[:200]}{'...' if len(generated_text) > 200 else ''}"
+            )
+        except Exception:
+            pass
+
+        # 코드 블록에서 순수 코드 추출
+        logger.info(f"🔍 Looking for {engine} code blocks in response...")
+        if f'```{engine}' in generated_text:
+            code = generated_text.split(f'```{engine}')[1].split('```')[0].strip()
+            logger.info(f"✅ Found {engine} code block, extracted {len(code)} characters")
+        else:
+            code = generated_text.strip()
+            logger.info(f"⚠️ No {engine} code block found, using raw text ({len(code)} characters)")
+
+        # 흔한 Mermaid 문법 오류는 재생성 대신 로컬에서 수리
+        repairs: List[str] = []
+        if engine == 'mermaid':
+            code, repairs = mermaid_repairer.repair(code)
+
+        logger.info(f"📊 Final code preview: {code[:100]}{'...' if len(code) > 100 else ''}")
+
+        # 간단한 형식 검증: 부적합 시 친절한 오류로 반환하여 프론트가 안내 버블을 생성할 수 있게 함
+        if engine == 'mermaid' and not looks_like_mermaid(code):
+            return {
+                'success': False,
+                'error': "No diagram code detected for Mermaid. Please provide or request a Mermaid flowchart/sequence/class/state diagram code.",
+                'engine': engine,
+            }
+        if engine == 'visjs' and not looks_like_visjs_json(code):
+            return {
+                'success': False,
+                'error': "No valid vis.js JSON detected. Please request a vis.js JSON with 'nodes' and 'edges'.",
+                'engine': engine,
+            }
+
+        # 최종 성공 반환 (사용된 모델 기록)
+        self.model = model_name
+        return {
+            "success": True,
+            "engine": engine,
+            "code": code,
+            "metadata": {
+                "provider": self.provider_name,
+                "model": model_name,
+                "raw_response": generated_text,
+                "response_tokens": len(generated_text.split()),
+                "repairs": repairs,
+                "graph": graph_metrics(code, engine),
+            }
+        }
+
+    def _record_budget(self, result: Dict[str, Any], engine: str, prompt: str,
+                       budget: int, finish_reason: Optional[str], output_tokens: int) -> Dict[str, Any]:
+        """출력 토큰 관측 기록 및 결과 metadata 에 예산 정보 추가 (잘린 응답은 observe_truncation 으로 이미 기록)"""
+        if finish_reason != "MAX_TOKENS":
+            output_budget.observe(engine, prompt, output_tokens)
+        if result.get("success"):
+            result["metadata"].update({
+                "output_tokens": output_tokens or None,
+                "output_budget": budget,
+                "finish_reason": finish_reason,
+            })
+        return result
+
 
 class MockLLMAdapter(LLMAdapter):
     """개발용 Mock LLM 어댑터"""
 
-    async def generate_diagram_code(self, prompt: str, engine: str = 'mermaid') -> Dict[str, Any]:
-        """Mock 다이어그램 코드 생성"""
-        logger.info(f"🎭 Mock LLM: Generating {engine} code")
-        logger.info(f"   - Prompt length: {len(prompt)} characters")
-        logger.info(f"   - Prompt preview: {prompt[:100]}{'...' if len(prompt) > 100 else ''}")
+    provider_name = "mock"
+
+    # 스트리밍 시 청크 사이 지연(초)
+    stream_delay = 0.05
 
+    def _mock_code(self, prompt: str, engine: str) -> str:
         if engine == 'mermaid':
             mock_code = """graph TD
     A[사용자 프롬프트] --> B(LLM 분석)
@@ -54,9 +234,9 @@ class MockLLMAdapter(LLMAdapter):
         else:
             mock_code = f"// {engine} 엔진으로 생성된 다이어그램\n// 프롬프트: {prompt}"
             logger.info(f"✅ Mock generated generic code ({len(mock_code)} characters)")
+        return mock_code
 
-        logger.info(f"📊 Mock code preview: {mock_code[:100]}{'...' if len(mock_code) > 100 else ''}")
-
+    def _mock_result(self, engine: str, mock_code: str) -> Dict[str, Any]:
         return {
             "success": True,
             "engine": engine,
@@ -64,23 +244,362 @@ class MockLLMAdapter(LLMAdapter):
             "metadata": {
                 "provider": "mock",
                 "processing_time": 0.1,
-                "node_count": 5
+                "graph": graph_metrics(mock_code, engine),
             }
         }
 
+    async def generate_diagram_code(self, prompt: str, engine: str = 'mermaid') -> Dict[str, Any]:
+        """Mock 다이어그램 코드 생성"""
+        logger.info(f"🎭 Mock LLM: Generating {engine} code")
+        logger.info(f"   - Prompt length: {len(prompt)} characters")
+        logger.info(f"   - Prompt preview: {prompt[:100]}{'...' if len(prompt) > 100 else ''}")
+
+        mock_code = self._mock_code(prompt, engine)
+
+        logger.info(f"📊 Mock code preview: {mock_code[:100]}{'...' if len(mock_code) > 100 else ''}")
+
+        return self._mock_result(engine, mock_code)
+
+    async def stream_diagram_code(self, prompt: str, engine: str = 'mermaid',
+                                  fallback_to_mock: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Mock 다이어그램 코드를 줄 단위 청크로 스트리밍"""
+        logger.info(f"🎭 Mock LLM: Streaming {engine} code")
+        yield {"type": "progress", "stage": "generating", "provider": "mock"}
+
+        mock_code = self._mock_code(prompt, engine)
+        for line in mock_code.splitlines(keepends=True):
+            await asyncio.sleep(self.stream_delay)
+            yield {"type": "chunk", "text": line}
+
+        yield {"type": "result", "result": self._mock_result(engine, mock_code)}
+
 
 class GeminiAdapter(LLMAdapter):
     """Google Gemini API 어댑터"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    provider_name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None):
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        # 주입된 클라이언트가 없으면 앱 수명 동안 공유되는 풀 클라이언트 사용
+        self._http_client = http_client
+        # 로컬 스텁 서버(llm_stub_server.py) 등으로 바꿀 수 있도록 환경 변수로 설정
+        self.base_url = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
         # 최신 모델 우선 순위로 시도, 미존재(404) 시 다음 모델로 폴백
         self.candidate_models = [
             "gemini-2.5-flash",
             "gemini-2.5-pro"
         ]
         self.model = self.candidate_models[0]  # 로그용 기본 모델 이름
+        # 2.5 모델의 사고 토큰 예산 (0 = 사고 끔, pro 는 끌 수 없어 최소 128). maxOutputTokens 에 더해 요청한다
+        self.thinking_budget = max(0, int(os.getenv("GEMINI_THINKING_BUDGET", "0")))
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._http_client or llm_http_pool.get_client()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _thinking_budget(self, model_name: Optional[str]) -> Optional[int]:
+        """thinking 모델이면 명시할 thinkingBudget, 아니면 None"""
+        if not model_name or not model_name.startswith("gemini-2.5"):
+            return None
+        if "pro" in model_name:
+            return max(128, self.thinking_budget)
+        return self.thinking_budget
+
+    def _build_payload(self, prompt: str, cached_content: Optional[str] = None,
+                       max_output_tokens: int = 2048, model_name: Optional[str] = None) -> Dict[str, Any]:
+        # 캐시된 정적 접두부가 있으면 요청 부분만 전송
+        text = build_request_prompt(prompt) if cached_content else build_system_prompt(prompt)
+
+        logger.info(f"📝 {'Request' if cached_content else 'System'} prompt length: {len(text)} characters")
+        logger.info(f"📝 User prompt: {prompt}")
+
+        payload = {
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": [{"text": text}],
+                }
+            ],
+            "generationConfig": {
+                "temperature": 0.3,
+                "maxOutputTokens": max_output_tokens,
+                # 닫는 코드 펜스에서 바로 종료 (이후 설명 문장 생성 방지)
+                "stopSequences": STOP_SEQUENCES,
+            },
+        }
+        # thinking 모델은 사고 토큰도 maxOutputTokens 에서 쓰므로 사고 예산을 명시하고 그만큼 더해
+        # 작은 예산이 사고에 모두 소모되어 응답이 비거나 잘리지 않게 한다
+        thinking_budget = self._thinking_budget(model_name)
+        if thinking_budget is not None:
+            payload["generationConfig"]["thinkingConfig"] = {"thinkingBudget": thinking_budget}
+            payload["generationConfig"]["maxOutputTokens"] = max_output_tokens + thinking_budget
+        if cached_content:
+            payload["cachedContent"] = cached_content
+        return payload
+
+    async def _context_cache_handle(self, model_name: str) -> Optional[str]:
+        return await gemini_context_cache.get_handle(
+            self.client, self.base_url, self.api_key, model_name, SYSTEM_PROMPT_VERSION, SYSTEM_PROMPT_PREFIX
+        )
+
+    @staticmethod
+    def _context_cache_rejected(cached_content: Optional[str], status_code: int) -> bool:
+        """캐시 핸들 문제(만료/삭제/권한)로 보이는 오류인지"""
+        return bool(cached_content) and status_code in (400, 403, 404)
+
+    @staticmethod
+    def _usage(result: Dict[str, Any]) -> Tuple[Optional[str], int]:
+        """(finishReason, 응답 출력 토큰 수)
+
+        사고 토큰(thoughtsTokenCount)은 빼고 센다: 출력 예산 이력은 응답 토큰 기준이고
+        사고 예산은 _build_payload 가 따로 더한다.
+        """
+        candidates = result.get("candidates") or [{}]
+        usage = result.get("usageMetadata") or {}
+        return (candidates[0] or {}).get("finishReason"), usage.get("candidatesTokenCount") or 0
+
+    @staticmethod
+    def _extract_text(result: Dict[str, Any]) -> str:
+        """generateContent 응답(또는 스트림 청크)에서 텍스트 추출"""
+        candidates = result.get("candidates") or []
+        if not candidates:
+            return ""
+
+        cand0 = candidates[0] or {}
+        generated_text = ""
+
+        try:
+            content = cand0.get("content") or {}
+            parts = content.get("parts")
+            if isinstance(parts, list) and parts:
+                generated_text = "".join((p or {}).get("text") or "" for p in parts)
+        except Exception:
+            # fallthrough to other shapes
+            pass
+
+        if not generated_text:
+            # other possible shapes seen in some responses
+            generated_text = (
+                cand0.get("text")
+                or result.get("text")
+                or ("\n".join(cand0.get("output", [])) if isinstance(cand0.get("output"), list) else cand0.get("output", ""))
+            )
+        return generated_text or ""
+
+    async def _call_model(self, model_name: str, prompt: str, engine: str, use_context_cache: bool = True,
+                          max_output_tokens: Optional[int] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """단일 모델 호출
+
+        (최종 결과, None) 또는 다음 후보 모델로 넘어가야 할 때 (None, 오류 메시지) 를 반환한다.
+        호출 결과는 모델별 서킷 브레이커에 기록된다. 컨텍스트 캐시 핸들이 거부되면 전체 프롬프트로 한 번 재시도하고,
+        출력 예산 부족(MAX_TOKENS)으로 잘리면 예산을 두 배로 늘려 같은 모델로 재시도한다.
+        """
+        breaker = model_breakers.get(model_name)
+        url = f"{self.base_url}/models/{model_name}:generateContent?key={self.api_key}"
+        logger.info(f"🌐 Trying model: {model_name}")
+        logger.info(f"🌐 API URL: {url.replace(self.api_key, '[API_KEY]')}")
+
+        cached_content = await self._context_cache_handle(model_name) if use_context_cache else None
+        budget = max_output_tokens or output_budget.estimate(engine, prompt)
+        payload = self._build_payload(prompt, cached_content, budget, model_name)
+        logger.info(f"📏 maxOutputTokens: {budget}")
+
+        # 프로바이더 동시성 한도 확보 (대기열 초과 시 LLMOverloadedError, 받아 둔 시험 호출 슬롯은 반환)
+        limiter = get_concurrency_limiter("gemini")
+        try:
+            await limiter.acquire()
+        except LLMOverloadedError:
+            breaker.release_trial()
+            raise
+
+        logger.info("📡 Sending request to Gemini API...")
+        started = time.monotonic()
+        try:
+            response = await self.client.post(url, json=payload)
+        except httpx.HTTPError as e:
+            error = f"{type(e).__name__}: {e}"
+            limiter.release(DROPPED if isinstance(e, httpx.TimeoutException) else IGNORE)
+            breaker.record_failure(time.monotonic() - started, error)
+            logger.error(f"💥 Gemini request error with model {model_name}: {error}")
+            return None, error
+        except BaseException:
+            limiter.release(IGNORE)
+            raise
+        latency = time.monotonic() - started
+        limiter.release(self._limiter_outcome(limiter, response))
+
+        logger.info(f"📡 Response status: {response.status_code} ({latency:.2f}s)")
+        logger.info(f"📡 Response headers: {dict(response.headers)}")
+
+        if response.status_code == 200:
+            result = response.json()
+            try:
+                logger.info(f"📦 Raw API response keys: {list(result.keys())}")
+            except Exception:
+                pass
+
+            if not result.get("candidates"):
+                error = "No candidates in API response"
+                breaker.record_failure(latency, error)
+                logger.warning(f"❌ {error}: {result}")
+                return None, error
+
+            finish_reason, output_tokens = self._usage(result)
+            if finish_reason == "MAX_TOKENS":
+                # 예산 부족은 모델 장애가 아님: 예산을 늘려 재시도
+                breaker.record_success(latency)
+                output_budget.observe_truncation(engine, prompt, budget)
+                retry_budget = output_budget.next_budget(budget)
+                if retry_budget:
+                    logger.warning(f"✂️ Output truncated at {budget} tokens ({model_name}), retrying with {retry_budget}")
+                    return await self._call_model(model_name, prompt, engine, use_context_cache, retry_budget)
+
+            generated_text = self._extract_text(result)
+            if not generated_text:
+                error = "No text content in candidates"
+                breaker.record_failure(latency, error)
+                logger.warning(f"❌ {error}: {result['candidates'][0]}")
+                return None, error
+
+            # 형식 검증 실패는 모델 장애가 아니므로 성공으로 기록
+            if finish_reason != "MAX_TOKENS":
+                breaker.record_success(latency)
+            hedge_policy.observe(model_name, latency)
+            finalized = self._finalize(generated_text, engine, model_name)
+            return self._record_budget(finalized, engine, prompt, budget, finish_reason, output_tokens), None
+
+        if self._context_cache_rejected(cached_content, response.status_code):
+            logger.warning(f"⚠️ Context cache rejected by {model_name} ({response.status_code}), retrying inline")
+            gemini_context_cache.invalidate(model_name, SYSTEM_PROMPT_VERSION)
+            return await self._call_model(model_name, prompt, engine, False, max_output_tokens)
+
+        # 비정상 상태 코드 처리: 404 포함 모든 오류는 다음 후보 모델로 폴백
+        error = f"API error: {response.status_code}"
+        breaker.record_failure(latency, error)
+        logger.error(f"❌ Gemini API error with model {model_name}: {response.status_code}")
+        logger.error(f"❌ Response text: {response.text}")
+        if response.status_code == 404:
+            logger.warning("⚠️ Model not found, trying next candidate model...")
+        return None, error
+
+    @staticmethod
+    def _limiter_outcome(limiter: AdaptiveConcurrencyLimiter, response: httpx.Response) -> str:
+        """응답 상태를 동시성 제한기 결과로 변환하고 Retry-After 를 반영"""
+        if response.status_code in (429, 503):
+            limiter.on_retry_after(parse_retry_after(response.headers.get("retry-after")))
+            return DROPPED
+        if response.status_code == 200:
+            return SUCCESS
+        return IGNORE
+
+    async def _probe_model(self, model_name: str) -> bool:
+        """서킷 브레이커 백그라운드 프로브: 토큰을 쓰지 않는 모델 메타데이터 조회"""
+        url = f"{self.base_url}/models/{model_name}?key={self.api_key}"
+        response = await self.client.get(url, timeout=5.0)
+        return response.status_code == 200
+
+    def _admit(self, model_name: str) -> bool:
+        """모델 서킷 브레이커가 호출을 허용하는지 확인 (open 모델은 백그라운드 프로브 대상으로 등록)"""
+        model_breakers.set_probe(model_name, lambda m=model_name: self._probe_model(m))
+        if model_breakers.get(model_name).allow_request():
+            return True
+        logger.warning(f"⏭️ Skipping model {model_name}: circuit open")
+        return False
+
+    async def _generate_hedged(self, prompt: str, engine: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """헤지 모드 생성
+
+        1차 모델이 지연 임계값 안에 끝나지 않으면 다음 후보 모델에 두 번째 요청을 보내고,
+        유효한 코드를 먼저 돌려준 쪽을 채택한 뒤 나머지 요청은 취소한다.
+        """
+        models = iter(self.candidate_models)
+
+        def next_model() -> Optional[str]:
+            for m in models:
+                if self._admit(m):
+                    return m
+            return None
+
+        hedge_policy.record("requests")
+        tasks: Dict[asyncio.Task, Tuple[str, bool]] = {}
+        last_error: Optional[str] = "All candidate models are circuit-open"
+        invalid_result: Optional[Dict[str, Any]] = None
+        hedge_launched = False
+
+        primary = next_model()
+        if primary is None:
+            return None, last_error
+        tasks[asyncio.create_task(self._call_model(primary, prompt, engine))] = (primary, False)
+        delay = hedge_policy.delay_for(primary)
+
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks.keys(),
+                    timeout=None if hedge_launched else delay,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    # 지연 임계값 초과: 다음 후보 모델로 헤지 요청
+                    hedge_launched = True
+                    backup = next_model()
+                    if backup is not None:
+                        hedge_policy.record("hedges_launched")
+                        logger.info(f"🪂 Hedging {tasks[next(iter(tasks))][0]} after {delay:.2f}s with {backup}")
+                        tasks[asyncio.create_task(self._call_model(backup, prompt, engine))] = (backup, True)
+                    continue
+
+                for task in done:
+                    model_name, is_hedge = tasks.pop(task)
+                    try:
+                        result, error = task.result()
+                    except LLMOverloadedError as e:
+                        # 다른 요청이 진행 중이면 그 결과를 기다린다
+                        if not tasks:
+                            raise
+                        result, error = None, str(e)
+                    if result is not None and result.get("success"):
+                        hedge_policy.record("hedge_wins" if is_hedge else "primary_wins")
+                        result["metadata"] = {
+                            **result.get("metadata", {}),
+                            "hedged": hedge_launched,
+                            "hedge_winner": is_hedge,
+                        }
+                        return result, None
+                    if result is not None:
+                        # 형식 검증 실패: 진행 중인 다른 요청이 없으면 그대로 반환
+                        invalid_result = result
+                    else:
+                        last_error = error
+
+                if not tasks:
+                    if invalid_result is not None:
+                        return invalid_result, None
+                    # 진행 중인 요청이 모두 실패: 다음 모델을 새 1차 요청으로 시작
+                    following = next_model()
+                    if following is not None:
+                        hedge_launched = False
+                        delay = hedge_policy.delay_for(following)
+                        tasks[asyncio.create_task(self._call_model(following, prompt, engine))] = (following, False)
+        finally:
+            for task in tasks:
+                task.cancel()
+                hedge_policy.record("losers_cancelled")
+
+        hedge_policy.record("all_failed")
+        return None, last_error
+
+    async def _fallback_to_mock(self, prompt: str, engine: str, reason: Optional[str]) -> Dict[str, Any]:
+        logger.warning(f"⚠️ All candidate models failed. Falling back to Mock. last_error={reason}")
+        result = await MockLLMAdapter().generate_diagram_code(prompt, engine)
+        result["metadata"] = {**result.get("metadata", {}), "fallback": True, "fallback_reason": reason}
+        return result
 
     async def generate_diagram_code(self, prompt: str, engine: str = 'mermaid') -> Dict[str, Any]:
         """Gemini API를 사용한 다이어그램 코드 생성"""
@@ -95,194 +614,27 @@ class GeminiAdapter(LLMAdapter):
             return await mock_adapter.generate_diagram_code(prompt, engine)
 
         try:
-            last_error: Optional[str] = None
-
-            for model_name in self.candidate_models:
-                url = f"{self.base_url}/models/{model_name}:generateContent?key={self.api_key}"
-                logger.info(f"🌐 Trying model: {model_name}")
-                logger.info(f"🌐 API URL: {url.replace(self.api_key, '[API_KEY]')}")
-
-                system_prompt = f"""
-### # ROLE
-
-당신은 사용자의 요청을 분석하여 최적의 다이어그램을 생성하는 **지능형 다이어그램 에이전트**입니다. 당신의 임무는 요청의 복잡성과 유형을 판단하여 **Mermaid.js** 또는 **Viz.js(DOT 언어)** 중 가장 적합한 도구를 선택하고, 해당 도구의 문법에 맞춰 완벽한 코드를 생성하는 것입니다.
-
----
-
-### # WORKFLOW (작업 흐름) 🧠
-
-1.  **요청 분석**: 사용자의 요청이 **단순한 프로세스/흐름**인지, 아니면 **복잡한 네트워크/구조**인지 먼저 분석합니다.
-2.  **코드 생성**: 선택한 도구의 **[규칙]**을 엄격하게 준수하여 코드를 생성합니다. 최종 결과물은 **코드 블록만** 출력해야 합니다.
-
----
-
-### # TOOL SELECTION GUIDELINES (도구 선택 가이드라인) ⚙️
-
-#### ✅ Mermaid.js (기본 도구)를 선택하는 경우:
-
-* **플로우 차트, 시퀀스 다이어그램, 간트 차트, 클래스 다이어그램** 등 표준적인 다이어그램을 요청할 때.
-* 노드의 개수가 적고 관계가 비교적 단순하여 **수동으로 레이아웃을 제어**하는 것이 더 나을 때.
-* 사용자의 요청이 명확한 **순서나 절차**를 가지고 있을 때.
-
-
----
-### # RULES (규칙)
-
-#### 1. Mermaid.js 규칙 (기본)
-
-* 다이어그램 방향은 위에서 아래(`graph TD`)를 기본으로 하나 사용자가 방향을 제시하면 그 방향에 맞춰야 합니다.
-* 모든 사각형 텍스트 노드는 `["텍스트"]` 형태를 사용합니다. 예: `A["사용자 요청 처리"]`
-* 결정/조건 노드는 중괄호 `{{}}`를 사용합니다. 예: `B{{조건 충족?}}`
-* 노드 ID는 고유해야 합니다.
-
-### # REQUEST
-
- {prompt}"""
-
-                logger.info(f"📝 System prompt length: {len(system_prompt)} characters")
-                logger.info(f"📝 User prompt: {prompt}")
-
-                payload = {
-                    "contents": [
-                        {
-                            "role": "user",
-                            "parts": [{"text": system_prompt}],
-                        }
-                    ],
-                    "generationConfig": {
-                        "temperature": 0.3,
-                        "maxOutputTokens": 2048,
-                    },
-                }
-
-                logger.info("📡 Sending request to Gemini API...")
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(url, json=payload)
-
-                logger.info(f"📡 Response status: {response.status_code}")
-                logger.info(f"📡 Response headers: {dict(response.headers)}")
-
-                if response.status_code == 200:
-                    result = response.json()
-                    try:
-                        logger.info(f"📦 Raw API response keys: {list(result.keys())}")
-                    except Exception:
-                        pass
-
-                    candidates = result.get("candidates") or []
-                    if not candidates:
-                        last_error = "No candidates in API response"
-                        logger.warning(f"❌ {last_error}: {result}")
-                        # Try next candidate model
+            if hedge_policy.enabled:
+                result, last_error = await self._generate_hedged(prompt, engine)
+                if result is not None:
+                    return result
+            else:
+                last_error = "All candidate models are circuit-open"
+
+                for model_name in self.candidate_models:
+                    if not self._admit(model_name):
                         continue
-
-                    cand0 = candidates[0] or {}
-                    generated_text = ""
-
-                    try:
-                        content = cand0.get("content") or {}
-                        parts = content.get("parts")
-                        if isinstance(parts, list) and parts:
-                            first_part = parts[0] or {}
-                            generated_text = first_part.get("text") or ""
-                    except Exception:
-                        # fallthrough to other shapes
-                        pass
-
-                    if not generated_text:
-                        # other possible shapes seen in some responses
-                        generated_text = (
-                            cand0.get("text")
-                            or result.get("text")
-                            or ("\n".join(cand0.get("output", [])) if isinstance(cand0.get("output"), list) else cand0.get("output", ""))
-                        )
-
-                    if not generated_text:
-                        last_error = "No text content in candidates"
-                        logger.warning(f"❌ {last_error}: {cand0}")
-                        # Try next candidate model
-                        continue
-
-                    try:
-                        logger.info(f"📝 Generated text length: {len(generated_text)} characters")
-                        logger.info(
-                            f"📝 Generated text preview: {generated_text[:200]}{'...' if len(generated_text) > 200 else ''}"
-                        )
-                    except Exception:
-                        pass
-
-                    # 코드 블록에서 순수 코드 추출
-                    logger.info(f"🔍 Looking for {engine} code blocks in response...")
-                    if f'```{engine}' in generated_text:
-                        code = generated_text.split(f'```{engine}')[1].split('```')[0].strip()
-                        logger.info(f"✅ Found {engine} code block, extracted {len(code)} characters")
-                    else:
-                        code = generated_text.strip()
-                        logger.info(f"⚠️ No {engine} code block found, using raw text ({len(code)} characters)")
-
-                    logger.info(f"📊 Final code preview: {code[:100]}{'...' if len(code) > 100 else ''}")
-
-                    # 간단한 형식 검증: 부적합 시 친절한 오류로 반환하여 프론트가 안내 버블을 생성할 수 있게 함
-                    def looks_like_mermaid(s: str) -> bool:
-                        tokens = [
-                            'graph ', 'flowchart', 'sequenceDiagram', 'classDiagram', 'stateDiagram',
-                            'erDiagram', 'gantt', 'journey', 'pie'
-                        ]
-                        return any(tok in s for tok in tokens)
-
-                    def looks_like_visjs_json(s: str) -> bool:
-                        try:
-                            obj = __import__('json').loads(s)
-                            return isinstance(obj, dict) and ('nodes' in obj or 'edges' in obj)
-                        except Exception:
-                            return False
-
-                    if engine == 'mermaid' and not looks_like_mermaid(code):
-                        return {
-                            'success': False,
-                            'error': "No diagram code detected for Mermaid. Please provide or request a Mermaid flowchart/sequence/class/state diagram code.",
-                            'engine': engine,
-                        }
-                    if engine == 'visjs' and not looks_like_visjs_json(code):
-                        return {
-                            'success': False,
-                            'error': "No valid vis.js JSON detected. Please request a vis.js JSON with 'nodes' and 'edges'.",
-                            'engine': engine,
-                        }
-
-                    # 최종 성공 반환 (사용된 모델 기록)
-                    self.model = model_name
-                    return {
-                        "success": True,
-                        "engine": engine,
-                        "code": code,
-                        "metadata": {
-                            "provider": "gemini",
-                            "model": model_name,
-                            "raw_response": generated_text,
-                            "response_tokens": len(generated_text.split())
-                        }
-                    }
-
-                # 비정상 상태 코드 처리
-                logger.error(f"❌ Gemini API error with model {model_name}: {response.status_code}")
-                logger.error(f"❌ Response text: {response.text}")
-
-                if response.status_code == 404:
-                    # 404면 다음 후보 모델로 폴백
-                    logger.warning("⚠️ Model not found, trying next candidate model...")
-                    continue
-                else:
-                    # 404 외 오류도 다음 모델 시도
-                    last_error = f"API error: {response.status_code}"
-                    logger.warning(last_error)
-                    continue
+                    result, error = await self._call_model(model_name, prompt, engine)
+                    if result is not None:
+                        return result
+                    last_error = error
 
             # 모든 모델이 실패한 경우: Mock으로 폴백
-            logger.warning(f"⚠️ All candidate models failed. Falling back to Mock. last_error={last_error}")
-            mock_adapter = MockLLMAdapter()
-            return await mock_adapter.generate_diagram_code(prompt, engine)
+            return await self._fallback_to_mock(prompt, engine, last_error)
 
+        except LLMOverloadedError:
+            # 부하 차단은 호출자가 503 으로 응답하도록 그대로 전달
+            raise
         except Exception as e:
             logger.error(f"💥 Gemini API error: {str(e)}", exc_info=True)
             return {
@@ -291,14 +643,313 @@ class GeminiAdapter(LLMAdapter):
                 "engine": engine
             }
 
+    async def stream_diagram_code(self, prompt: str, engine: str = 'mermaid',
+                                  fallback_to_mock: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Gemini streamGenerateContent(SSE)를 사용한 스트리밍 생성
+
+        fallback_to_mock=False 면 모든 모델이 실패했을 때 Mock 청크 대신 실패 결과를 전달한다 (RouterAdapter 용).
+        """
+        logger.info("🚀 GeminiAdapter.stream_diagram_code called")
+
+        if not self.api_key:
+            if not fallback_to_mock:
+                yield {"type": "result", "result": {"success": False, "error": "Gemini API key not found", "engine": engine}}
+                return
+            logger.warning("❌ Gemini API key not found, falling back to mock")
+            async for event in MockLLMAdapter().stream_diagram_code(prompt, engine):
+                yield event
+            return
+
+        last_error: Optional[str] = "All candidate models are circuit-open"
+
+        for model_name in self.candidate_models:
+            if not self._admit(model_name):
+                continue
+            breaker = model_breakers.get(model_name)
+            url = f"{self.base_url}/models/{model_name}:streamGenerateContent?alt=sse&key={self.api_key}"
+            logger.info(f"🌐 Streaming from model: {model_name}")
+            yield {"type": "progress", "stage": "requesting", "provider": "gemini", "model": model_name}
+
+            # 컨텍스트 캐시 핸들이 거부되면 전체 프롬프트로 같은 모델을 한 번 더 시도 (_call_model 과 동일)
+            for use_context_cache in (True, False):
+                cached_content = await self._context_cache_handle(model_name) if use_context_cache else None
+                budget = output_budget.estimate(engine, prompt)
+                payload = self._build_payload(prompt, cached_content, budget, model_name)
+                text_parts: List[str] = []
+                finish_reason: Optional[str] = None
+                output_tokens = 0
+                limiter = get_concurrency_limiter("gemini")
+                try:
+                    await limiter.acquire()
+                except LLMOverloadedError:
+                    breaker.release_trial()
+                    raise
+                outcome = IGNORE
+                started = time.monotonic()
+
+                try:
+                    async with self.client.stream("POST", url, json=payload) as response:
+                        outcome = self._limiter_outcome(limiter, response)
+                        if response.status_code != 200:
+                            body = await response.aread()
+                            last_error = f"API error: {response.status_code}"
+                            if self._context_cache_rejected(cached_content, response.status_code):
+                                # 캐시 핸들 문제는 모델 장애가 아님: 핸들을 폐기하고 전체 프롬프트로 같은 모델 재시도
+                                logger.warning(f"⚠️ Context cache rejected by {model_name} ({response.status_code}), retrying inline")
+                                gemini_context_cache.invalidate(model_name, SYSTEM_PROMPT_VERSION)
+                                continue
+                            breaker.record_failure(time.monotonic() - started, last_error)
+                            logger.warning(f"⚠️ Stream error with model {model_name}: {response.status_code} {body[:500]!r}")
+                            break
+
+                        yield {"type": "progress", "stage": "generating", "provider": "gemini", "model": model_name}
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if not data:
+                                continue
+                            try:
+                                chunk = json.loads(data)
+                            except ValueError:
+                                logger.warning(f"⚠️ Unparseable stream chunk: {data[:200]}")
+                                continue
+                            delta = self._extract_text(chunk)
+                            chunk_finish, chunk_tokens = self._usage(chunk)
+                            finish_reason = chunk_finish or finish_reason
+                            output_tokens = chunk_tokens or output_tokens
+                            if delta:
+                                text_parts.append(delta)
+                                yield {"type": "chunk", "text": delta}
+                except httpx.HTTPError as e:
+                    last_error = str(e)
+                    if isinstance(e, httpx.TimeoutException):
+                        outcome = DROPPED
+                    breaker.record_failure(time.monotonic() - started, last_error)
+                    logger.error(f"💥 Gemini stream error with model {model_name}: {e}")
+                    if text_parts:
+                        # 이미 부분 응답을 내보냈으면 다른 모델로 이어 붙일 수 없음
+                        yield {"type": "result", "result": {"success": False, "error": last_error, "engine": engine}}
+                        return
+                    break
+                finally:
+                    limiter.release(outcome)
+
+                generated_text = "".join(text_parts)
+                if not generated_text:
+                    last_error = "No text content in stream"
+                    breaker.record_failure(time.monotonic() - started, last_error)
+                    logger.warning(f"❌ {last_error} (model={model_name})")
+                    break
+
+                breaker.record_success(time.monotonic() - started)
+                if finish_reason == "MAX_TOKENS":
+                    # 이미 내보낸 청크는 되돌릴 수 없으므로 다음 요청의 예산만 늘린다
+                    output_budget.observe_truncation(engine, prompt, budget)
+                finalized = self._finalize(generated_text, engine, model_name)
+                yield {"type": "result", "result": self._record_budget(finalized, engine, prompt, budget, finish_reason, output_tokens)}
+                return
+
+        if not fallback_to_mock:
+            logger.warning(f"⚠️ All candidate models failed while streaming. last_error={last_error}")
+            yield {"type": "result", "result": {"success": False, "error": last_error, "engine": engine}}
+            return
+
+        # 모든 모델이 실패한 경우: Mock으로 폴백
+        logger.warning(f"⚠️ All candidate models failed while streaming. Falling back to Mock. last_error={last_error}")
+        async for event in MockLLMAdapter().stream_diagram_code(prompt, engine):
+            if event.get("type") == "result" and event["result"].get("success"):
+                result = event["result"]
+                result["metadata"] = {**result.get("metadata", {}), "fallback": True, "fallback_reason": last_error}
+            yield event
+
+
+class OpenAICompatibleAdapter(LLMAdapter):
+    """OpenAI 호환 chat/completions API 어댑터 (vLLM, Ollama, llama.cpp 서버 등 로컬 백엔드)
+
+    실패 시 Mock 으로 폴백하지 않고 오류를 반환한다 (백엔드 선택/폴백은 RouterAdapter 담당).
+    """
+
+    provider_name = "local"
+
+    def __init__(self, base_url: Optional[str] = None, model: Optional[str] = None,
+                 api_key: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None):
+        self.base_url = (base_url or os.getenv("LOCAL_LLM_URL", "")).rstrip("/")
+        self.model = model or os.getenv("LOCAL_LLM_MODEL", "local-model")
+        self.api_key = api_key or os.getenv("LOCAL_LLM_API_KEY")
+        self._http_client = http_client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._http_client or llm_http_pool.get_client()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.base_url)
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    def _build_payload(self, prompt: str, max_output_tokens: int, stream: bool = False) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": build_system_prompt(prompt)}],
+            "temperature": 0.3,
+            "max_tokens": max_output_tokens,
+            "stop": STOP_SEQUENCES,
+            "stream": stream,
+        }
+
+    @staticmethod
+    def _finish_reason(choice: Dict[str, Any]) -> Optional[str]:
+        # OpenAI 의 "length" 는 Gemini 의 MAX_TOKENS 와 같은 의미
+        reason = choice.get("finish_reason")
+        return "MAX_TOKENS" if reason == "length" else reason
+
+    async def generate_diagram_code(self, prompt: str, engine: str = 'mermaid') -> Dict[str, Any]:
+        """OpenAI 호환 API 를 사용한 다이어그램 코드 생성"""
+        if not self.configured:
+            return {"success": False, "error": "LOCAL_LLM_URL is not configured", "engine": engine}
+
+        breaker = model_breakers.get(f"local:{self.model}")
+        if not breaker.allow_request():
+            return {"success": False, "error": f"Circuit open for local:{self.model}", "engine": engine}
+
+        budget = output_budget.estimate(engine, prompt)
+        limiter = get_concurrency_limiter("local")
+        try:
+            await limiter.acquire()
+        except LLMOverloadedError:
+            breaker.release_trial()
+            raise
+        started = time.monotonic()
+        try:
+            response = await self.client.post(
+                f"{self.base_url}/chat/completions",
+                json=self._build_payload(prompt, budget),
+                headers=self._headers(),
+            )
+        except httpx.HTTPError as e:
+            error = f"{type(e).__name__}: {e}"
+            limiter.release(DROPPED if isinstance(e, httpx.TimeoutException) else IGNORE)
+            breaker.record_failure(time.monotonic() - started, error)
+            logger.error(f"💥 Local LLM request error ({self.model}): {error}")
+            return {"success": False, "error": error, "engine": engine}
+        except BaseException:
+            limiter.release(IGNORE)
+            raise
+        latency = time.monotonic() - started
+        limiter.release(GeminiAdapter._limiter_outcome(limiter, response))
+
+        if response.status_code != 200:
+            error = f"API error: {response.status_code}"
+            breaker.record_failure(latency, error)
+            logger.error(f"❌ Local LLM error ({self.model}): {response.status_code} {response.text[:500]}")
+            return {"success": False, "error": error, "engine": engine}
+
+        result = response.json()
+        choice = (result.get("choices") or [{}])[0] or {}
+        generated_text = ((choice.get("message") or {}).get("content")) or ""
+        if not generated_text:
+            error = "No text content in choices"
+            breaker.record_failure(latency, error)
+            return {"success": False, "error": error, "engine": engine}
+
+        breaker.record_success(latency)
+        finish_reason = self._finish_reason(choice)
+        if finish_reason == "MAX_TOKENS":
+            output_budget.observe_truncation(engine, prompt, budget)
+        output_tokens = (result.get("usage") or {}).get("completion_tokens") or 0
+        finalized = self._finalize(generated_text, engine, result.get("model") or self.model)
+        return self._record_budget(finalized, engine, prompt, budget, finish_reason, output_tokens)
+
+    async def stream_diagram_code(self, prompt: str, engine: str = 'mermaid',
+                                  fallback_to_mock: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """OpenAI 호환 스트리밍(SSE, data: [DONE] 종료, Mock 폴백 없음)"""
+        if not self.configured:
+            yield {"type": "result", "result": {"success": False, "error": "LOCAL_LLM_URL is not configured", "engine": engine}}
+            return
+
+        breaker = model_breakers.get(f"local:{self.model}")
+        if not breaker.allow_request():
+            yield {"type": "result", "result": {"success": False, "error": f"Circuit open for local:{self.model}", "engine": engine}}
+            return
+
+        yield {"type": "progress", "stage": "requesting", "provider": "local", "model": self.model}
+        budget = output_budget.estimate(engine, prompt)
+        limiter = get_concurrency_limiter("local")
+        try:
+            await limiter.acquire()
+        except LLMOverloadedError:
+            breaker.release_trial()
+            raise
+        outcome = IGNORE
+        started = time.monotonic()
+        text_parts: List[str] = []
+        finish_reason: Optional[str] = None
+        error: Optional[str] = None
+
+        try:
+            async with self.client.stream(
+                "POST", f"{self.base_url}/chat/completions",
+                json=self._build_payload(prompt, budget, stream=True), headers=self._headers(),
+            ) as response:
+                outcome = GeminiAdapter._limiter_outcome(limiter, response)
+                if response.status_code != 200:
+                    await response.aread()
+                    error = f"API error: {response.status_code}"
+                else:
+                    yield {"type": "progress", "stage": "generating", "provider": "local", "model": self.model}
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if not data or data == "[DONE]":
+                            continue
+                        try:
+                            choice = (json.loads(data).get("choices") or [{}])[0] or {}
+                        except ValueError:
+                            continue
+                        finish_reason = self._finish_reason(choice) or finish_reason
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            text_parts.append(delta)
+                            yield {"type": "chunk", "text": delta}
+        except httpx.HTTPError as e:
+            error = str(e)
+            if isinstance(e, httpx.TimeoutException):
+                outcome = DROPPED
+        finally:
+            limiter.release(outcome)
+
+        generated_text = "".join(text_parts)
+        if error is None and not generated_text:
+            error = "No text content in stream"
+        if error is not None:
+            breaker.record_failure(time.monotonic() - started, error)
+            logger.error(f"💥 Local LLM stream error ({self.model}): {error}")
+            yield {"type": "result", "result": {"success": False, "error": error, "engine": engine}}
+            return
+
+        breaker.record_success(time.monotonic() - started)
+        if finish_reason == "MAX_TOKENS":
+            output_budget.observe_truncation(engine, prompt, budget)
+        finalized = self._finalize(generated_text, engine, self.model)
+        yield {"type": "result", "result": self._record_budget(finalized, engine, prompt, budget, finish_reason, 0)}
+
 
 def get_llm_adapter(provider: str = 'mock') -> LLMAdapter:
-    """LLM 어댑터 생성"""
+    """LLM 어댑터 생성 ('auto' 는 측정된 지연/오류/비용으로 백엔드를 고르는 공유 라우터)"""
+    if provider == 'auto':
+        # llm_router 가 이 모듈의 어댑터들을 가져오므로 순환 import 를 피해 지연 import
+        from llm_router import llm_router
+        return llm_router
     adapters = {
         'mock': MockLLMAdapter,
         'gemini': GeminiAdapter,
+        'local': OpenAICompatibleAdapter,
     }
     if provider not in adapters:
         logger.warning(f"Unknown provider {provider}, using mock")
         return MockLLMAdapter()
-    return adapters[provider]()
\ No newline at end of file
+    return adapters[provider]()
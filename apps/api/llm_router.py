@@ -0,0 +1,262 @@
+# apps/api/llm_router.py
+import logging
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from dotenv import load_dotenv
+from concurrency_limiter import LLMOverloadedError
+from llm_adapter import LLMAdapter, MockLLMAdapter, get_llm_adapter
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+FASTEST = "fastest"
+CHEAPEST_WITHIN_SLO = "cheapest_within_slo"
+
+# 1K 출력 토큰당 기본 상대 비용 (LLM_ROUTER_COST_<NAME> 으로 덮어씀)
+_DEFAULT_COSTS = {"gemini": 1.0, "local": 0.1}
+
+
+class BackendStats:
+    """백엔드별 EWMA 지연/오류율 (관측이 없으면 낙관적으로 시작해 한 번은 시도되도록 함)"""
+
+    def __init__(self, name: str, cost: float, alpha: float):
+        self.name = name
+        self.cost = cost
+        self.alpha = alpha
+        self.latency_ms: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.overloaded = 0
+        self.last_error: Optional[str] = None
+
+    def observe(self, latency_ms: float, ok: bool, error: Optional[str] = None):
+        self.requests += 1
+        if ok:
+            # 지연은 성공한 호출만 반영 (빠른 실패가 빠른 백엔드로 보이지 않도록)
+            self.latency_ms = latency_ms if self.latency_ms is None else (
+                self.alpha * latency_ms + (1 - self.alpha) * self.latency_ms
+            )
+        else:
+            self.errors += 1
+            self.last_error = error
+        self.error_rate = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * self.error_rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "cost": self.cost,
+            "requests": self.requests,
+            "errors": self.errors,
+            "overloaded": self.overloaded,
+            "last_error": self.last_error,
+        }
+
+
+class RouterAdapter(LLMAdapter):
+    """지연/오류/비용 인지 멀티 프로바이더 라우터 (provider='auto')
+
+    백엔드마다 성공 지연과 오류율의 EWMA 를 유지하고 정책에 따라 순위를 매겨 차례로 시도한다.
+      - fastest: 오류율 한도 이내 백엔드 중 EWMA 지연이 가장 짧은 순
+      - cheapest_within_slo: 지연 SLO 와 오류율 한도를 지키는 백엔드 중 비용이 가장 낮은 순
+        (만족하는 백엔드가 없으면 fastest 순서)
+    explore_rate 확률로 순위를 섞어 뒤로 밀린 백엔드의 통계도 갱신되게 한다.
+    과부하(LLMOverloadedError)나 실패(Mock 폴백 포함)면 다음 백엔드로 넘어가고,
+    모든 백엔드가 실패했을 때만 Mock 결과를 돌려준다.
+    """
+
+    provider_name = "auto"
+
+    def __init__(self, backends: Optional[Dict[str, LLMAdapter]] = None):
+        names = [n.strip() for n in os.getenv("LLM_ROUTER_BACKENDS", "gemini,local").split(",") if n.strip()]
+        self.backends: Dict[str, LLMAdapter] = backends or {name: get_llm_adapter(name) for name in names}
+        self.policy = os.getenv("LLM_ROUTER_POLICY", FASTEST).strip().lower()
+        self.slo_ms = float(os.getenv("LLM_ROUTER_SLO_MS", "8000"))
+        self.max_error_rate = float(os.getenv("LLM_ROUTER_MAX_ERROR_RATE", "0.2"))
+        self.explore_rate = float(os.getenv("LLM_ROUTER_EXPLORE_RATE", "0.05"))
+        alpha = float(os.getenv("LLM_ROUTER_EWMA_ALPHA", "0.2"))
+
+        self._stats: Dict[str, BackendStats] = {
+            name: BackendStats(
+                name,
+                float(os.getenv(f"LLM_ROUTER_COST_{name.upper()}", str(_DEFAULT_COSTS.get(name, 1.0)))),
+                alpha,
+            )
+            for name in self.backends
+        }
+        self._counters = {"requests": 0, "failovers": 0, "explored": 0, "mock_fallbacks": 0}
+
+    def _available(self, name: str) -> bool:
+        # 설정되지 않은 백엔드(키/URL 없음)는 순위에서 제외
+        adapter = self.backends[name]
+        return not isinstance(adapter, MockLLMAdapter) and getattr(adapter, "configured", True)
+
+    def ranked(self) -> List[str]:
+        """정책에 따른 백엔드 시도 순서"""
+        names = [name for name in self.backends if self._available(name)]
+        # 관측이 없는 백엔드는 지연 0 으로 간주해 먼저 측정
+        latency = lambda n: self._stats[n].latency_ms or 0.0
+        healthy = [n for n in names if self._stats[n].error_rate <= self.max_error_rate]
+        unhealthy = sorted((n for n in names if n not in healthy), key=lambda n: self._stats[n].error_rate)
+
+        if self.policy == CHEAPEST_WITHIN_SLO:
+            within = sorted((n for n in healthy if latency(n) <= self.slo_ms), key=lambda n: (self._stats[n].cost, latency(n)))
+            rest = sorted((n for n in healthy if n not in within), key=latency)
+            order = within + rest + unhealthy
+        else:
+            order = sorted(healthy, key=latency) + unhealthy
+
+        if len(order) > 1 and random.random() < self.explore_rate:
+            self._counters["explored"] += 1
+            random.shuffle(order)
+        return order
+
+    def _succeeded(self, name: str, result: Dict[str, Any]) -> bool:
+        metadata = result.get("metadata") or {}
+        return bool(result.get("success")) and not metadata.get("fallback") and (
+            metadata.get("provider") == self.backends[name].provider_name
+        )
+
+    @staticmethod
+    def _error_of(result: Dict[str, Any]) -> str:
+        metadata = result.get("metadata") or {}
+        return result.get("error") or metadata.get("fallback_reason") or "fallback result"
+
+    def _annotate(self, result: Dict[str, Any], attempts: List[str], backend: Optional[str] = None) -> Dict[str, Any]:
+        if result.get("success"):
+            result["metadata"] = {
+                **result.get("metadata", {}),
+                "router": {"policy": self.policy, "backend": backend or attempts[-1], "attempts": attempts},
+            }
+        return result
+
+    async def _fallback(self, prompt: str, engine: str, attempts: List[str], reason: Optional[str]) -> Dict[str, Any]:
+        self._counters["mock_fallbacks"] += 1
+        logger.warning(f"⚠️ All router backends failed ({attempts}). Falling back to Mock. last_error={reason}")
+        result = await MockLLMAdapter().generate_diagram_code(prompt, engine)
+        result["metadata"] = {**result.get("metadata", {}), "fallback": True, "fallback_reason": reason}
+        return self._annotate(result, attempts, "mock")
+
+    async def generate_diagram_code(self, prompt: str, engine: str = 'mermaid') -> Dict[str, Any]:
+        """순위대로 백엔드를 시도해 첫 성공 결과 반환"""
+        self._counters["requests"] += 1
+        attempts: List[str] = []
+        last_error: Optional[str] = "No router backend configured"
+        overloaded: Optional[LLMOverloadedError] = None
+        any_failed = False
+
+        for name in self.ranked():
+            if attempts:
+                self._counters["failovers"] += 1
+            attempts.append(name)
+            stats = self._stats[name]
+            started = time.monotonic()
+            try:
+                result = await self.backends[name].generate_diagram_code(prompt, engine)
+            except LLMOverloadedError as e:
+                # 과부하는 백엔드 오류가 아님: 통계는 그대로 두고 다음 백엔드로
+                stats.overloaded += 1
+                overloaded = e
+                logger.info(f"🔀 Router backend {name} overloaded, trying next")
+                continue
+            latency_ms = (time.monotonic() - started) * 1000
+            if self._succeeded(name, result):
+                stats.observe(latency_ms, True)
+                return self._annotate(result, attempts)
+            any_failed = True
+            last_error = self._error_of(result)
+            stats.observe(latency_ms, False, last_error)
+            logger.warning(f"🔀 Router backend {name} failed: {last_error}")
+
+        if overloaded is not None and not any_failed:
+            # 모든 백엔드가 과부하: 호출자가 503 으로 응답하도록 전달
+            raise overloaded
+        return await self._fallback(prompt, engine, attempts, last_error)
+
+    async def stream_diagram_code(self, prompt: str, engine: str = 'mermaid',
+                                  fallback_to_mock: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """순위가 가장 높은 백엔드로 스트리밍 (청크를 내보내기 전 실패한 경우에만 다음 백엔드로)
+
+        백엔드 자체의 Mock 폴백은 끄고(fallback_to_mock=False) 모든 백엔드가 실패했을 때만 여기서 폴백한다.
+        """
+        self._counters["requests"] += 1
+        attempts: List[str] = []
+        last_error: Optional[str] = "No router backend configured"
+        overloaded: Optional[LLMOverloadedError] = None
+        any_failed = False
+
+        for name in self.ranked():
+            if attempts:
+                self._counters["failovers"] += 1
+            attempts.append(name)
+            stats = self._stats[name]
+            started = time.monotonic()
+            emitted = False
+            final: Optional[Dict[str, Any]] = None
+            stream = self.backends[name].stream_diagram_code(prompt, engine, fallback_to_mock=False)
+            try:
+                async for event in stream:
+                    if event.get("type") == "result":
+                        final = event["result"]
+                        break
+                    if event.get("type") == "chunk":
+                        emitted = True
+                    yield event
+            except LLMOverloadedError as e:
+                if emitted:
+                    raise
+                stats.overloaded += 1
+                overloaded = e
+                continue
+            finally:
+                # 결과 수신 후 빠져나오거나 호출자가 스트림을 닫아도 백엔드 정리(finally)가 바로 실행되게
+                await stream.aclose()
+
+            latency_ms = (time.monotonic() - started) * 1000
+            final = final or {"success": False, "error": "Stream ended without result", "engine": engine}
+            if self._succeeded(name, final):
+                stats.observe(latency_ms, True)
+                yield {"type": "result", "result": self._annotate(final, attempts)}
+                return
+            any_failed = True
+            last_error = self._error_of(final)
+            stats.observe(latency_ms, False, last_error)
+            if emitted:
+                # 이미 내보낸 청크는 되돌릴 수 없으므로 결과를 그대로 전달
+                yield {"type": "result", "result": self._annotate(final, attempts)}
+                return
+            logger.warning(f"🔀 Router stream backend {name} failed before output: {last_error}")
+
+        if overloaded is not None and not any_failed:
+            raise overloaded
+        if not fallback_to_mock:
+            yield {"type": "result", "result": {"success": False, "error": last_error, "engine": engine}}
+            return
+        yield {"type": "result", "result": await self._fallback(prompt, engine, attempts, last_error)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "slo_ms": self.slo_ms,
+            "max_error_rate": self.max_error_rate,
+            "explore_rate": self.explore_rate,
+            "ranking": self._peek_ranking(),
+            "backends": {name: stats.to_dict() for name, stats in self._stats.items()},
+            **self._counters,
+        }
+
+    def _peek_ranking(self) -> List[str]:
+        # 통계 조회가 탐색 카운터에 영향을 주지 않도록 탐색 없이 계산
+        explore_rate, self.explore_rate = self.explore_rate, 0.0
+        try:
+            return self.ranked()
+        finally:
+            self.explore_rate = explore_rate
+
+
+# 전역 라우터 인스턴스 (get_llm_adapter('auto'))
+llm_router = RouterAdapter()
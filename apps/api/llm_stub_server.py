@@ -0,0 +1,215 @@
+# apps/api/llm_stub_server.py
+"""LLM API 로컬 스텁 서버 (개발/부하/라우터 테스트용)
+
+Gemini 의 generateContent, streamGenerateContent(SSE), cachedContents(생성/조회/TTL 연장/삭제), 모델 조회와
+OpenAI 호환 /v1/chat/completions(스트리밍 포함)를 흉내 낸다.
+
+실행:
+    uv run uvicorn llm_stub_server:app --port 8090
+API 서버 설정:
+    GEMINI_BASE_URL=http://localhost:8090/v1beta GEMINI_API_KEY=stub GEMINI_CONTEXT_CACHE=true
+    LOCAL_LLM_URL=http://localhost:8090/v1
+
+라우터 동작 확인용으로 지연과 오류율을 백엔드별로 줄 수 있다 (예: 포트를 달리해 두 개 실행).
+
+GET /stub/stats 로 캐시 사용 여부와 실제로 전송된 프롬프트 길이를 확인할 수 있다.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+
+LATENCY_MS = float(os.getenv("GEMINI_STUB_LATENCY_MS", "200"))
+OPENAI_LATENCY_MS = float(os.getenv("OPENAI_STUB_LATENCY_MS", str(LATENCY_MS)))
+# 0~1 사이 비율로 500 오류 응답 (라우터 오류율 테스트용)
+ERROR_RATE = float(os.getenv("LLM_STUB_ERROR_RATE", "0"))
+# 실제 API 의 최소 캐시 크기 제한을 흉내 내기 위한 값 (0 이면 제한 없음)
+MIN_CACHE_CHARS = int(os.getenv("GEMINI_STUB_MIN_CACHE_CHARS", "0"))
+
+app = FastAPI(title="LLM stub")
+
+cached_contents: Dict[str, Dict[str, Any]] = {}
+stats = {
+    "generate_inline": 0,
+    "generate_cached": 0,
+    "prompt_chars_received": 0,
+    "cache_created": 0,
+    "cache_refreshed": 0,
+    "cache_rejected": 0,
+    "chat_completions": 0,
+    "injected_errors": 0,
+}
+
+
+def _parse_ttl(ttl: str) -> float:
+    return float(ttl.rstrip("s")) if ttl else 3600.0
+
+
+def _expire_time(seconds: float) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
+
+
+def _resolve_prompt(body: Dict[str, Any]) -> str:
+    """요청 본문의 텍스트 (cachedContent 가 있으면 캐시된 접두부와 합침)"""
+    text = "".join(
+        part.get("text", "")
+        for content in body.get("contents", [])
+        for part in content.get("parts", [])
+    )
+    stats["prompt_chars_received"] += len(text)
+
+    name = body.get("cachedContent")
+    if not name:
+        stats["generate_inline"] += 1
+        return text
+
+    entry = cached_contents.get(name)
+    if entry is None or entry["expires_at"] < time.time():
+        stats["cache_rejected"] += 1
+        raise HTTPException(status_code=404, detail=f"CachedContent not found (or expired): {name}")
+    stats["generate_cached"] += 1
+    return entry["text"] + text
+
+
+def _fake_code(prompt: str) -> str:
+    subject = prompt.rsplit("### # REQUEST", 1)[-1].strip()[:40].replace('"', "'") or "요청"
+    return (
+        "```mermaid\n"
+        "graph TD\n"
+        f'    A["{subject}"] --> B{{"검토"}}\n'
+        '    B -->|승인| C["완료"]\n'
+        '    B -->|반려| A\n'
+        "```"
+    )
+
+
+def _candidate(text: str, finish_reason: str = "STOP") -> Dict[str, Any]:
+    return {"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": finish_reason}
+
+
+def _maybe_fail():
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        stats["injected_errors"] += 1
+        raise HTTPException(status_code=500, detail="Injected stub error")
+
+
+@app.post("/v1beta/cachedContents")
+async def create_cached_content(body: Dict[str, Any]):
+    text = "".join(
+        part.get("text", "")
+        for content in body.get("contents", [])
+        for part in content.get("parts", [])
+    )
+    if len(text) < MIN_CACHE_CHARS:
+        raise HTTPException(status_code=400, detail=f"Cached content is too small ({len(text)} < {MIN_CACHE_CHARS})")
+    ttl = _parse_ttl(body.get("ttl", "3600s"))
+    name = f"cachedContents/{uuid.uuid4().hex}"
+    cached_contents[name] = {"text": text, "model": body.get("model"), "expires_at": time.time() + ttl}
+    stats["cache_created"] += 1
+    return {"name": name, "model": body.get("model"), "expireTime": _expire_time(ttl)}
+
+
+@app.get("/v1beta/cachedContents/{cache_id}")
+async def get_cached_content(cache_id: str):
+    name = f"cachedContents/{cache_id}"
+    entry = cached_contents.get(name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return {"name": name, "model": entry["model"], "expireTime": _expire_time(entry["expires_at"] - time.time())}
+
+
+@app.patch("/v1beta/cachedContents/{cache_id}")
+async def update_cached_content(cache_id: str, body: Dict[str, Any]):
+    name = f"cachedContents/{cache_id}"
+    entry = cached_contents.get(name)
+    if entry is None or entry["expires_at"] < time.time():
+        raise HTTPException(status_code=404, detail="Not found")
+    ttl = _parse_ttl(body.get("ttl", "3600s"))
+    entry["expires_at"] = time.time() + ttl
+    stats["cache_refreshed"] += 1
+    return {"name": name, "model": entry["model"], "expireTime": _expire_time(ttl)}
+
+
+@app.delete("/v1beta/cachedContents/{cache_id}")
+async def delete_cached_content(cache_id: str):
+    cached_contents.pop(f"cachedContents/{cache_id}", None)
+    return {}
+
+
+@app.get("/v1beta/models/{model}")
+async def get_model(model: str):
+    return {"name": f"models/{model}", "supportedGenerationMethods": ["generateContent", "createCachedContent"]}
+
+
+@app.post("/v1beta/models/{model}:generateContent")
+async def generate_content(model: str, body: Dict[str, Any]):
+    _maybe_fail()
+    prompt = _resolve_prompt(body)
+    await asyncio.sleep(LATENCY_MS / 1000)
+    return {
+        "candidates": [_candidate(_fake_code(prompt))],
+        "usageMetadata": {
+            "promptTokenCount": len(prompt) // 2,
+            "cachedContentTokenCount": (len(prompt) // 2) if body.get("cachedContent") else 0,
+        },
+        "modelVersion": model,
+    }
+
+
+@app.post("/v1beta/models/{model}:streamGenerateContent")
+async def stream_generate_content(model: str, body: Dict[str, Any]):
+    _maybe_fail()
+    prompt = _resolve_prompt(body)
+    lines = _fake_code(prompt).splitlines(keepends=True)
+
+    async def events():
+        for line in lines:
+            await asyncio.sleep(LATENCY_MS / 1000 / max(1, len(lines)))
+            yield f"data: {json.dumps({'candidates': [_candidate(line)]}, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: Dict[str, Any]):
+    _maybe_fail()
+    stats["chat_completions"] += 1
+    prompt = "".join(str(message.get("content", "")) for message in body.get("messages", []))
+    stats["prompt_chars_received"] += len(prompt)
+    code = _fake_code(prompt)
+    model = body.get("model", "stub-model")
+
+    if not body.get("stream"):
+        await asyncio.sleep(OPENAI_LATENCY_MS / 1000)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": code}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 2, "completion_tokens": len(code) // 2},
+        }
+
+    lines = code.splitlines(keepends=True)
+
+    async def events():
+        for line in lines:
+            await asyncio.sleep(OPENAI_LATENCY_MS / 1000 / max(1, len(lines)))
+            chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": line}, "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        done = {"model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        yield f"data: {json.dumps(done)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stub/stats")
+async def get_stats():
+    return {**stats, "cached_contents": len(cached_contents)}
@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 import traceback
+from contextlib import asynccontextmanager
 from routes import router
 from auth_routes import router as auth_router
 from stripe_routes import router as stripe_router
@@ -15,9 +16,41 @@ from search_routes import router as search_router
 from logging_config import logger
 # print 함수 로깅 추가
 import console_logger
+from http_client_pool import llm_http_pool
+from circuit_breaker import model_breakers
+from generation_jobs import generation_jobs
+from prompt_index import prompt_index
+from output_budget import output_budget
+import os
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 시작 도중 실패해도 이미 시작한 자원이 정리되도록 시작 단계도 try 안에서 수행
+    # (각 stop/close 는 시작되지 않은 상태에서 호출해도 안전하다)
+    jobs_in_process = os.getenv("GENERATION_JOBS_IN_PROCESS", "true").lower() in ("1", "true", "yes", "on")
+    try:
+        # 앱 수명 동안 공유할 LLM HTTP 클라이언트 풀 생성 및 예열
+        await llm_http_pool.start()
+        logger.info("LLM HTTP client pool started")
+        # open 된 모델 서킷 브레이커를 백그라운드로 프로브
+        model_breakers.start()
+        # 최근 다이어그램의 출력 토큰으로 출력 예산 추정기 초기화
+        await output_budget.load_history()
+        # 근사 중복 프롬프트 인덱스 디스크 스냅샷
+        prompt_index.start()
+        # 비동기 생성 작업 워커 (별도 generation_worker.py 프로세스를 쓰면 false)
+        if jobs_in_process:
+            generation_jobs.start()
+        yield
+    finally:
+        await generation_jobs.stop()
+        await prompt_index.stop()
+        await model_breakers.stop()
+        await llm_http_pool.close()
+        logger.info("LLM HTTP client pool closed")
 
 # FastAPI 앱 생성
-app = FastAPI(title="Diagrammer API", description="AI 기반 다이어그램 생성 및 편집 API", version="0.1.0")
+app = FastAPI(title="Diagrammer API", description="AI 기반 다이어그램 생성 및 편집 API", version="0.1.0", lifespan=lifespan)
 
 # 예외 처리 미들웨어
 @app.exception_handler(Exception)
@@ -0,0 +1,266 @@
+# apps/api/mermaid_repair.py
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 수리 종류 (metadata.repairs 에 기록되는 이름)
+STRIPPED_FENCES = "stripped_fences"
+STRIPPED_PROSE = "stripped_prose"
+ADDED_HEADER = "added_header"
+ADDED_DIRECTION = "added_direction"
+NORMALIZED_ARROWS = "normalized_arrows"
+BALANCED_BRACKETS = "balanced_brackets"
+QUOTED_LABELS = "quoted_labels"
+FILLED_EMPTY_LABELS = "filled_empty_labels"
+RENAMED_DUPLICATE_IDS = "renamed_duplicate_ids"
+
+_DIAGRAM_KEYWORDS = (
+    "graph", "flowchart", "sequenceDiagram", "classDiagram", "stateDiagram", "stateDiagram-v2",
+    "erDiagram", "gantt", "journey", "pie", "mindmap", "timeline", "gitGraph",
+)
+_FLOWCHART_HEADER_RE = re.compile(r"^(graph|flowchart)\b\s*(\w*)\s*;?\s*$")
+_DIRECTIONS = {"TD", "TB", "BT", "LR", "RL"}
+
+# 노드 모양 여는/닫는 기호 (긴 것부터 검사)
+_SHAPES: List[Tuple[str, str]] = [
+    ("(((", ")))"), ("([", "])"), ("[[", "]]"), ("[(", ")]"), ("((", "))"), ("{{", "}}"),
+    ("[/", "/]"), ("[\\", "\\]"), ("[", "]"), ("(", ")"), ("{", "}"), (">", "]"),
+]
+# 엣지 라벨(|...|) 또는 노드 ID 후보
+_TOKEN_RE = re.compile(r"\|[^|\n]*\||(?<!\w)\w+")
+_EDGE_START_RE = re.compile(r"\s*(?:<?-{2,}|<?={2,}|-\.|~~~)")
+_CLASS_SUFFIX_RE = re.compile(r":::\w+")
+# 따옴표 없이 쓰면 Mermaid 파서가 깨지는 라벨 문자
+_UNSAFE_LABEL_RE = re.compile(r'[()\[\]{}<>"|;]')
+_SMART_ARROWS = (("⟶", "-->"), ("→", "-->"), ("–>", "-->"), ("—>", "-->"), ("==〉", "==>"))
+# 노드 문법이 아닌 문장 (그대로 둔다)
+_PASSTHROUGH_RE = re.compile(r"^(?:%%|(?:subgraph|end|classDef|class|style|linkStyle|click|direction)\b)")
+
+
+def _is_header(line: str) -> bool:
+    head = line.split(None, 1)[0] if line.split() else ""
+    return head.rstrip(";") in _DIAGRAM_KEYWORDS
+
+
+class _FlowchartRepairer:
+    """플로우차트 한 줄씩 노드 정의를 스캔하며 괄호/라벨/중복 ID 를 고친다"""
+
+    def __init__(self):
+        self.repairs: List[str] = []
+        self._labels: Dict[str, str] = {}
+        self._aliases: Dict[str, str] = {}
+
+    def _note(self, repair: str):
+        if repair not in self.repairs:
+            self.repairs.append(repair)
+
+    @staticmethod
+    def _match_shape(line: str, i: int) -> Optional[Tuple[str, str]]:
+        if i >= len(line) or line[i] not in "([{>":
+            return None
+        for opener, closer in _SHAPES:
+            if line.startswith(opener, i):
+                return opener, closer
+        return None
+
+    def _scan_label(self, line: str, i: int, closer: str) -> Tuple[str, int, bool]:
+        """라벨과 닫는 기호 다음 위치 (닫는 기호가 없거나 틀리면 repaired=True)"""
+        n = len(line)
+        if i < n and line[i] == '"':
+            end = line.find('"', i + 1)
+            if end != -1:
+                j = end + 1
+                while j < n and line[j] == " ":
+                    j += 1
+                if line.startswith(closer, j):
+                    return line[i:end + 1], j + len(closer), False
+            # 닫는 따옴표 뒤가 닫는 기호가 아니면 라벨 안의 따옴표: 따옴표를 일반 문자로 보고 아래에서 스캔
+
+        # 닫는 기호를 먼저 찾는다: 라벨 안의 '--', '==' 등은 닫는 기호가 없을 때만 라벨 끝으로 본다
+        depth = 0
+        edge_at: Optional[int] = None
+        j = i
+        while j < n:
+            if depth == 0 and line.startswith(closer, j):
+                return line[i:j], j + len(closer), False
+            c = line[j]
+            if c in "([{":
+                depth += 1
+            elif c in ")]}":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif edge_at is None and depth == 0 and c in " -=~<" and _EDGE_START_RE.match(line, j):
+                edge_at = j
+            j += 1
+        if edge_at is not None:
+            j = min(j, edge_at)
+        label = line[i:j].rstrip()
+        k = j
+        while k < n and line[k] in ")]}/\\":
+            k += 1
+        return label, k, True
+
+    def _fix_label(self, node_id: str, label: str) -> str:
+        stripped = label.strip()
+        if not stripped or stripped == '""':
+            self._note(FILLED_EMPTY_LABELS)
+            return f'"{node_id}"'
+        if stripped.startswith('"') and stripped.endswith('"') and len(stripped) >= 2:
+            if '"' not in stripped[1:-1]:
+                return label
+            self._note(QUOTED_LABELS)
+            return '"' + stripped[1:-1].replace('"', "#quot;") + '"'
+        if _UNSAFE_LABEL_RE.search(stripped):
+            self._note(QUOTED_LABELS)
+            return '"' + stripped.replace('"', "#quot;") + '"'
+        return label
+
+    def _define(self, node_id: str, label: str) -> str:
+        """노드 정의: 같은 ID 가 다른 라벨로 다시 정의되면 새 ID 를 부여"""
+        key = label.strip().strip('"').strip()
+        known = self._labels.get(node_id)
+        if known is None or known == key:
+            self._labels.setdefault(node_id, key)
+            self._aliases.pop(node_id, None)
+            return node_id
+        for alias, alias_label in self._labels.items():
+            if alias.startswith(f"{node_id}_") and alias_label == key:
+                self._aliases[node_id] = alias
+                return alias
+        suffix = 2
+        while f"{node_id}_{suffix}" in self._labels:
+            suffix += 1
+        alias = f"{node_id}_{suffix}"
+        self._labels[alias] = key
+        # 이후 라벨 없는 참조는 가장 최근 정의를 가리킨다
+        self._aliases[node_id] = alias
+        self._note(RENAMED_DUPLICATE_IDS)
+        return alias
+
+    def repair_line(self, line: str) -> str:
+        stripped = line.strip()
+        if not stripped or _PASSTHROUGH_RE.match(stripped) or _is_header(stripped):
+            return line
+
+        out: List[str] = []
+        i, n = 0, len(line)
+        while i < n:
+            token = _TOKEN_RE.search(line, i)
+            if token is None:
+                out.append(line[i:])
+                break
+            out.append(line[i:token.start()])
+            if token.group(0).startswith("|"):
+                out.append(token.group(0))
+                i = token.end()
+                continue
+
+            node_id = token.group(0)
+            j = token.end()
+            shape = self._match_shape(line, j)
+            if shape is None:
+                # 라벨 없는 참조
+                out.append(self._aliases.get(node_id, node_id))
+                i = j
+                continue
+
+            opener, closer = shape
+            label, end, repaired = self._scan_label(line, j + len(opener), closer)
+            if repaired:
+                self._note(BALANCED_BRACKETS)
+            label = self._fix_label(node_id, label)
+            out.append(f"{self._define(node_id, label)}{opener}{label}{closer}")
+            i = end
+            suffix = _CLASS_SUFFIX_RE.match(line, i)
+            if suffix:
+                out.append(suffix.group(0))
+                i = suffix.end()
+        return "".join(out)
+
+
+class MermaidRepairer:
+    """LLM 이 만든 Mermaid 코드의 흔한 문법 오류를 로컬에서 결정적으로 수리
+
+    코드 펜스/앞뒤 설명 문장 제거, 누락된 헤더와 방향 추가, 유니코드 화살표 정규화와
+    플로우차트 노드의 괄호 짝 맞추기, 특수문자 라벨 따옴표 처리, 빈 라벨 채우기,
+    다른 라벨로 재정의된 중복 노드 ID 이름 변경을 수행한다.
+    재생성 요청(LLM 왕복) 대신 수 밀리초 안에 고칠 수 있는 것만 다루며, 적용한 수리 목록을 돌려준다.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("MERMAID_REPAIR_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+        self._stats: Dict[str, Any] = {"checked": 0, "repaired": 0, "by_repair": {}}
+
+    def repair(self, code: str) -> Tuple[str, List[str]]:
+        """(수리된 코드, 적용한 수리 목록)"""
+        if not self.enabled:
+            return code, []
+        self._stats["checked"] += 1
+        repairs: List[str] = []
+        lines = code.strip().splitlines()
+
+        # 코드 펜스 제거
+        if any(line.strip().startswith("```") for line in lines):
+            lines = [line for line in lines if not line.strip().startswith("```")]
+            repairs.append(STRIPPED_FENCES)
+
+        # 헤더 앞 설명 문장 제거
+        header_index = next((idx for idx, line in enumerate(lines) if _is_header(line.strip())), None)
+        if header_index:
+            if all(not line.strip() or line.strip().startswith("%%") or "-->" not in line for line in lines[:header_index]):
+                lines = lines[header_index:]
+                header_index = 0
+                repairs.append(STRIPPED_PROSE)
+
+        text = "\n".join(lines)
+        for wrong, right in _SMART_ARROWS:
+            if wrong in text:
+                text = text.replace(wrong, right)
+                if NORMALIZED_ARROWS not in repairs:
+                    repairs.append(NORMALIZED_ARROWS)
+        lines = text.splitlines()
+
+        if header_index is None:
+            if not any("--" in line or "==" in line for line in lines):
+                return code, []
+            lines.insert(0, "graph TD")
+            repairs.append(ADDED_HEADER)
+            header_index = 0
+
+        header = _FLOWCHART_HEADER_RE.match(lines[header_index].strip())
+        if header:
+            if header.group(2) not in _DIRECTIONS:
+                lines[header_index] = f"{header.group(1)} TD"
+                repairs.append(ADDED_DIRECTION)
+            flowchart = _FlowchartRepairer()
+            lines = lines[:header_index + 1] + [flowchart.repair_line(line) for line in lines[header_index + 1:]]
+            repairs.extend(flowchart.repairs)
+
+        if not repairs:
+            return code, []
+        self._stats["repaired"] += 1
+        for name in repairs:
+            self._stats["by_repair"][name] = self._stats["by_repair"].get(name, 0) + 1
+        logger.info(f"🔧 Mermaid repaired locally: {', '.join(repairs)}")
+        return "\n".join(lines).strip(), repairs
+
+    def stats(self) -> Dict[str, Any]:
+        checked = self._stats["checked"]
+        return {
+            "enabled": self.enabled,
+            "repair_rate": round(self._stats["repaired"] / checked, 4) if checked else 0.0,
+            "checked": checked,
+            "repaired": self._stats["repaired"],
+            "by_repair": dict(self._stats["by_repair"]),
+        }
+
+
+# 전역 Mermaid 수리기
+mermaid_repairer = MermaidRepairer()
@@ -90,9 +90,13 @@ class TaskVersion(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id"), nullable=False)
-    code = Column(Text, nullable=False)
+    code = Column(Text, nullable=False)  # 인라인 키프레임이면 전체 코드, blob/델타 행이면 빈 문자열
     engine = Column(String(50), default="mermaid")  # mermaid, visjs
     root_id = Column(String(255))
+    code_hash = Column(String(64), ForeignKey("code_blobs.hash"), index=True)  # 키프레임 코드 blob
+    base_id = Column(UUID(as_uuid=True), ForeignKey("task_versions.id"))  # 델타 기준 버전
+    delta = Column(Text)  # version_delta.make_delta JSON (None 이면 키프레임)
+    chain_depth = Column(Integer, default=0)  # 가장 가까운 키프레임까지의 델타 수
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -114,7 +118,8 @@ class Diagram(Base):
     session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id"))
     task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id"))
     engine = Column(String(50), default="mermaid")  # mermaid, visjs
-    code = Column(Text, nullable=False)
+    code = Column(Text, nullable=False)  # code_hash 가 있으면 빈 문자열
+    code_hash = Column(String(64), ForeignKey("code_blobs.hash"), index=True)
     render_type = Column(String(50), default="readonly")  # readonly, reactflow
     prompt = Column(Text)
     meta = Column(JSON)
@@ -204,3 +209,50 @@ class SearchIndex(Base):
     
     # Relationships
     user = relationship("User")
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = Column(String(50), default="queued", index=True)  # queued, running, succeeded, failed
+    prompt = Column(Text, nullable=False)
+    engine = Column(String(50), default="mermaid")
+    provider = Column(String(50), default="mock")
+    user_key = Column(String(255), nullable=False)  # 스케줄러 흐름 식별자 (user:<id> / anon:<ip>)
+    plan = Column(String(50), default="anonymous")
+    diagram_id = Column(UUID(as_uuid=True), ForeignKey("diagrams.id"))
+    result_meta = Column(JSON)
+    error = Column(Text)
+    attempts = Column(Integer, default=0)
+    worker_id = Column(String(255))
+    available_at = Column(DateTime, default=datetime.utcnow)  # 재시도 대기 후 다시 가져갈 수 있는 시각
+    heartbeat_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    diagram = relationship("Diagram")
+
+class LayoutCache(Base):
+    __tablename__ = "layout_cache"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # 그래프 구조(노드 ID, 엣지, 방향)와 레이아웃 알고리즘의 해시 (라벨 변경은 같은 키)
+    structure_hash = Column(String(64), unique=True, nullable=False, index=True)
+    algorithm = Column(String(50), default="force")
+    positions = Column(JSON, nullable=False)  # {node_id: [x, y]}
+    node_count = Column(Integer, default=0)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+
+class CodeBlob(Base):
+    __tablename__ = "code_blobs"
+    
+    # blob 코드의 SHA-256 (새 코드는 code_blobs.canonicalize_code 로 정규화한 뒤 저장)
+    hash = Column(String(64), primary_key=True)
+    code = Column(Text, nullable=False)
+    size = Column(Integer, default=0)  # UTF-8 바이트 수
+    ref_count = Column(Integer, default=0)  # 이 blob 을 가리키는 diagrams/task_versions/공유 수
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,152 @@
+# apps/api/output_budget.py
+import logging
+import math
+import os
+import re
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 닫는 코드 펜스에서 생성 종료 (여는 펜스는 ```mermaid 처럼 언어가 붙으므로 걸리지 않음)
+STOP_SEQUENCES = ["```\n"]
+
+SMALL, MEDIUM, LARGE = "small", "medium", "large"
+
+# 이력이 부족할 때 쓰는 기본 예산 (응답 토큰 기준: thinking 모델의 사고 토큰 예산은 어댑터가 따로 더한다.
+# vis.js JSON 은 같은 그래프라도 토큰이 더 많다)
+_HEURISTIC_BUDGET = {SMALL: 1024, MEDIUM: 2048, LARGE: 4096}
+_ENGINE_FACTOR = {"mermaid": 1.0, "dot": 1.0, "visjs": 1.6}
+
+_LARGE_HINTS = (
+    "아키텍처", "architecture", "전체", "시스템", "system", "마이크로서비스", "microservice",
+    "인프라", "infrastructure", "erd", "상세", "detailed", "모든", "전사",
+)
+_SMALL_HINTS = ("간단", "simple", "짧게", "간략", "basic", "기본")
+_SEPARATOR_RE = re.compile(r"[,，、·/]|->|→|=>|\n|\d+[.)]")
+
+
+def prompt_features(prompt: str) -> Dict[str, Any]:
+    """출력 크기 추정용 프롬프트 특징"""
+    text = (prompt or "").casefold()
+    return {
+        "length": len(text),
+        "items": len(_SEPARATOR_RE.findall(text)),
+        "large_hints": sum(1 for hint in _LARGE_HINTS if hint in text),
+        "small_hints": sum(1 for hint in _SMALL_HINTS if hint in text),
+    }
+
+
+def size_class(prompt: str) -> str:
+    """프롬프트로 예상한 다이어그램 크기 등급"""
+    f = prompt_features(prompt)
+    score = f["items"] + f["length"] / 80 + 3 * f["large_hints"] - 3 * f["small_hints"]
+    if score >= 8:
+        return LARGE
+    if score >= 3:
+        return MEDIUM
+    return SMALL
+
+
+class OutputBudgetEstimator:
+    """엔진 × 크기 등급별 출력 토큰 예산 추정기
+
+    같은 등급의 최근 실제 응답 토큰(diagrams.meta.output_tokens, 사고 토큰 제외) 백분위에 여유 비율을 곱해 응답 예산을 정한다
+    (thinking 모델의 사고 예산은 GeminiAdapter 가 maxOutputTokens 에 따로 더한다).
+    이력이 부족하면 등급별 기본값을 쓰고, MAX_TOKENS 로 잘린 응답은 예산의 두 배를 관측값으로 기록해
+    같은 등급의 다음 요청부터 예산이 커지도록 한다.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("OUTPUT_BUDGET_ADAPTIVE", "true").lower() in ("1", "true", "yes", "on")
+        self.default_tokens = int(os.getenv("OUTPUT_BUDGET_DEFAULT", "2048"))
+        self.min_tokens = int(os.getenv("OUTPUT_BUDGET_MIN", "512"))
+        self.max_tokens = int(os.getenv("OUTPUT_BUDGET_MAX", "8192"))
+        self.headroom = float(os.getenv("OUTPUT_BUDGET_HEADROOM", "1.3"))
+        self.percentile = float(os.getenv("OUTPUT_BUDGET_PERCENTILE", "0.95"))
+        self.min_samples = int(os.getenv("OUTPUT_BUDGET_MIN_SAMPLES", "10"))
+        self.window = int(os.getenv("OUTPUT_BUDGET_WINDOW", "200"))
+        self.history_limit = int(os.getenv("OUTPUT_BUDGET_HISTORY_LIMIT", "1000"))
+
+        self._history: Dict[Tuple[str, str], Deque[int]] = {}
+        self._stats = {"estimates": 0, "observations": 0, "truncations": 0, "history_loaded": 0}
+
+    def _samples(self, engine: str, size: str) -> Deque[int]:
+        key = (engine, size)
+        samples = self._history.get(key)
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            self._history[key] = samples
+        return samples
+
+    def _clamp(self, tokens: float) -> int:
+        # 128 단위로 올림
+        tokens = int(math.ceil(tokens / 128.0) * 128)
+        return max(self.min_tokens, min(self.max_tokens, tokens))
+
+    def estimate(self, engine: str, prompt: str) -> int:
+        """요청에 사용할 maxOutputTokens"""
+        if not self.enabled:
+            return self.default_tokens
+        self._stats["estimates"] += 1
+        size = size_class(prompt)
+        samples = self._history.get((engine, size))
+        if samples and len(samples) >= self.min_samples:
+            ordered = sorted(samples)
+            observed = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+            return self._clamp(observed * self.headroom)
+        return self._clamp(_HEURISTIC_BUDGET[size] * _ENGINE_FACTOR.get(engine, 1.0))
+
+    def next_budget(self, budget: int) -> int:
+        """MAX_TOKENS 로 잘렸을 때 재시도 예산 (더 늘릴 수 없으면 0)"""
+        if budget >= self.max_tokens:
+            return 0
+        return self._clamp(budget * 2)
+
+    def observe(self, engine: str, prompt: str, output_tokens: int):
+        if output_tokens and output_tokens > 0:
+            self._samples(engine, size_class(prompt)).append(int(output_tokens))
+            self._stats["observations"] += 1
+
+    def observe_truncation(self, engine: str, prompt: str, budget: int):
+        """예산 부족으로 잘린 응답: 실제 필요량은 예산 이상이므로 두 배를 관측값으로 기록"""
+        self._stats["truncations"] += 1
+        self._samples(engine, size_class(prompt)).append(min(self.max_tokens, budget * 2))
+
+    async def load_history(self):
+        """최근 다이어그램 meta 의 출력 토큰으로 이력 초기화"""
+        # 지연 import: llm_adapter / llm_stub_server 가 DB 연결 없이 이 모듈을 import 할 수 있도록
+        from database import db
+
+        try:
+            rows = await db.get_recent_diagram_meta(self.history_limit)
+        except Exception as e:
+            logger.warning(f"⚠️ Output budget history load failed: {e}")
+            return
+        # 오래된 것부터 넣어 최근 값이 window 에 남도록
+        for engine, prompt, meta in reversed(rows):
+            tokens = (meta or {}).get("output_tokens")
+            if isinstance(tokens, int) and prompt:
+                self._samples(engine, size_class(prompt)).append(tokens)
+                self._stats["history_loaded"] += 1
+        logger.info(f"Output budget history loaded ({self._stats['history_loaded']} samples)")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "min_tokens": self.min_tokens,
+            "max_tokens": self.max_tokens,
+            "headroom": self.headroom,
+            "buckets": {
+                f"{engine}/{size}": {"samples": len(samples), "max": max(samples) if samples else None}
+                for (engine, size), samples in self._history.items()
+            },
+            **self._stats,
+        }
+
+
+# 전역 출력 예산 추정기
+output_budget = OutputBudgetEstimator()
@@ -0,0 +1,353 @@
+# apps/api/prompt_index.py
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from llm_adapter import SYSTEM_PROMPT_VERSION
+from generation_cache import normalize_prompt
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent / "data"
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r"\w+")
+
+# 의미에 영향이 적은 요청 표현 (어순/존댓말 차이 흡수)
+_FILLER_WORDS = {
+    "좀", "줘", "주세요", "줄래", "줄래요", "해줘", "해주세요", "해", "주라",
+    "그려", "그려줘", "그려주세요", "그려줄래", "만들어", "만들어줘", "만들어주세요",
+    "please", "draw", "create", "make", "generate", "me", "a", "an", "the",
+}
+# 체언 뒤 조사 (긴 것부터 검사)
+_PARTICLES = (
+    "으로", "에서", "에게", "까지", "부터", "처럼", "하고", "이랑",
+    "랑", "을", "를", "이", "가", "은", "는", "의", "에", "로", "와", "과", "도",
+)
+
+
+# 방향을 나타내는 조사/전치사 (n-gram 집합은 어순을 버리므로 역할은 따로 비교)
+_ROLE_PARTICLES = {"에서": "from", "부터": "from", "에게": "to", "으로": "to", "까지": "to", "로": "to", "이": "subj", "가": "subj"}
+_ROLE_WORDS = {"from": "from", "to": "to", "into": "to", "towards": "to", "toward": "to"}
+_ARTICLES = {"the", "an"}
+
+
+def _split_particle(token: str) -> Tuple[str, Optional[str]]:
+    for particle in _PARTICLES:
+        if token.endswith(particle) and len(token) - len(particle) >= 2:
+            return token[:-len(particle)], particle
+    return token, None
+
+
+def _strip_particle(token: str) -> str:
+    return _split_particle(token)[0]
+
+
+def prompt_tokens(prompt: str) -> List[str]:
+    """유사도 비교용 토큰: 정규화 후 구두점 제거, 조사/요청 표현 제거"""
+    tokens = []
+    for token in _TOKEN_RE.findall(normalize_prompt(prompt)):
+        if token in _FILLER_WORDS:
+            continue
+        token = _strip_particle(token)
+        if token and token not in _FILLER_WORDS:
+            tokens.append(token)
+    return tokens
+
+
+def shingles(prompt: str, n: int = 2) -> Set[str]:
+    """토큰 단위 문자 n-gram 집합 (토큰 경계 표시, 어순과 무관)"""
+    result = set()
+    for token in prompt_tokens(prompt):
+        padded = f"^{token}$"
+        if len(padded) <= n:
+            result.add(padded)
+            continue
+        for i in range(len(padded) - n + 1):
+            result.add(padded[i:i + n])
+    return result
+
+
+def direction_roles(prompt: str) -> List[str]:
+    """방향 역할 목록: '역할:구' (출발/도착/주어와 그 앞 구)
+
+    '주문 서비스에서 결제 서비스로' 와 '결제 서비스에서 주문 서비스로' 처럼 n-gram 집합은 같지만
+    뜻이 반대인 프롬프트를 가르기 위해 정확히 일치해야 한다. 역할끼리의 순서는 무시한다.
+    """
+    roles = []
+    phrase: List[str] = []
+    pending: Optional[str] = None
+    for token in _TOKEN_RE.findall(normalize_prompt(prompt)):
+        if pending is not None:
+            # 영어 전치사는 다음 단어에 역할을 붙인다
+            if token in _ARTICLES:
+                continue
+            roles.append(f"{pending}:{token}")
+            pending, phrase = None, []
+            continue
+        if token in _ROLE_WORDS:
+            pending = _ROLE_WORDS[token]
+            continue
+        if token in _FILLER_WORDS:
+            continue
+        stem, particle = _split_particle(token)
+        phrase.append(stem)
+        role = _ROLE_PARTICLES.get(particle)
+        if role is not None:
+            roles.append(f"{role}:{' '.join(phrase)}")
+            phrase = []
+    return sorted(roles)
+
+
+def numbers(prompt: str) -> List[str]:
+    """프롬프트 안의 숫자 토큰 (n-gram 유사도로는 구분이 약해 정확히 일치해야 함)"""
+    return sorted(re.findall(r"\d+", normalize_prompt(prompt)))
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """고정 시드 기반 MinHash (프로세스/재시작 간 동일한 서명)"""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, items: Set[str]) -> List[int]:
+        hashes = [zlib.crc32(item.encode("utf-8")) for item in items] or [0]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._params
+        ]
+
+
+class PromptIndex:
+    """근사 중복 프롬프트 인덱스 (문자 n-gram MinHash + LSH 밴딩)
+
+    캐시된 생성 결과의 프롬프트를 인덱싱해 두었다가, 정확한 캐시 키가 없을 때
+    같은 (provider, engine) 범위에서 Jaccard 유사도가 엔진별 임계값 이상이고 숫자 토큰과
+    방향 역할(direction_roles)이 모두 같은 프롬프트의 캐시 키를 찾는다.
+    LSH 버킷으로 후보를 고른 뒤 저장된 n-gram 집합으로 정확한 Jaccard 를 다시 계산해 확인한다.
+    메모리에 유지하며 data/prompt_index.json 에 주기적으로 스냅샷한다.
+    """
+
+    def __init__(self, snapshot_path: Optional[Path] = None):
+        self.enabled = os.getenv("PROMPT_INDEX_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+        self.ngram = int(os.getenv("PROMPT_INDEX_NGRAM", "2"))
+        self.num_perm = int(os.getenv("PROMPT_INDEX_NUM_PERM", "64"))
+        self.bands = int(os.getenv("PROMPT_INDEX_BANDS", "16"))
+        self.rows = max(1, self.num_perm // self.bands)
+        self.default_threshold = float(os.getenv("PROMPT_INDEX_THRESHOLD", "0.85"))
+        self.thresholds = {
+            engine.strip(): float(value)
+            for engine, value in (
+                item.split(":", 1) for item in os.getenv("PROMPT_INDEX_THRESHOLDS", "").split(",") if ":" in item
+            )
+        }
+        self.max_entries = int(os.getenv("PROMPT_INDEX_MAX_ENTRIES", "10000"))
+        self.ttl_seconds = int(os.getenv("GENERATION_CACHE_TTL", str(24 * 3600)))
+        self.snapshot_interval = float(os.getenv("PROMPT_INDEX_SNAPSHOT_INTERVAL", "60"))
+        self.snapshot_path = snapshot_path or DATA_DIR / "prompt_index.json"
+
+        self._hasher = MinHasher(self.num_perm)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[str, Set[str]] = {}
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"lookups": 0, "hits": 0, "candidates": 0, "adds": 0}
+
+        if self.enabled:
+            self.load()
+
+    def threshold_for(self, engine: str) -> float:
+        return self.thresholds.get(engine, self.default_threshold)
+
+    @staticmethod
+    def _scope(provider: str, engine: str) -> str:
+        return f"{SYSTEM_PROMPT_VERSION}|{provider}|{engine}"
+
+    def _band_keys(self, scope: str, signature: List[int]) -> List[str]:
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            keys.append(f"{scope}|{band}|{zlib.crc32(repr(chunk).encode('ascii')):08x}")
+        return keys
+
+    # ------------------------------------------------------------------
+    # index maintenance
+    # ------------------------------------------------------------------
+    def _insert(self, cache_key: str, entry: Dict[str, Any]):
+        self._entries[cache_key] = entry
+        self._entries.move_to_end(cache_key)
+        for band_key in entry["bands"]:
+            self._buckets.setdefault(band_key, set()).add(cache_key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self.remove(oldest)
+
+    def add(self, cache_key: str, provider: str, engine: str, prompt: str):
+        """캐시에 저장된 생성 결과의 프롬프트 등록"""
+        if not self.enabled or cache_key in self._entries:
+            return
+        items = shingles(prompt, self.ngram)
+        if not items:
+            return
+        scope = self._scope(provider, engine)
+        signature = self._hasher.signature(items)
+        self._insert(cache_key, {
+            "scope": scope,
+            "engine": engine,
+            "shingles": sorted(items),
+            "numbers": numbers(prompt),
+            "roles": direction_roles(prompt),
+            "bands": self._band_keys(scope, signature),
+            "stored_at": time.time(),
+        })
+        self._stats["adds"] += 1
+        self._dirty = True
+
+    def remove(self, cache_key: str):
+        entry = self._entries.pop(cache_key, None)
+        if entry is None:
+            return
+        for band_key in entry["bands"]:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(cache_key)
+                if not bucket:
+                    del self._buckets[band_key]
+        self._dirty = True
+
+    def lookup(self, provider: str, engine: str, prompt: str) -> Optional[Tuple[str, float]]:
+        """유사도가 임계값 이상인 가장 가까운 프롬프트의 (캐시 키, 유사도)"""
+        if not self.enabled or not self._entries:
+            return None
+        self._stats["lookups"] += 1
+        items = shingles(prompt, self.ngram)
+        if not items:
+            return None
+
+        scope = self._scope(provider, engine)
+        candidates: Set[str] = set()
+        for band_key in self._band_keys(scope, self._hasher.signature(items)):
+            candidates.update(self._buckets.get(band_key, ()))
+        self._stats["candidates"] += len(candidates)
+
+        threshold = self.threshold_for(engine)
+        prompt_numbers = numbers(prompt)
+        prompt_roles = direction_roles(prompt)
+        now = time.time()
+        best: Optional[Tuple[str, float]] = None
+        for cache_key in candidates:
+            entry = self._entries[cache_key]
+            if now - entry["stored_at"] >= self.ttl_seconds or entry["numbers"] != prompt_numbers:
+                continue
+            if entry.get("roles") != prompt_roles:
+                continue
+            similarity = jaccard(items, set(entry["shingles"]))
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (cache_key, similarity)
+
+        if best is not None:
+            self._stats["hits"] += 1
+        return best
+
+    # ------------------------------------------------------------------
+    # snapshot
+    # ------------------------------------------------------------------
+    def load(self):
+        """디스크 스냅샷 복원 (만료 항목과 설정이 다른 스냅샷은 무시)"""
+        if not self.snapshot_path.exists():
+            return
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load prompt index snapshot: {e}")
+            return
+        if data.get("params") != self._params():
+            logger.info("Prompt index snapshot parameters changed, starting empty")
+            return
+        now = time.time()
+        for cache_key, entry in data.get("entries", []):
+            if now - entry["stored_at"] < self.ttl_seconds:
+                self._insert(cache_key, entry)
+        logger.info(f"Prompt index loaded {len(self._entries)} entries")
+
+    def _params(self) -> Dict[str, Any]:
+        # roles: 방향 역할을 저장하지 않던 스냅샷은 버린다
+        return {"ngram": self.ngram, "num_perm": self.num_perm, "bands": self.bands, "roles": 1}
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"params": self._params(), "entries": list(self._entries.items())}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"Failed to save prompt index snapshot: {e}")
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            self.save()
+
+    def start(self):
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.save()
+
+    def clear(self):
+        self._entries.clear()
+        self._buckets.clear()
+        self._dirty = True
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["lookups"]
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "buckets": len(self._buckets),
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "default_threshold": self.default_threshold,
+            "thresholds": self.thresholds,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            **self._stats,
+        }
+
+
+# 전역 근사 중복 프롬프트 인덱스
+prompt_index = PromptIndex()
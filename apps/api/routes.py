@@ -1,16 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 import os
 from pathlib import Path
 import json
+import math
+import asyncio
 import uuid
 import logging
 import base64
 from datetime import datetime
 from typing import Dict, Any, Optional
-from llm_adapter import get_llm_adapter
+from fastapi.responses import StreamingResponse, JSONResponse
+from generation_service import generation_service
+from generation_jobs import generation_jobs, job_to_dict
+from concurrency_limiter import LLMOverloadedError
 from database import db
-from auth import get_current_active_user
+from auth import get_current_active_user, get_optional_user, User
 from export_service import export_service
+from diagram_converter import diagram_converter, to_visjs, ENGINES
+from diagram_parser import DiagramParseError, parse_diagram
+from diagram_layout import layout_engine, LAYERED, ALGORITHMS
+from diagram_clustering import diagram_clusterer, CLUSTER_PREFIX
+from code_blobs import code_blob_store
+from diagram_canonical import diagram_canonicalizer
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -41,13 +52,29 @@ def save_shares(data: Dict[str, Any]):
     except Exception as e:
         logger.error(f"Failed to save shares DB: {e}")
 
+def _requester(http_request: Request, current_user: Optional[User]):
+    """스케줄러 흐름 식별자와 플랜 (비로그인 요청은 클라이언트 IP 단위의 anonymous 흐름)"""
+    if current_user is not None:
+        return f"user:{current_user.id}", current_user.plan
+    client = http_request.client.host if http_request.client else "unknown"
+    return f"anon:{client}", "anonymous"
+
 @router.post("/generate")
-async def generate_diagram(request: Dict[str, Any]):
-    """프롬프트로부터 다이어그램 코드 생성"""
+async def generate_diagram(
+    request: Dict[str, Any],
+    http_request: Request,
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """프롬프트로부터 다이어그램 코드 생성
+
+    "async": true 이면 생성 작업을 등록하고 즉시 202 와 job_id 를 반환한다.
+    결과는 GET /generate/jobs/{job_id} 로 조회한다.
+    """
     try:
         prompt = request.get("prompt", "")
         engine = request.get("engine", "mermaid")
         provider = request.get("provider", "mock")  # 기본값을 mock으로 변경
+        user_key, plan = _requester(http_request, current_user)
 
         # 요청 로깅
         logger.info(f"📝 Diagram generation request received:")
@@ -55,14 +82,25 @@ async def generate_diagram(request: Dict[str, Any]):
         logger.info(f"   - Engine: {engine}")
         logger.info(f"   - Prompt: {prompt[:100]}{'...' if len(prompt) > 100 else ''}")
 
-        # LLM 어댑터 가져오기
-        adapter = get_llm_adapter(provider)
-        logger.info(f"🔧 Using LLM adapter: {type(adapter).__name__}")
+        # 레이아웃 인자는 생성 전에 검증 (생성 후에는 파싱/크기 오류만 건너뛴다)
+        layout = request.get("layout")
+        if layout is not None and layout is not False and layout not in ALGORITHMS:
+            raise HTTPException(status_code=400, detail=f"Unsupported layout algorithm: {layout}. Use one of {', '.join(ALGORITHMS)}")
+        layout_options = _layout_options(request) if layout else {}
+
+        if request.get("async"):
+            job = await db.create_generation_job(prompt, engine, provider, user_key, plan)
+            generation_jobs.notify()
+            logger.info(f"📥 Generation job queued: {job.id}")
+            return JSONResponse(status_code=202, content={
+                "success": True,
+                "job_id": str(job.id),
+                "status": job.status,
+                "status_url": f"/api/v1/generate/jobs/{job.id}"
+            })
 
-        # 다이어그램 코드 생성
-        logger.info("🚀 Starting diagram code generation...")
-        result = await adapter.generate_diagram_code(prompt, engine)
-        logger.info(f"✅ Generation completed. Success: {result.get('success', False)}")
+        # 캐시 → 플랜 가중 대기열 → LLM 어댑터 → 저장
+        result = await generation_service.generate(prompt, engine, provider, user_key, plan)
 
         if not result['success']:
             error_msg = result.get('error', 'Generation failed')
@@ -71,30 +109,161 @@ async def generate_diagram(request: Dict[str, Any]):
 
         logger.info(f"📊 Generated code length: {len(result.get('code', ''))} characters")
 
-        # 다이어그램 저장 (JSON DB 사용)
-        diagram = await db.create_diagram(
-            engine=engine,
-            code=result['code'],
-            render_type="readonly",
-            prompt=prompt,
-            meta=result.get('metadata', {}),
-            ttl_hours=24  # 24시간 TTL
-        )
-
-        logger.info(f"💾 Diagram saved with ID: {diagram.id}")
+        code = result['code']
+        metadata = result.get('metadata', {})
+        if layout and result['engine'] == "visjs":
+            # 저장된 코드는 그대로 두고 응답에만 서버 측 좌표를 붙인다
+            try:
+                code, layout_stats = await asyncio.to_thread(
+                    layout_engine.layout_visjs, code, "visjs", layout, request.get("direction"), **layout_options
+                )
+                metadata = {**metadata, "layout": layout_stats}
+            except DiagramParseError as e:
+                logger.warning(f"📐 Layout skipped: {e}")
 
         return {
             "success": True,
-            "diagram_id": diagram.id,
-            "code": result['code'],
-            "engine": engine,
-            "metadata": result.get('metadata', {})
+            "diagram_id": result['diagram_id'],
+            "code": code,
+            "engine": result['engine'],
+            "metadata": metadata
         }
 
+    except HTTPException:
+        raise
+    except LLMOverloadedError as e:
+        logger.warning(f"🚦 {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
     except Exception as e:
         logger.error(f"💥 Unexpected error in generate_diagram: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/generate/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    """비동기 생성 작업 상태 조회 (완료 시 다이어그램 코드 포함)"""
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    job = await db.get_generation_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    diagram = await db.get_diagram(str(job.diagram_id)) if job.diagram_id else None
+    return {"success": True, **job_to_dict(job, diagram)}
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Server-Sent Events 프레임 직렬화"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+@router.post("/generate/stream")
+async def generate_diagram_stream(
+    request: Dict[str, Any],
+    http_request: Request,
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """프롬프트로부터 다이어그램 코드를 SSE로 스트리밍 생성
+
+    이벤트: progress(진행 상황), chunk(부분 코드), done(저장된 최종 결과), error(실패)
+    """
+    prompt = request.get("prompt", "")
+    engine = request.get("engine", "mermaid")
+    provider = request.get("provider", "mock")
+    user_key, plan = _requester(http_request, current_user)
+
+    logger.info(f"📝 Streaming diagram generation request received:")
+    logger.info(f"   - Provider: {provider}")
+    logger.info(f"   - Engine: {engine}")
+    logger.info(f"   - Prompt: {prompt[:100]}{'...' if len(prompt) > 100 else ''}")
+
+    async def event_stream():
+        yield _sse_event("progress", {"stage": "started", "engine": engine, "provider": provider})
+        try:
+            async for event in generation_service.stream(prompt, engine, provider, user_key, plan):
+                event_type = event.pop("type")
+                yield _sse_event(event_type, event)
+        except LLMOverloadedError as e:
+            logger.warning(f"🚦 {e}")
+            yield _sse_event("error", {"error": str(e), "engine": engine, "status": 503, "retry_after": math.ceil(e.retry_after)})
+        except Exception as e:
+            logger.error(f"💥 Unexpected error in generate_diagram_stream: {str(e)}", exc_info=True)
+            yield _sse_event("error", {"error": str(e), "engine": engine})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # 프록시 버퍼링 비활성화
+        },
+    )
+
+BATCH_MAX_ITEMS = int(os.getenv("GENERATION_BATCH_MAX_ITEMS", "500"))
+BATCH_DEFAULT_PARALLELISM = int(os.getenv("GENERATION_BATCH_PARALLELISM", "4"))
+BATCH_MAX_PARALLELISM = int(os.getenv("GENERATION_BATCH_MAX_PARALLELISM", "16"))
+
+@router.post("/generate/batch")
+async def generate_diagram_batch(
+    request: Dict[str, Any],
+    http_request: Request,
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """프롬프트 목록을 제한된 병렬도로 일괄 생성하고 완료 순서대로 NDJSON 으로 전달
+
+    요청: {"items": [{"prompt", "engine", "provider"}, ...], "parallelism": 4}
+    engine/provider 를 최상위에 주면 항목의 기본값으로 쓴다.
+    각 줄은 {"index", "success", "diagram_id", "code", "engine", "metadata"} 또는 {"index", "success": false, "error"},
+    마지막 줄은 {"done": true, "total", "succeeded", "failed"}.
+    """
+    items = request.get("items")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="items must be a non-empty list")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many items (max {BATCH_MAX_ITEMS})")
+    if not all(isinstance(item, dict) and item.get("prompt") for item in items):
+        raise HTTPException(status_code=400, detail="Every item needs a prompt")
+
+    default_engine = request.get("engine", "mermaid")
+    default_provider = request.get("provider", "mock")
+    items = [
+        {"engine": default_engine, "provider": default_provider, **item}
+        for item in items
+    ]
+    try:
+        parallelism = min(max(1, int(request.get("parallelism", BATCH_DEFAULT_PARALLELISM))), BATCH_MAX_PARALLELISM)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="parallelism must be a number")
+    user_key, plan = _requester(http_request, current_user)
+
+    logger.info(f"📝 Batch generation request received: {len(items)} items, parallelism {parallelism}")
+
+    async def ndjson_stream():
+        succeeded = 0
+        failed = 0
+        try:
+            async for result in generation_service.generate_batch(items, parallelism, user_key, plan):
+                if result.get("success"):
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield json.dumps(result, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            logger.error(f"💥 Unexpected error in generate_diagram_batch: {str(e)}", exc_info=True)
+            yield json.dumps({"success": False, "error": str(e)}, ensure_ascii=False) + "\n"
+        yield json.dumps({"done": True, "total": len(items), "succeeded": succeeded, "failed": failed}) + "\n"
+
+    return StreamingResponse(
+        ndjson_stream(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
 @router.get("/diagrams/{diagram_id}")
 async def get_diagram(diagram_id: str):
     """다이어그램 조회"""
@@ -112,6 +281,173 @@ async def get_diagram(diagram_id: str):
         "created_at": diagram.created_at
     }
 
+@router.post("/diagrams/{diagram_id}/convert")
+async def convert_diagram(diagram_id: str, to: str):
+    """다이어그램 엔진 변환 (Mermaid 플로우차트 / vis.js JSON / DOT, LLM 재생성 없이 그래프 모델로 변환)"""
+    if to not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unsupported target engine: {to}. Use one of {', '.join(ENGINES)}")
+
+    diagram = await db.get_diagram(diagram_id)
+    if not diagram:
+        raise HTTPException(status_code=404, detail="Diagram not found")
+
+    try:
+        code, cached = diagram_converter.convert(diagram.code, diagram.engine, to)
+    except DiagramParseError as e:
+        raise HTTPException(status_code=400, detail=f"Cannot convert {diagram.engine} diagram: {e}")
+
+    return {
+        "success": True,
+        "diagram_id": diagram.id,
+        "source_engine": diagram.engine,
+        "engine": to,
+        "code": code,
+        "cached": cached,
+    }
+
+def _layout_options(request: Dict[str, Any]) -> Dict[str, Any]:
+    """force 레이아웃 반복 예산 (iterations / deadline_ms)"""
+    options = {}
+    try:
+        if request.get("iterations") is not None:
+            options["iterations"] = max(1, int(request["iterations"]))
+        if request.get("deadline_ms") is not None:
+            options["deadline_ms"] = max(1.0, float(request["deadline_ms"]))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="iterations and deadline_ms must be numbers")
+    return options
+
+@router.post("/layout")
+async def layout_diagram(request: Dict[str, Any]):
+    """서버 측 레이아웃 (고정 x/y 좌표가 들어간 vis.js JSON 반환, 다른 엔진은 vis.js 로 변환 후 배치)
+
+    algorithm: layered(계층형, 기본) | force(Barnes–Hut 힘 기반, iterations / deadline_ms 로 예산 지정)
+    """
+    code = request.get("code", "")
+    engine = request.get("engine", "visjs")
+    algorithm = request.get("algorithm", LAYERED)
+    if engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unsupported engine: {engine}. Use one of {', '.join(ENGINES)}")
+    if algorithm not in ALGORITHMS:
+        raise HTTPException(status_code=400, detail=f"Unsupported layout algorithm: {algorithm}. Use one of {', '.join(ALGORITHMS)}")
+    if not code.strip():
+        raise HTTPException(status_code=400, detail="code is required")
+
+    try:
+        # 대형 그래프 레이아웃은 CPU 작업이므로 이벤트 루프를 막지 않도록 스레드에서 실행
+        laid_out, stats = await asyncio.to_thread(
+            layout_engine.layout_visjs, code, engine, algorithm, request.get("direction"), **_layout_options(request)
+        )
+    except DiagramParseError as e:
+        raise HTTPException(status_code=400, detail=f"Cannot lay out {engine} diagram: {e}")
+
+    return {
+        "success": True,
+        "source_engine": engine,
+        "engine": "visjs",
+        "code": laid_out,
+        "layout": stats,
+    }
+
+@router.post("/diagrams/{diagram_id}/layout")
+async def layout_stored_diagram(diagram_id: str, request: Dict[str, Any]):
+    """저장된 vis.js 다이어그램을 서버에서 배치하고 좌표를 Diagram.code 에 기록"""
+    algorithm = request.get("algorithm", LAYERED)
+    if algorithm not in ALGORITHMS:
+        raise HTTPException(status_code=400, detail=f"Unsupported layout algorithm: {algorithm}. Use one of {', '.join(ALGORITHMS)}")
+
+    diagram = await db.get_diagram(diagram_id)
+    if not diagram:
+        raise HTTPException(status_code=404, detail="Diagram not found")
+    if diagram.engine != "visjs":
+        raise HTTPException(
+            status_code=400,
+            detail=f"Only vis.js diagrams store positions. Convert first: POST /api/v1/diagrams/{diagram_id}/convert?to=visjs"
+        )
+
+    try:
+        code, stats = await asyncio.to_thread(
+            layout_engine.layout_visjs, diagram.code, "visjs", algorithm, request.get("direction"), **_layout_options(request)
+        )
+    except DiagramParseError as e:
+        raise HTTPException(status_code=400, detail=f"Cannot lay out diagram: {e}")
+
+    canonical_hash = await asyncio.to_thread(diagram_canonicalizer.fingerprint, code, "visjs")
+    await db.update_diagram(diagram_id, code=code, meta_updates={"layout": stats, "canonical_hash": canonical_hash})
+    return {
+        "success": True,
+        "diagram_id": diagram.id,
+        "engine": "visjs",
+        "code": code,
+        "layout": stats,
+    }
+
+async def _cluster_summary(diagram):
+    """저장된 클러스터 요약 (구조가 바뀌었거나 없으면 계산해 Diagram.meta 에 저장)"""
+    graph = await asyncio.to_thread(parse_diagram, diagram.code, diagram.engine)
+    summary = (diagram.meta or {}).get("clusters")
+    if not summary or summary.get("structure_hash") != graph.structure_hash("clusters"):
+        summary = await asyncio.to_thread(diagram_clusterer.summarize, graph)
+        await db.update_diagram(diagram.id, meta_updates={"clusters": summary})
+    return graph, summary
+
+@router.get("/diagrams/{diagram_id}/overview")
+async def get_diagram_overview(diagram_id: str):
+    """대형 다이어그램 개요 (클러스터당 노드 하나, 크기는 CLUSTER_MAX_OVERVIEW 이하)
+
+    작은 다이어그램은 collapsed: false 와 함께 전체 vis.js 코드를 그대로 반환한다.
+    """
+    diagram = await db.get_diagram(diagram_id)
+    if not diagram:
+        raise HTTPException(status_code=404, detail="Diagram not found")
+
+    try:
+        graph, summary = await _cluster_summary(diagram)
+        collapsed = summary["node_count"] > diagram_clusterer.min_nodes
+        if collapsed:
+            code = json.dumps(diagram_clusterer.overview(diagram.code, diagram.engine, graph, summary), ensure_ascii=False)
+        else:
+            code = diagram.code if diagram.engine == "visjs" else to_visjs(graph)
+    except DiagramParseError as e:
+        raise HTTPException(status_code=400, detail=f"Cannot summarize {diagram.engine} diagram: {e}")
+
+    return {
+        "success": True,
+        "diagram_id": diagram.id,
+        "engine": "visjs",
+        "collapsed": collapsed,
+        "node_count": summary["node_count"],
+        "cluster_count": len(summary["clusters"]),
+        "clusters": [{k: c[k] for k in ("id", "label", "size")} for c in summary["clusters"]],
+        "code": code,
+    }
+
+@router.get("/diagrams/{diagram_id}/clusters/{cluster_id}")
+async def expand_diagram_cluster(diagram_id: str, cluster_id: str):
+    """개요의 클러스터 하나 펼치기 (구성 노드/내부 엣지 + 다른 클러스터 노드로 향하는 경계 엣지)"""
+    diagram = await db.get_diagram(diagram_id)
+    if not diagram:
+        raise HTTPException(status_code=404, detail="Diagram not found")
+    if not cluster_id.startswith(CLUSTER_PREFIX):
+        cluster_id = f"{CLUSTER_PREFIX}{cluster_id}"
+
+    try:
+        graph, summary = await _cluster_summary(diagram)
+        if not any(c["id"] == cluster_id for c in summary["clusters"]):
+            raise HTTPException(status_code=404, detail="Cluster not found")
+        data = diagram_clusterer.expand(diagram.code, diagram.engine, graph, summary, cluster_id)
+    except DiagramParseError as e:
+        raise HTTPException(status_code=400, detail=f"Cannot expand {diagram.engine} diagram: {e}")
+
+    return {
+        "success": True,
+        "diagram_id": diagram.id,
+        "cluster_id": cluster_id,
+        "engine": "visjs",
+        "node_count": len(data["nodes"]),
+        "code": json.dumps(data, ensure_ascii=False),
+    }
+
 @router.post("/exports")
 async def create_export(request: Dict[str, Any]):
     """익스포트 생성"""
@@ -177,9 +513,16 @@ async def create_share(request: Dict[str, Any]):
             "pin": pin,
             "title": title,
             "engine": engine,
-            "code": code,
             "created_at": datetime.now().isoformat(),
         }
+        # 코드는 code_blobs 에 한 번만 저장하고 해시로 참조 (DB 를 쓸 수 없으면 예전처럼 직접 저장)
+        if code_blob_store.enabled:
+            try:
+                payload["code_hash"] = await db.acquire_code_blob(code)
+            except Exception as e:
+                logger.warning(f"Share code stored inline: {e}")
+        if "code_hash" not in payload:
+            payload["code"] = code
         shares = load_shares()
         shares[share_id] = payload
         save_shares(shares)
@@ -220,11 +563,16 @@ async def share_unlock(share_id: str, request: Dict[str, Any]):
     pin = request.get("pin")
     if not pin or str(pin).strip().upper() != data["pin"]:
         raise HTTPException(status_code=403, detail="Invalid PIN")
+    code = data.get("code")
+    if code is None:
+        code = await db.get_code_blob(data["code_hash"])
+        if code is None:
+            raise HTTPException(status_code=404, detail="Not found")
     return {
         "id": data["id"],
         "title": data["title"],
         "engine": data["engine"],
-        "code": data["code"],
+        "code": code,
         "created_at": data["created_at"],
     }
 
@@ -0,0 +1,75 @@
+# apps/api/scripts/migrate_code_blobs.py
+"""기존 다이어그램 코드를 content-addressed blob(code_blobs 테이블)으로 옮기는 마이그레이션
+
+apps/api 에서 실행:
+    python scripts/migrate_code_blobs.py [--batch-size 500] [--skip-shares] [--purge]
+
+diagrams / task_versions(키프레임) 중 code 를 직접 담고 있는 행을 배치 단위로 blob 참조로 바꾸고,
+data/shares.json 의 공유 코드도 code_hash 로 바꾼다. 이미 옮긴 행은 건너뛰므로 중단 후 다시 실행해도 된다.
+옮기지 않은 행도 그대로 읽히므로 서비스 중에 실행해도 된다.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import db  # noqa: E402
+
+SHARE_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "shares.json"
+
+
+async def migrate_rows(batch_size: int) -> None:
+    totals = {"diagrams": 0, "task_versions": 0}
+    while True:
+        migrated = await db.migrate_inline_code_to_blobs(batch_size)
+        for key, count in migrated.items():
+            totals[key] += count
+        print(f"  batch: {migrated}  total: {totals}")
+        if not any(migrated.values()):
+            break
+
+
+async def migrate_shares() -> None:
+    if not SHARE_DB_PATH.exists():
+        print("  shares.json not found, skipped")
+        return
+    with open(SHARE_DB_PATH, "r", encoding="utf-8") as f:
+        shares = json.load(f)
+    moved = 0
+    for payload in shares.values():
+        code = payload.get("code")
+        if code is None or "code_hash" in payload:
+            continue
+        payload["code_hash"] = await db.acquire_code_blob(code)
+        del payload["code"]
+        moved += 1
+    # 파일은 끝에서 한 번에 교체 (중간에 실패하면 늘린 참조 수만 남아 해당 blob 이 정리되지 않을 뿐 코드는 보존됨)
+    tmp_path = SHARE_DB_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(shares, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(SHARE_DB_PATH)
+    print(f"  shares moved: {moved}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--skip-shares", action="store_true")
+    parser.add_argument("--purge", action="store_true", help="참조 수가 0 인 blob 삭제")
+    args = parser.parse_args()
+
+    print("diagrams / task_versions")
+    await migrate_rows(args.batch_size)
+    if not args.skip_shares:
+        print("shares.json")
+        await migrate_shares()
+    if args.purge:
+        print(f"purged blobs: {await db.purge_unreferenced_code_blobs()}")
+    print(await db.get_code_blob_stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
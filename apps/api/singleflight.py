@@ -0,0 +1,62 @@
+# apps/api/singleflight.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """동일 키의 동시 요청을 하나의 업스트림 작업으로 합치는 in-flight 레지스트리
+
+    첫 호출자(leader)가 작업을 태스크로 띄우고, 같은 키로 들어온 호출자는 그 태스크를 함께 기다린다.
+    각 대기자는 asyncio.shield 로 기다리므로 한 대기자가 취소되거나 타임아웃 되어도
+    업스트림 작업과 다른 대기자에게는 영향이 없다.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {
+            "leaders": 0,
+            "coalesced": 0,
+            "timeouts": 0,
+            "cancelled_waiters": 0,
+        }
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 모든 대기자가 떠난 뒤 실패한 경우 "exception was never retrieved" 경고 방지
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"[{self.name}] upstream for {key[:12]} failed: {task.exception()}")
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]],
+                 timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """키에 대한 작업 결과와 합류 여부(shared) 반환"""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            self._stats["leaders"] += 1
+        else:
+            self._stats["coalesced"] += 1
+            logger.info(f"🤝 [{self.name}] joined in-flight request {key[:12]}")
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise
+        except asyncio.CancelledError:
+            self._stats["cancelled_waiters"] += 1
+            raise
+        return result, shared
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            **self._stats,
+        }
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any, List, Optional
+import asyncio
 import logging
 from database import db
 from models import Task, TaskMessage, TaskVersion
 from auth import get_current_active_user
+from diagram_diff import diagram_differ
+from diagram_layout import ALGORITHMS, FORCE
+from diagram_parser import DiagramParseError
+from layout_cache import layout_cache
 
 logger = logging.getLogger(__name__)
 
@@ -311,3 +316,72 @@ async def get_task_version(
     except Exception as e:
         logger.error(f"Failed to get task version: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/task-versions/{version_id}/layout")
+async def get_task_version_layout(
+    version_id: str,
+    algorithm: str = FORCE,
+    current_user = Depends(get_current_active_user)
+):
+    """버전 노드 좌표 조회 (구조 해시 캐시 → 직전 버전 좌표 기반 증분 배치 → 전체 레이아웃)"""
+    try:
+        if algorithm not in ALGORITHMS:
+            raise HTTPException(status_code=400, detail=f"Unsupported layout algorithm: {algorithm}")
+
+        version = await db.get_task_version(version_id)
+        if not version:
+            raise HTTPException(status_code=404, detail="Version not found")
+        
+        task = await db.get_task(version.task_id)
+        if not task or task.user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Access denied")
+        
+        try:
+            result = await layout_cache.layout_version(version, algorithm)
+        except DiagramParseError as e:
+            raise HTTPException(status_code=400, detail=f"Cannot lay out {version.engine} version: {e}")
+
+        return {
+            "success": True,
+            "version_id": version.id,
+            **result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to lay out task version: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/task-versions/{a}/diff/{b}")
+async def diff_task_versions(
+    a: str,
+    b: str,
+    current_user = Depends(get_current_active_user)
+):
+    """두 버전의 노드/엣지/라벨 단위 구조 비교 (그래프로 해석할 수 없으면 줄 단위 diff)"""
+    try:
+        versions = []
+        for version_id in (a, b):
+            version = await db.get_task_version(version_id)
+            if not version:
+                raise HTTPException(status_code=404, detail=f"Version not found: {version_id}")
+            versions.append(version)
+        
+        for task_id in {version.task_id for version in versions}:
+            task = await db.get_task(task_id)
+            if not task or task.user_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Access denied")
+        
+        diff, cached = await asyncio.to_thread(diagram_differ.diff_versions, versions[0], versions[1])
+        return {
+            "success": True,
+            "from_version": versions[0].id,
+            "to_version": versions[1].id,
+            "cached": cached,
+            **diff
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to diff task versions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
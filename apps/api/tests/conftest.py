@@ -0,0 +1,20 @@
+# apps/api/tests/conftest.py
+"""테스트 공통 설정
+
+database 모듈은 import 시점에 PostgreSQL 에 연결하므로 DB 없이 돌리는 테스트를 위해
+빈 db 객체만 가진 가짜 모듈을 먼저 등록한다. 필요한 메서드는 각 테스트에서 monkeypatch 로 채운다.
+"""
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class _FakeDatabase:
+    """테스트에서 monkeypatch 로 메서드를 채우는 빈 db"""
+
+
+_database = types.ModuleType("database")
+_database.db = _FakeDatabase()
+sys.modules["database"] = _database
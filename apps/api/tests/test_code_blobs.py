@@ -0,0 +1,113 @@
+# apps/api/tests/test_code_blobs.py
+"""code_blobs 회귀 테스트
+
+참조 수 테스트는 PostgreSQL 이 필요하므로 TEST_DATABASE_URL 이 있을 때만 실행한다.
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from code_blobs import CodeBlobStore, canonicalize_code, code_blob_hash  # noqa: E402
+
+
+def test_canonicalize_normalizes_line_endings_and_trailing_space():
+    assert canonicalize_code("\r\ngraph TD  \r\nA --> B\t\r\n\n") == "graph TD\nA --> B"
+    assert canonicalize_code("graph TD\rA --> B") == "graph TD\nA --> B"
+
+
+def test_canonicalize_keeps_indentation_and_inner_blank_lines():
+    code = "graph TD\n  A --> B\n\n  B --> C"
+    assert canonicalize_code(code) == code
+
+
+def test_equivalent_code_shares_a_blob():
+    store = CodeBlobStore()
+    first = store.prepare("graph TD\r\nA --> B  \n")
+    second = store.prepare("graph TD\nA --> B")
+
+    assert first == second
+    assert first[1] == code_blob_hash("graph TD\nA --> B")
+    assert store.prepare("graph TD\nA --> C")[1] != first[1]
+
+
+def test_cache_evicts_by_bytes():
+    store = CodeBlobStore()
+    store.max_bytes = 10
+    store.put("a", "12345")
+    store.put("b", "12345")
+    store.get("a")
+    store.put("c", "12345")
+
+    assert store.get("a") == "12345"
+    assert store.get("b") is None
+    assert store.stats()["bytes"] == 10
+    assert store.stats()["evictions"] == 1
+
+
+def test_oversized_code_is_not_cached():
+    store = CodeBlobStore()
+    store.max_bytes = 4
+    store.put("a", "12345")
+
+    assert store.get("a") is None
+    assert store.stats()["size"] == 0
+
+
+@pytest.fixture
+def pg(monkeypatch):
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    monkeypatch.setenv("DATABASE_URL", url)
+    import database_pg
+    return database_pg
+
+
+def _ref_count(pg, digest):
+    session = pg.db.get_db()
+    try:
+        blob = session.query(pg.CodeBlob).filter(pg.CodeBlob.hash == digest).first()
+        return None if blob is None else blob.ref_count
+    finally:
+        session.close()
+
+
+def test_identical_diagrams_share_one_counted_blob(pg):
+    code = f"graph TD\nA --> B{uuid.uuid4().hex}"
+
+    async def run():
+        first = await pg.db.create_diagram(code=code + "  \n")
+        second = await pg.db.create_diagram(code=code)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first.code == second.code == code
+    assert _ref_count(pg, code_blob_hash(code)) == 2
+
+
+def test_replacing_code_moves_the_reference(pg):
+    old_code = f"graph TD\nA --> B{uuid.uuid4().hex}"
+    new_code = f"graph TD\nA --> C{uuid.uuid4().hex}"
+
+    async def run():
+        diagram = await pg.db.create_diagram(code=old_code)
+        updated = await pg.db.update_diagram(str(diagram.id), code=new_code)
+        purged = await pg.db.purge_unreferenced_code_blobs()
+        return updated, purged
+
+    updated, purged = asyncio.run(run())
+
+    assert updated.code == new_code
+    assert _ref_count(pg, code_blob_hash(new_code)) == 1
+    assert purged >= 1
+    assert _ref_count(pg, code_blob_hash(old_code)) is None
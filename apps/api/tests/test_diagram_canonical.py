@@ -0,0 +1,105 @@
+# apps/api/tests/test_diagram_canonical.py
+"""diagram_canonical 회귀 테스트
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagram_canonical import DiagramCanonicalizer, canonicalize  # noqa: E402
+
+
+def _hash(code: str, engine: str = "mermaid") -> str:
+    return canonicalize(code, engine)[1]
+
+
+FLOW = "graph TD\nA[Start] --> B{Check}\nB -->|yes| C[Done]\nB -->|no| D[Retry]\nD --> B"
+
+
+@pytest.mark.parametrize("variant", [
+    # 공백/주석
+    "graph TD\n  A[ Start ]   -->  B{Check}\n%% 주석\nB -->|yes| C[Done]\n\nB -->|no| D[Retry]\nD --> B\n",
+    # 노드 ID
+    "graph TD\nx1[Start] --> x2{Check}\nx2 -->|yes| x3[Done]\nx2 -->|no| x4[Retry]\nx4 --> x2",
+    # 문장 순서
+    "graph TD\nD[Retry] --> B{Check}\nB -->|no| D\nB -->|yes| C[Done]\nA[Start] --> B",
+    # 방향 별칭
+    "graph TB\nA[Start] --> B{Check}\nB -->|yes| C[Done]\nB -->|no| D[Retry]\nD --> B",
+])
+def test_equivalent_flowcharts_share_hash(variant):
+    assert _hash(variant) == _hash(FLOW)
+
+
+@pytest.mark.parametrize("different", [
+    # 엣지 방향
+    "graph TD\nA[Start] --> B{Check}\nB -->|yes| C[Done]\nB -->|no| D[Retry]\nB --> D",
+    # 라벨
+    "graph TD\nA[Start] --> B{Check}\nB -->|yes| C[Finished]\nB -->|no| D[Retry]\nD --> B",
+    # 엣지 라벨
+    "graph TD\nA[Start] --> B{Check}\nB -->|ok| C[Done]\nB -->|no| D[Retry]\nD --> B",
+    # 모양
+    "graph TD\nA[Start] --> B[Check]\nB -->|yes| C[Done]\nB -->|no| D[Retry]\nD --> B",
+    # 방향
+    "graph LR\nA[Start] --> B{Check}\nB -->|yes| C[Done]\nB -->|no| D[Retry]\nD --> B",
+    # 엣지 추가
+    "graph TD\nA[Start] --> B{Check}\nB -->|yes| C[Done]\nB -->|no| D[Retry]\nD --> B\nC --> A",
+])
+def test_different_flowcharts_differ(different):
+    assert _hash(different) != _hash(FLOW)
+
+
+def test_unlabelled_node_ids_are_labels():
+    assert _hash("graph TD\nA --> B") != _hash("graph TD\nA --> C")
+
+
+def test_symmetric_graph_ignores_ids():
+    cycle = "graph TD\n" + "\n".join(f"{a}[x] --> {b}[x]" for a, b in ("AB", "BC", "CD", "DA"))
+    renamed = "graph TD\n" + "\n".join(f"{a}[x] --> {b}[x]" for a, b in ("QR", "RP", "PS", "SQ"))
+    assert _hash(cycle) == _hash(renamed)
+
+
+def test_subgraph_ids_do_not_matter():
+    first = "graph TD\nsubgraph api [API]\nA[Handler] --> B[Service]\nend\nB --> C[DB]"
+    second = "graph TD\nsubgraph backend [API]\nH[Handler] --> S[Service]\nend\nS --> D[DB]"
+    assert _hash(first) == _hash(second)
+
+
+def test_visjs_ignores_ids_order_and_positions():
+    first = json.dumps({
+        "nodes": [{"id": 1, "label": "A", "x": 10, "y": 20}, {"id": 2, "label": "B"}],
+        "edges": [{"from": 1, "to": 2, "arrows": "to"}],
+    })
+    second = json.dumps({
+        "nodes": [{"id": "b", "label": "B"}, {"id": "a", "label": "A", "x": -5, "y": 3}],
+        "edges": [{"from": "a", "to": "b", "arrows": "to"}],
+    })
+    assert _hash(first, "visjs") == _hash(second, "visjs")
+    assert _hash(first, "visjs") != _hash(FLOW)
+
+
+def test_non_graph_code_is_normalized_as_text():
+    sequence = "sequenceDiagram\n  Alice->>Bob: Hello\n  Bob-->>Alice: Hi"
+    spaced = "sequenceDiagram\n%% greeting\n\nAlice->>Bob:   Hello\nBob-->>Alice: Hi  "
+    code, digest, structural = canonicalize(sequence, "mermaid")
+
+    assert structural is False
+    assert digest == _hash(spaced)
+    assert digest != _hash("sequenceDiagram\nBob->>Alice: Hello\nBob-->>Alice: Hi")
+
+
+def test_fingerprint_is_cached():
+    canonicalizer = DiagramCanonicalizer()
+
+    first = canonicalizer.fingerprint(FLOW, "mermaid")
+    second = canonicalizer.fingerprint(FLOW, "mermaid")
+
+    assert first == second == _hash(FLOW)
+    stats = canonicalizer.stats()
+    assert stats["hits"] == 1
+    assert stats["structural"] == 1
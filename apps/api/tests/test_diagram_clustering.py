@@ -0,0 +1,127 @@
+# apps/api/tests/test_diagram_clustering.py
+"""diagram_clustering 회귀 테스트
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagram_clustering import CLUSTER_PREFIX, DiagramClusterer, label_propagation  # noqa: E402
+from diagram_parser import DiagramParseError, parse_visjs  # noqa: E402
+
+
+def _cliques(count: int, size: int, bridges: bool = True) -> str:
+    """size 개짜리 완전 그래프 count 개 (bridges 면 이웃 클리크끼리 엣지 하나로 연결)"""
+    nodes, edges = [], []
+    for c in range(count):
+        members = [c * size + i + 1 for i in range(size)]
+        nodes.extend({"id": m, "label": f"n{m}"} for m in members)
+        edges.extend({"from": a, "to": b} for i, a in enumerate(members) for b in members[i + 1:])
+        if bridges and c:
+            edges.append({"from": members[0], "to": members[0] - size})
+    return json.dumps({"nodes": nodes, "edges": edges})
+
+
+@pytest.fixture
+def clusterer():
+    clusterer = DiagramClusterer()
+    clusterer.max_overview = 5
+    return clusterer
+
+
+def test_label_propagation_separates_bridged_cliques():
+    members = [list(range(0, 5)), list(range(5, 10))]
+    pairs = [(a, b) for group in members for i, a in enumerate(group) for b in group[i + 1:]] + [(0, 5)]
+    src = np.array([a for a, _ in pairs])
+    dst = np.array([b for _, b in pairs])
+
+    labels = label_propagation(10, src, dst)
+
+    assert len(set(labels[:5])) == 1
+    assert len(set(labels[5:])) == 1
+    assert labels[0] != labels[5]
+
+
+def test_label_propagation_without_edges_keeps_singletons():
+    assert label_propagation(3, np.array([], dtype=np.int64), np.array([], dtype=np.int64)).tolist() == [0, 1, 2]
+
+
+def test_summary_finds_cliques(clusterer):
+    graph = parse_visjs(_cliques(4, 6))
+
+    summary = clusterer.summarize(graph)
+
+    assert len(summary["clusters"]) == 4
+    for c in range(4):
+        assert len({summary["assignment"][str(c * 6 + i + 1)] for i in range(6)}) == 1
+    assert sorted(tuple(edge[:2]) for edge in summary["edges"]) == sorted(
+        {tuple(sorted((summary["assignment"][str(c * 6 + 1)], summary["assignment"][str(c * 6 - 5)])))
+         for c in range(1, 4)})
+
+
+@pytest.mark.parametrize("bridges", [True, False])
+def test_overview_never_exceeds_limit(clusterer, bridges):
+    graph = parse_visjs(_cliques(40, 5, bridges))
+
+    summary = clusterer.summarize(graph)
+
+    assert len(summary["clusters"]) <= clusterer.max_overview
+    assert sum(cluster["size"] for cluster in summary["clusters"]) == 200
+    sizes = [cluster["size"] for cluster in summary["clusters"]]
+    assert sizes == sorted(sizes, reverse=True)
+    assert set(summary["assignment"]) == set(graph.nodes)
+
+
+def test_small_graph_is_not_clustered(clusterer):
+    graph = parse_visjs(_cliques(1, 3))
+
+    summary = clusterer.summarize(graph)
+
+    assert len(summary["clusters"]) == 3
+    assert summary["node_count"] == 3
+
+
+def test_overview_has_one_node_per_cluster(clusterer):
+    code = _cliques(4, 6)
+    graph = parse_visjs(code)
+    summary = clusterer.summarize(graph)
+
+    overview = clusterer.overview(code, "visjs", graph, summary)
+
+    assert [node["id"] for node in overview["nodes"]] == [cluster["id"] for cluster in summary["clusters"]]
+    assert all(node["value"] == 6 for node in overview["nodes"])
+    assert sum(edge["value"] for edge in overview["edges"]) == 3
+
+
+def test_expand_returns_members_and_boundary_edges(clusterer):
+    code = _cliques(4, 6)
+    graph = parse_visjs(code)
+    summary = clusterer.summarize(graph)
+    cluster_id = summary["clusters"][0]["id"]
+    target = summary["assignment"][summary["clusters"][0]["hub"]]
+
+    expanded = clusterer.expand(code, "visjs", graph, summary, cluster_id)
+
+    assert len(expanded["nodes"]) == 6
+    assert all(summary["assignment"][str(node["id"])] == target for node in expanded["nodes"])
+    internal = [edge for edge in expanded["edges"] if not edge.get("dashes")]
+    boundary = [edge for edge in expanded["edges"] if edge.get("dashes")]
+    assert len(internal) == 15
+    assert boundary
+    assert all(CLUSTER_PREFIX in str(edge["from"]) + str(edge["to"]) for edge in boundary)
+
+
+def test_expand_unknown_cluster_raises(clusterer):
+    code = _cliques(2, 3)
+    graph = parse_visjs(code)
+    summary = clusterer.summarize(graph)
+
+    with pytest.raises(DiagramParseError):
+        clusterer.expand(code, "visjs", graph, summary, f"{CLUSTER_PREFIX}99")
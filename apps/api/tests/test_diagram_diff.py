@@ -0,0 +1,117 @@
+# apps/api/tests/test_diagram_diff.py
+"""diagram_diff 회귀 테스트
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagram_diff import GRAPH, TEXT, DiagramDiffer, diff_graphs, diff_text  # noqa: E402
+from diagram_parser import parse_mermaid  # noqa: E402
+
+
+def _diff(old: str, new: str):
+    return diff_graphs(parse_mermaid(old), parse_mermaid(new))
+
+
+def test_identical_graphs_are_unchanged():
+    result = _diff("graph TD\nA[Start] --> B[End]", "graph TD\nA[Start] --> B[End]")
+
+    assert result["mode"] == GRAPH
+    assert result["unchanged"] is True
+    assert not any(result["summary"].values())
+
+
+def test_added_removed_and_changed_nodes():
+    result = _diff("graph TD\nA[Start] --> B[Old]\nB --> C[Gone]",
+                   "graph TD\nA[Start] --> B[New]\nB --> D[Fresh]")
+
+    assert [node["id"] for node in result["nodes"]["added"]] == ["D"]
+    assert result["nodes"]["removed"] == ["C"]
+    assert result["nodes"]["changed"] == [{"id": "B", "label": ["Old", "New"]}]
+    assert result["edges"]["added"] == [{"source": "B", "target": "D", "label": None, "directed": True}]
+    assert result["edges"]["removed"] == [{"source": "B", "target": "C"}]
+    assert result["unchanged"] is False
+
+
+def test_id_only_change_is_a_rename():
+    result = _diff("graph TD\nA[Start] --> B[Check]", "graph TD\nA[Start] --> X[Check]")
+
+    assert result["nodes"]["renamed"] == [["B", "X"]]
+    assert result["nodes"]["added"] == []
+    assert result["nodes"]["removed"] == []
+    # 이름만 바뀐 노드로 가는 엣지는 그대로로 본다
+    assert result["edges"]["added"] == []
+    assert result["edges"]["removed"] == []
+
+
+def test_unlabelled_node_with_new_id_is_not_a_rename():
+    result = _diff("graph TD\nA --> B", "graph TD\nA --> C")
+
+    assert result["nodes"]["renamed"] == []
+    assert result["nodes"]["removed"] == ["B"]
+    assert [node["id"] for node in result["nodes"]["added"]] == ["C"]
+
+
+def test_edge_label_and_direction_changes():
+    result = _diff("graph TD\nA -->|yes| B", "graph LR\nA -->|no| B")
+
+    assert result["edges"]["changed"] == [{"source": "A", "target": "B", "label": ["yes", "no"]}]
+    assert result["direction"] == ["TD", "LR"]
+    assert result["unchanged"] is False
+
+
+def test_parallel_edges_are_matched_in_order():
+    result = _diff("graph TD\nA --> B\nA --> B", "graph TD\nA --> B")
+
+    assert result["edges"]["removed"] == [{"source": "A", "target": "B"}]
+    assert result["summary"]["edges_removed"] == 1
+
+
+def test_text_diff_counts_lines():
+    result = diff_text("a\nb\nc", "a\nB\nc\nd")
+
+    assert result["mode"] == TEXT
+    assert result["summary"] == {"lines_added": 2, "lines_removed": 1}
+    assert diff_text("same", "same")["unchanged"] is True
+
+
+@pytest.fixture
+def differ():
+    differ = DiagramDiffer()
+    differ.max_entries = 2
+    return differ
+
+
+def _version(version_id: str, code: str, engine: str = "mermaid"):
+    return SimpleNamespace(id=version_id, code=code, engine=engine)
+
+
+def test_unparseable_code_falls_back_to_text(differ):
+    result = differ.diff("not a diagram {", "visjs", "still not {", "visjs")
+
+    assert result["mode"] == TEXT
+    assert differ.stats()["text_fallbacks"] == 1
+
+
+def test_version_pairs_are_cached(differ):
+    v1 = _version("1", "graph TD\nA --> B")
+    v2 = _version("2", "graph TD\nA --> C")
+    v3 = _version("3", "graph TD\nA --> D")
+
+    first, hit = differ.diff_versions(v1, v2)
+    assert hit is False
+    again, hit = differ.diff_versions(v1, v2)
+    assert hit is True
+    assert again is first
+
+    differ.diff_versions(v2, v3)
+    differ.diff_versions(v1, v3)
+    assert differ.diff_versions(v1, v2)[1] is False
+    assert differ.stats()["size"] == 2
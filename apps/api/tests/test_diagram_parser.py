@@ -0,0 +1,32 @@
+# apps/api/tests/test_diagram_parser.py
+"""diagram_parser 회귀 테스트
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagram_converter import to_dot, to_mermaid  # noqa: E402
+from diagram_parser import parse_visjs  # noqa: E402
+
+
+def test_visjs_non_string_labels_are_coerced():
+    code = json.dumps({
+        "nodes": [{"id": 1, "label": 1}, {"id": 2, "label": True, "shape": 3}, {"id": 3, "label": None}],
+        "edges": [{"from": 1, "to": 2, "label": 5, "arrows": "to"}, {"from": 2, "to": 3}],
+    })
+    graph = parse_visjs(code)
+
+    assert graph.nodes["1"].label == "1"
+    assert graph.nodes["2"].label == "True"
+    assert graph.nodes["2"].shape == "3"
+    assert graph.nodes["3"].label is None
+    assert graph.edges[0].label == "5"
+    assert graph.edges[1].label is None
+    # 변환기는 문자열 라벨을 가정한다
+    assert '1["1"]' in to_mermaid(graph)
+    assert 'label="5"' in to_dot(graph)
@@ -0,0 +1,116 @@
+# apps/api/tests/test_generation_cache.py
+"""generation_cache 회귀 테스트
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generation_cache as generation_cache_module  # noqa: E402
+from generation_cache import GenerationCache, make_cache_key, normalize_prompt  # noqa: E402
+
+
+@pytest.fixture
+def cache():
+    cache = GenerationCache()
+    cache.enabled = True
+    cache.persistent = False
+    cache.max_entries = 2
+    cache.ttl_seconds = 3600
+    return cache
+
+
+def test_prompt_normalization_ignores_width_whitespace_and_case():
+    assert normalize_prompt("  Draw\tA\n\nLogin  Flow ") == "draw a login flow"
+    assert normalize_prompt("ＡＢＣ") == "abc"
+    assert make_cache_key("gemini", "mermaid", "Draw  a flow") == make_cache_key("gemini", "mermaid", "draw a flow")
+
+
+def test_cache_key_separates_engine_and_provider():
+    key = make_cache_key("gemini", "mermaid", "draw a flow")
+    assert key != make_cache_key("gemini", "visjs", "draw a flow")
+    assert key != make_cache_key("openai", "mermaid", "draw a flow")
+
+
+def test_memory_hit_after_put(cache):
+    asyncio.run(cache.put("k", "d1", "mermaid", "graph TD\nA-->B", {"model": "m"}))
+    entry = asyncio.run(cache.get("k"))
+
+    assert entry["cache"] == "memory"
+    assert entry["diagram_id"] == "d1"
+    assert entry["code"] == "graph TD\nA-->B"
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    asyncio.run(cache.put("a", "1", "mermaid", "a", {}))
+    asyncio.run(cache.put("b", "2", "mermaid", "b", {}))
+    assert asyncio.run(cache.get("a")) is not None
+    asyncio.run(cache.put("c", "3", "mermaid", "c", {}))
+
+    assert asyncio.run(cache.get("b")) is None
+    assert asyncio.run(cache.get("a")) is not None
+    assert asyncio.run(cache.get("c")) is not None
+    assert cache.stats()["evictions_size"] == 1
+
+
+def test_expired_entry_is_a_miss(cache):
+    cache.ttl_seconds = 0
+    asyncio.run(cache.put("k", "d1", "mermaid", "code", {}))
+
+    assert asyncio.run(cache.get("k")) is None
+    stats = cache.stats()
+    assert stats["evictions_ttl"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 0
+
+
+def test_persistent_hit_is_promoted_to_memory(cache, monkeypatch):
+    calls = []
+
+    async def find_diagram_by_cache_key(key, since):
+        calls.append(key)
+        return SimpleNamespace(id="d9", engine="visjs", code="{}", meta={"cache_key": key},
+                               created_at=datetime.now())
+
+    monkeypatch.setattr(generation_cache_module.db, "find_diagram_by_cache_key", find_diagram_by_cache_key,
+                        raising=False)
+    cache.persistent = True
+
+    first = asyncio.run(cache.get("k"))
+    second = asyncio.run(cache.get("k"))
+
+    assert first["cache"] == "persistent"
+    assert first["diagram_id"] == "d9"
+    assert second["cache"] == "memory"
+    assert calls == ["k"]
+
+
+def test_persistent_error_is_counted_as_miss(cache, monkeypatch):
+    async def find_diagram_by_cache_key(key, since):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(generation_cache_module.db, "find_diagram_by_cache_key", find_diagram_by_cache_key,
+                        raising=False)
+    cache.persistent = True
+
+    assert asyncio.run(cache.get("k")) is None
+    stats = cache.stats()
+    assert stats["persistent_errors"] == 1
+    assert stats["misses"] == 1
+
+
+def test_disabled_cache_never_stores(cache):
+    cache.enabled = False
+    asyncio.run(cache.put("k", "d1", "mermaid", "code", {}))
+
+    assert asyncio.run(cache.get("k")) is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,176 @@
+# apps/api/tests/test_generation_jobs.py
+"""generation_jobs 회귀 테스트
+
+claim/requeue 의 SQL 은 PostgreSQL 이 필요하므로 db 를 메모리 작업 대기열로 대신한다.
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generation_jobs as generation_jobs_module  # noqa: E402
+from concurrency_limiter import LLMOverloadedError  # noqa: E402
+from generation_jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, GenerationJobWorkerPool, job_to_dict  # noqa: E402
+
+
+class MemoryJobQueue:
+    """claim_generation_job / update_generation_job / requeue_stale_generation_jobs 의 메모리 구현"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.stale_calls = []
+
+    def add(self, job_id, prompt="draw a flow"):
+        job = SimpleNamespace(id=job_id, prompt=prompt, engine="mermaid", provider="gemini",
+                              user_key="u1", plan="free", status=QUEUED, attempts=0, worker_id=None,
+                              available_at=None, diagram_id=None, result_meta=None, error=None,
+                              created_at=datetime.utcnow(), finished_at=None)
+        self.jobs[job_id] = job
+        return job
+
+    async def claim_generation_job(self, worker_id):
+        for job in self.jobs.values():
+            if job.status == QUEUED and (job.available_at is None or job.available_at <= datetime.utcnow()):
+                job.status = RUNNING
+                job.worker_id = worker_id
+                job.attempts += 1
+                return job
+        return None
+
+    async def update_generation_job(self, job_id, **fields):
+        for name, value in fields.items():
+            setattr(self.jobs[job_id], name, value)
+
+    async def requeue_stale_generation_jobs(self, stale_before, max_attempts):
+        self.stale_calls.append((stale_before, max_attempts))
+        return 0
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = MemoryJobQueue()
+    for name in ("claim_generation_job", "update_generation_job", "requeue_stale_generation_jobs"):
+        monkeypatch.setattr(generation_jobs_module.db, name, getattr(queue, name), raising=False)
+    return queue
+
+
+@pytest.fixture
+def pool():
+    pool = GenerationJobWorkerPool()
+    pool.concurrency = 2
+    pool.poll_interval = 0.01
+    pool.stale_seconds = 60
+    pool.max_attempts = 2
+    return pool
+
+
+def _generate_with(monkeypatch, fn):
+    monkeypatch.setattr(generation_jobs_module.generation_service, "generate", fn)
+
+
+def test_successful_job_records_diagram(pool, queue, monkeypatch):
+    async def generate(prompt, engine, provider, user_key, plan):
+        return {"success": True, "diagram_id": "d1", "metadata": {"model": "m"}}
+
+    _generate_with(monkeypatch, generate)
+    job = queue.add("j1")
+    job.attempts = 1
+    asyncio.run(pool.process(job))
+
+    assert job.status == SUCCEEDED
+    assert job.diagram_id == "d1"
+    assert job.result_meta == {"model": "m"}
+    assert job.finished_at is not None
+    assert pool.stats()["succeeded"] == 1
+
+
+def test_crash_marks_job_failed(pool, queue, monkeypatch):
+    async def generate(*args):
+        raise RuntimeError("boom")
+
+    _generate_with(monkeypatch, generate)
+    job = queue.add("j1")
+    job.attempts = 1
+    asyncio.run(pool.process(job))
+
+    assert job.status == FAILED
+    assert job.error == "boom"
+    assert pool.stats()["failed"] == 1
+
+
+def test_overload_requeues_until_attempts_run_out(pool, queue, monkeypatch):
+    async def generate(*args):
+        raise LLMOverloadedError("scheduler", 30, "queue full")
+
+    _generate_with(monkeypatch, generate)
+    job = queue.add("j1")
+    job.attempts = 1
+    asyncio.run(pool.process(job))
+
+    assert job.status == QUEUED
+    assert job.worker_id is None
+    assert job.available_at > datetime.utcnow()
+    assert pool.stats()["retried"] == 1
+
+    job.attempts = pool.max_attempts
+    asyncio.run(pool.process(job))
+
+    assert job.status == FAILED
+    assert "overloaded" in job.error
+
+
+def test_workers_claim_each_job_once(pool, queue, monkeypatch):
+    seen = []
+
+    async def generate(prompt, *args):
+        seen.append(prompt)
+        await asyncio.sleep(0.01)
+        return {"success": True, "diagram_id": f"d-{prompt}", "metadata": {}}
+
+    _generate_with(monkeypatch, generate)
+    for i in range(5):
+        queue.add(f"j{i}", prompt=f"p{i}")
+
+    async def run():
+        pool.start()
+        for _ in range(200):
+            if all(job.status == SUCCEEDED for job in queue.jobs.values()):
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+
+    asyncio.run(run())
+
+    assert sorted(seen) == [f"p{i}" for i in range(5)]
+    assert all(job.attempts == 1 for job in queue.jobs.values())
+    assert pool.stats()["claimed"] == 5
+    assert pool.stats()["running"] is False
+    # 첫 워커가 stale 작업 재등록을 맡는다
+    assert queue.stale_calls and all(max_attempts == 2 for _, max_attempts in queue.stale_calls)
+
+
+def test_job_to_dict_reports_result_or_error(queue):
+    done = queue.add("j1")
+    done.status = SUCCEEDED
+    done.diagram_id = "d1"
+    done.result_meta = {"model": "m"}
+    failed = queue.add("j2")
+    failed.status = FAILED
+    failed.error = "boom"
+
+    done_dict = job_to_dict(done, SimpleNamespace(code="graph TD"))
+    failed_dict = job_to_dict(failed)
+
+    assert done_dict["diagram_id"] == "d1"
+    assert done_dict["code"] == "graph TD"
+    assert "error" not in done_dict
+    assert failed_dict["error"] == "boom"
+    assert "diagram_id" not in failed_dict
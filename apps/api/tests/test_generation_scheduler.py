@@ -0,0 +1,144 @@
+# apps/api/tests/test_generation_scheduler.py
+"""generation_scheduler 회귀 테스트
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from concurrency_limiter import LLMOverloadedError  # noqa: E402
+from generation_scheduler import GenerationScheduler, _parse_weights  # noqa: E402
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = GenerationScheduler()
+    scheduler.capacity = 1
+    scheduler.max_queue = 100
+    scheduler.max_wait = 5
+    scheduler.weights = _parse_weights("pro:4,free:1")
+    return scheduler
+
+
+def _grant_order(scheduler, holder, tickets):
+    """슬롯을 하나씩 반납하며 배정된 순서대로 티켓 이름을 반환"""
+    order = []
+    current = holder
+    pending = dict(tickets)
+    while pending:
+        scheduler.release(current)
+        granted = [name for name, ticket in pending.items() if ticket.future.done()]
+        assert len(granted) == 1
+        order.append(granted[0])
+        current = pending.pop(granted[0])
+    scheduler.release(current)
+    return order
+
+
+def test_parse_weights_skips_malformed_items():
+    assert _parse_weights("team:8, pro:4,bogus,free:1") == {"team": 8.0, "pro": 4.0, "free": 1.0}
+
+
+def test_unknown_plan_uses_free_weight(scheduler):
+    assert scheduler.weight_for("enterprise") == 1.0
+
+
+def test_free_slot_is_granted_immediately(scheduler):
+    async def run():
+        return scheduler.enqueue("u1", "free")
+
+    ticket = asyncio.run(run())
+
+    assert ticket.future is None
+    assert scheduler.running == 1
+    assert scheduler.stats()["plans"]["free"]["served"] == 1
+
+
+def test_higher_weight_plan_is_served_more_often(scheduler):
+    async def run():
+        holder = scheduler.enqueue("holder", "free")
+        tickets = []
+        for i in range(2):
+            tickets.append((f"free{i}", scheduler.enqueue("f", "free")))
+        for i in range(4):
+            tickets.append((f"pro{i}", scheduler.enqueue("p", "pro")))
+        return _grant_order(scheduler, holder, tickets)
+
+    assert asyncio.run(run()) == ["pro0", "pro1", "pro2", "free0", "pro3", "free1"]
+
+
+def test_bulk_user_is_interleaved_with_same_plan_users(scheduler):
+    async def run():
+        holder = scheduler.enqueue("holder", "free")
+        tickets = [(f"bulk{i}", scheduler.enqueue("bulk", "free")) for i in range(3)]
+        tickets.append(("other", scheduler.enqueue("other", "free")))
+        return _grant_order(scheduler, holder, tickets)
+
+    assert asyncio.run(run()) == ["bulk0", "other", "bulk1", "bulk2"]
+
+
+def test_queue_position_is_reported(scheduler):
+    async def run():
+        scheduler.enqueue("holder", "free")
+        first = scheduler.enqueue("a", "free")
+        second = scheduler.enqueue("b", "pro")
+        return first.position, second.position
+
+    # pro 요청은 종료 태그가 더 작아 먼저 배정될 위치에 들어간다
+    assert asyncio.run(run()) == (1, 1)
+
+
+def test_full_queue_sheds_requests(scheduler):
+    scheduler.max_queue = 1
+
+    async def run():
+        scheduler.enqueue("holder", "free")
+        scheduler.enqueue("a", "free")
+        with pytest.raises(LLMOverloadedError):
+            scheduler.enqueue("b", "free")
+
+    asyncio.run(run())
+    assert scheduler.stats()["plans"]["free"]["shed"] == 1
+
+
+def test_wait_timeout_gives_up_the_place(scheduler):
+    scheduler.max_wait = 0.01
+
+    async def run():
+        holder = scheduler.enqueue("holder", "free")
+        ticket = scheduler.enqueue("a", "free")
+        with pytest.raises(LLMOverloadedError):
+            await scheduler.wait(ticket)
+        scheduler.release(holder)
+        return ticket
+
+    ticket = asyncio.run(run())
+
+    assert ticket.granted_at is None
+    assert scheduler.running == 0
+    assert scheduler.stats()["plans"]["free"]["timeouts"] == 1
+
+
+def test_slot_is_released_after_block(scheduler):
+    async def run():
+        holder = scheduler.enqueue("holder", "free")
+        ticket = scheduler.enqueue("a", "free")
+        waiter = asyncio.ensure_future(_use_slot(scheduler, ticket))
+        await asyncio.sleep(0)
+        scheduler.release(holder)
+        await waiter
+
+    asyncio.run(run())
+    assert scheduler.running == 0
+    assert scheduler.stats()["queue_depth"] == 0
+
+
+async def _use_slot(scheduler, ticket):
+    async with scheduler.slot(ticket):
+        assert scheduler.running == 1
@@ -0,0 +1,81 @@
+# apps/api/tests/test_mermaid_repair.py
+"""mermaid_repair 회귀 테스트
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mermaid_repair import BALANCED_BRACKETS, QUOTED_LABELS, MermaidRepairer  # noqa: E402
+
+
+@pytest.fixture
+def repairer():
+    return MermaidRepairer()
+
+
+WELL_FORMED = """flowchart LR
+  A[Run with --verbose] --> B[Done]
+  B == yes ==> C{x == y}
+  C -->|ok| D(Next step)
+  D --- E[a ~~~ b]
+  A & B --> F[(Database)]
+  F:::hot --> G[Finish]:::cold
+  subgraph api [API Layer]
+    H[Handler] -.-> I[Service]
+  end
+  click A "https://example.com" "Open"
+  style B fill:#f9f,stroke:#333
+  classDef hot fill:#f00
+  class C hot
+  %% comment"""
+
+
+def test_well_formed_flowchart_is_unchanged(repairer):
+    assert repairer.repair(WELL_FORMED) == (WELL_FORMED, [])
+
+
+@pytest.mark.parametrize("line", [
+    "A[Run with --verbose] --> B[Done]",
+    "B[x == y] --> C",
+    "A[a ~~~ b] --> B",
+    "A[x -- y] --> B",
+])
+def test_arrow_like_text_inside_closed_label_is_kept(repairer, line):
+    code = f"graph TD\n{line}"
+    assert repairer.repair(code) == (code, [])
+
+
+def test_arrow_inside_closed_label_is_not_split(repairer):
+    code, repairs = repairer.repair("graph TD\nA(cost <-- input) --> B")
+    assert code == 'graph TD\nA("cost <-- input") --> B'
+    assert BALANCED_BRACKETS not in repairs
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("A[Start --> B[End]", "A[Start] --> B[End]"),
+    ("A[Start --> B", "A[Start] --> B"),
+    ("A(Start --> B(End)", "A(Start) --> B(End)"),
+    ("A[x) --> B", "A[x] --> B"),
+])
+def test_unclosed_label_is_cut_at_edge(repairer, line, expected):
+    code, repairs = repairer.repair(f"graph TD\n{line}")
+    assert code == f"graph TD\n{expected}"
+    assert repairs == [BALANCED_BRACKETS]
+
+
+def test_inner_quotes_are_escaped(repairer):
+    code, repairs = repairer.repair('graph TD\nA["He said "hi""] --> B')
+    assert code == 'graph TD\nA["He said #quot;hi#quot;"] --> B'
+    assert repairs == [QUOTED_LABELS]
+
+
+def test_fences_and_missing_direction(repairer):
+    code, repairs = repairer.repair("```mermaid\ngraph\nA --> B\n```")
+    assert code == "graph TD\nA --> B"
+    assert repairs == ["stripped_fences", "added_direction"]
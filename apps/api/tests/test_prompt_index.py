@@ -0,0 +1,72 @@
+# apps/api/tests/test_prompt_index.py
+"""prompt_index 회귀 테스트
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from prompt_index import PromptIndex, direction_roles  # noqa: E402
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = PromptIndex(snapshot_path=tmp_path / "prompt_index.json")
+    index.enabled = True
+    return index
+
+
+def test_paraphrase_with_particles_and_spacing_hits(index):
+    index.add("k1", "gemini", "mermaid", "로그인 플로우 그려줘")
+
+    hit = index.lookup("gemini", "mermaid", "로그인 플로우를 그려 주세요")
+
+    assert hit is not None
+    assert hit[0] == "k1"
+
+
+@pytest.mark.parametrize("stored, query", [
+    ("사용자가 관리자에게 승인 요청을 보내는 시퀀스", "관리자가 사용자에게 승인 요청을 보내는 시퀀스"),
+    ("주문 서비스에서 결제 서비스로 요청을 보내는 흐름", "결제 서비스에서 주문 서비스로 요청을 보내는 흐름"),
+    ("draw a flowchart from A to B", "draw a flowchart from B to A"),
+])
+def test_swapped_direction_misses(index, stored, query):
+    index.add("k1", "gemini", "mermaid", stored)
+
+    assert index.lookup("gemini", "mermaid", query) is None
+    # 같은 문장은 여전히 적중한다
+    assert index.lookup("gemini", "mermaid", stored)[0] == "k1"
+
+
+def test_direction_roles_mark_source_and_target():
+    assert direction_roles("주문 서비스에서 결제 서비스로") == ["from:주문 서비스", "to:결제 서비스"]
+    assert direction_roles("사용자가 관리자에게 승인 요청을 보내는 시퀀스") == ["subj:사용자", "to:관리자"]
+    assert direction_roles("draw a flowchart from A to B") == ["from:a", "to:b"]
+    assert direction_roles("로그인 플로우 그려줘") == direction_roles("로그인 플로우를 그려 주세요") == []
+
+
+def test_different_numbers_miss(index):
+    index.add("k1", "gemini", "mermaid", "3단계 승인 플로우 그려줘")
+
+    assert index.lookup("gemini", "mermaid", "4단계 승인 플로우 그려줘") is None
+
+
+def test_lookup_is_scoped_by_engine_and_provider(index):
+    index.add("k1", "gemini", "mermaid", "로그인 플로우 그려줘")
+
+    assert index.lookup("gemini", "visjs", "로그인 플로우 그려줘") is None
+    assert index.lookup("openai", "mermaid", "로그인 플로우 그려줘") is None
+
+
+def test_snapshot_round_trip(index, tmp_path):
+    index.add("k1", "gemini", "mermaid", "로그인 플로우 그려줘")
+    index.save()
+
+    restored = PromptIndex(snapshot_path=tmp_path / "prompt_index.json")
+
+    assert restored.lookup("gemini", "mermaid", "로그인 플로우 그려줘")[0] == "k1"
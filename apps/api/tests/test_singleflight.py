@@ -0,0 +1,129 @@
+# apps/api/tests/test_singleflight.py
+"""singleflight 회귀 테스트
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from singleflight import SingleFlight  # noqa: E402
+
+
+def _counting_upstream(calls, delay=0.05, result="diagram"):
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+    return fn
+
+
+def test_concurrent_callers_share_one_upstream_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def run():
+        fn = _counting_upstream(calls)
+        return await asyncio.gather(*(flight.do("k", fn) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert [value for value, _ in results] == ["diagram"] * 5
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    stats = flight.stats()
+    assert stats["leaders"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    calls = []
+
+    async def run():
+        fn = _counting_upstream(calls)
+        return await asyncio.gather(flight.do("a", fn), flight.do("b", fn))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 2
+    assert all(not shared for _, shared in results)
+
+
+def test_completed_key_runs_again():
+    flight = SingleFlight()
+    calls = []
+
+    async def run():
+        fn = _counting_upstream(calls, delay=0)
+        await flight.do("k", fn)
+        return await flight.do("k", fn)
+
+    _, shared = asyncio.run(run())
+
+    assert len(calls) == 2
+    assert shared is False
+
+
+def test_failure_reaches_every_waiter_and_is_forgotten():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    async def run():
+        return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_waiter_timeout_does_not_cancel_upstream():
+    flight = SingleFlight()
+    calls = []
+
+    async def run():
+        fn = _counting_upstream(calls, delay=0.1)
+        patient = asyncio.ensure_future(flight.do("k", fn))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.do("k", fn, timeout=0.01)
+        return await patient
+
+    value, shared = asyncio.run(run())
+
+    assert value == "diagram"
+    assert shared is False
+    assert len(calls) == 1
+    assert flight.stats()["timeouts"] == 1
+
+
+def test_cancelled_waiter_does_not_cancel_upstream():
+    flight = SingleFlight()
+    calls = []
+
+    async def run():
+        fn = _counting_upstream(calls, delay=0.05)
+        leader = asyncio.ensure_future(flight.do("k", fn))
+        follower = asyncio.ensure_future(flight.do("k", fn))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    value, shared = asyncio.run(run())
+
+    assert value == "diagram"
+    assert shared is True
+    assert len(calls) == 1
+    assert flight.stats()["cancelled_waiters"] == 1
@@ -0,0 +1,118 @@
+# apps/api/tests/test_version_delta.py
+"""version_delta 회귀 테스트
+
+apps/api 에서 실행:
+    python -m pytest tests
+"""
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from version_delta import VersionDeltaStore, apply_delta, make_delta  # noqa: E402
+
+MERMAID = "\n".join(["graph TD"] + [f"  N{i}[Step {i}] --> N{i + 1}[Step {i + 1}]" for i in range(40)])
+VISJS = json.dumps({
+    "nodes": [{"id": i, "label": f"Node {i}"} for i in range(60)],
+    "edges": [{"from": i, "to": i + 1} for i in range(59)],
+})
+
+
+@pytest.mark.parametrize("base, code", [
+    (MERMAID, MERMAID.replace("Step 7]", "Step seven]")),
+    (MERMAID, MERMAID + "\n  N41 --> N0"),
+    (MERMAID, MERMAID.replace("  N3[Step 3] --> N4[Step 4]\n", "")),
+    (VISJS, VISJS.replace('"Node 30"', '"Renamed"')),
+    ("", "graph TD\nA --> B"),
+    ("graph TD\nA --> B", ""),
+    ("a,b,,c\n", "a,,b,c"),
+])
+def test_delta_round_trip(base, code):
+    assert apply_delta(base, make_delta(base, code)) == code
+
+
+def test_single_line_json_edit_is_small():
+    code = VISJS.replace('"Node 30"', '"Renamed"')
+    delta = json.dumps(make_delta(VISJS, code), separators=(",", ":"))
+
+    assert len(delta) < len(code) * 0.1
+
+
+@pytest.fixture
+def store():
+    store = VersionDeltaStore()
+    store.enabled = True
+    store.keyframe_interval = 3
+    store.max_delta_ratio = 0.5
+    store.max_entries = 100
+    return store
+
+
+def _save_chain(store, codes):
+    """codes 를 차례로 인코딩해 TaskVersion 과 같은 필드를 가진 행 dict 로 반환"""
+    rows = {}
+    previous = None
+    for i, code in enumerate(codes):
+        delta, depth = store.encode(code, previous.code_text if previous else None,
+                                    previous.chain_depth if previous else 0)
+        row = SimpleNamespace(id=f"v{i}", code=code if delta is None else "", delta=delta, chain_depth=depth,
+                              base_id=previous.id if delta is not None else None, code_text=code)
+        rows[row.id] = row
+        previous = row
+    return rows
+
+
+def test_keyframe_every_interval(store):
+    codes = [MERMAID.replace("Step 1]", f"Step 1 v{i}]") for i in range(7)]
+
+    rows = _save_chain(store, codes)
+
+    assert [row.chain_depth for row in rows.values()] == [0, 1, 2, 0, 1, 2, 0]
+    assert [row.delta is None for row in rows.values()] == [True, False, False, True, False, False, True]
+
+
+def test_large_change_is_stored_as_keyframe(store):
+    delta, depth = store.encode("completely different", MERMAID, 0)
+
+    assert delta is None
+    assert depth == 0
+
+
+def test_disabled_store_always_writes_keyframes(store):
+    store.enabled = False
+
+    assert store.encode(MERMAID + "\n", MERMAID, 0) == (None, 0)
+
+
+def test_reconstruct_walks_chain_from_keyframe(store):
+    codes = [MERMAID.replace("Step 1]", f"Step 1 v{i}]") for i in range(3)]
+    rows = _save_chain(store, codes)
+
+    assert store.reconstruct("v2", rows) == codes[2]
+    assert store.stats()["deltas_applied"] == 2
+    # 중간 버전도 LRU 에 들어가 다시 적용하지 않는다
+    assert store.reconstruct("v1", rows) == codes[1]
+    assert store.stats()["deltas_applied"] == 2
+
+
+def test_reconstruct_stops_at_known_ancestor(store):
+    codes = [MERMAID.replace("Step 1]", f"Step 1 v{i}]") for i in range(3)]
+    rows = _save_chain(store, codes)
+    del rows["v0"]
+
+    assert store.reconstruct("v2", rows, known={"v0": codes[0]}) == codes[2]
+
+
+def test_lru_evicts_oldest(store):
+    store.max_entries = 2
+    store.put("a", "1")
+    store.put("b", "2")
+    store.get("a")
+    store.put("c", "3")
+
+    assert store.has("a") and store.has("c")
+    assert not store.has("b")
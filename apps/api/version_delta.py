@@ -0,0 +1,151 @@
+# apps/api/version_delta.py
+import difflib
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 줄바꿈/쉼표 뒤에서 자른 조각 단위로 비교 (Mermaid 는 줄, 한 줄짜리 vis.js JSON 은 원소 단위)
+_CHUNK_PATTERN = re.compile(r"[^\n,]*(?:[\n,]|$)")
+
+DeltaOp = Union[List[int], str]
+
+
+def _chunks(code: str) -> List[str]:
+    return [chunk for chunk in _CHUNK_PATTERN.findall(code) if chunk]
+
+
+def make_delta(base: str, code: str) -> List[DeltaOp]:
+    """base → code 델타: [시작, 끝] 은 base 조각 복사, 문자열은 삽입"""
+    base_chunks, chunks = _chunks(base), _chunks(code)
+    offsets = [0]
+    for chunk in base_chunks:
+        offsets.append(offsets[-1] + len(chunk))
+
+    ops: List[DeltaOp] = []
+    matcher = difflib.SequenceMatcher(None, base_chunks, chunks, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            if ops and isinstance(ops[-1], list) and ops[-1][1] == offsets[i1]:
+                ops[-1][1] = offsets[i2]
+            else:
+                ops.append([offsets[i1], offsets[i2]])
+        elif j2 > j1:
+            inserted = "".join(chunks[j1:j2])
+            if ops and isinstance(ops[-1], str):
+                ops[-1] += inserted
+            else:
+                ops.append(inserted)
+    return ops
+
+
+def apply_delta(base: str, ops: List[DeltaOp]) -> str:
+    """make_delta 의 역변환"""
+    return "".join(base[op[0]:op[1]] if isinstance(op, list) else op for op in ops)
+
+
+class VersionDeltaStore:
+    """TaskVersion 코드의 키프레임/델타 인코딩 + 복원한 코드의 LRU
+
+    부모 버전 대비 델타로 저장하되, 체인 길이가 TASK_VERSION_KEYFRAME_INTERVAL 에 이르거나
+    델타가 원문 대비 충분히 작지 않으면 전체 코드(키프레임)를 저장한다.
+    복원은 가장 가까운 키프레임(또는 LRU 에 있는 조상)부터 델타를 차례로 적용한다.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("TASK_VERSION_DELTA_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+        self.keyframe_interval = max(1, int(os.getenv("TASK_VERSION_KEYFRAME_INTERVAL", "10")))
+        self.max_delta_ratio = float(os.getenv("TASK_VERSION_MAX_DELTA_RATIO", "0.5"))
+        self.max_entries = int(os.getenv("TASK_VERSION_CACHE_SIZE", "512"))
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._stats = {
+            "keyframes": 0, "deltas": 0, "bytes_in": 0, "bytes_stored": 0,
+            "reconstructions": 0, "deltas_applied": 0, "hits": 0, "misses": 0,
+        }
+
+    def encode(self, code: str, base_code: Optional[str], base_depth: int) -> Tuple[Optional[str], int]:
+        """저장할 (델타 JSON 또는 None=키프레임, 체인 깊이)"""
+        self._stats["bytes_in"] += len(code)
+        if self.enabled and base_code is not None and base_depth + 1 < self.keyframe_interval:
+            delta = json.dumps(make_delta(base_code, code), ensure_ascii=False, separators=(",", ":"))
+            if len(delta) <= len(code) * self.max_delta_ratio:
+                self._stats["deltas"] += 1
+                self._stats["bytes_stored"] += len(delta)
+                return delta, base_depth + 1
+        self._stats["keyframes"] += 1
+        self._stats["bytes_stored"] += len(code)
+        return None, 0
+
+    def decode(self, base_code: str, delta: str) -> str:
+        self._stats["deltas_applied"] += 1
+        return apply_delta(base_code, json.loads(delta))
+
+    def has(self, version_id: str) -> bool:
+        return version_id in self._cache
+
+    def get(self, version_id: str) -> Optional[str]:
+        code = self._cache.get(version_id)
+        if code is None:
+            self._stats["misses"] += 1
+            return None
+        self._cache.move_to_end(version_id)
+        self._stats["hits"] += 1
+        return code
+
+    def put(self, version_id: str, code: str) -> None:
+        self._cache[version_id] = code
+        self._cache.move_to_end(version_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def reconstruct(self, version_id: str, rows: Dict[str, Any], known: Optional[Dict[str, str]] = None) -> str:
+        """rows(id → TaskVersion 행)로 version_id 의 코드 복원
+
+        rows 에는 version_id 부터 키프레임, LRU 또는 known(id → 코드)에 있는 조상까지의 체인이 있어야 한다.
+        """
+        self._stats["reconstructions"] += 1
+        known = known or {}
+        chain = []
+        current = version_id
+        code = None
+        while True:
+            code = self.get(current)
+            if code is None:
+                code = known.get(current)
+            if code is not None:
+                break
+            row = rows[current]
+            if row.delta is None:
+                code = row.code
+                self.put(current, code)
+                break
+            chain.append(row)
+            current = str(row.base_id)
+        for row in reversed(chain):
+            code = self.decode(code, row.delta)
+            self.put(str(row.id), code)
+        return code
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        stored = self._stats["bytes_stored"]
+        return {
+            "enabled": self.enabled,
+            "keyframe_interval": self.keyframe_interval,
+            "size": len(self._cache),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "compression_ratio": round(self._stats["bytes_in"] / stored, 2) if stored else 0.0,
+            **self._stats,
+        }
+
+
+# 전역 TaskVersion 델타 저장소
+version_delta_store = VersionDeltaStore()